@@ -0,0 +1,198 @@
+"""
+Traitement par lots : estimation budgétaire puis génération du CDC pour une
+série de projets sérialisés (Project.to_bytes(), JSON ou msgpack).
+
+Tous les projets sont lus et validés d'abord, en une passe pydantic
+(models.projectSchema) : un projet mal formé est refusé avant tout appel LLM.
+
+Les projets passent par utils.job_scheduler en priorité BATCH, les auteurs
+servis à tour de rôle. Aucune place n'est réservée aux tâches interactives :
+ce processus n'en lance pas, le lot utilise les --concurrency places.
+
+Usage:
+    python batch.py projets/*.msgpack --out cdc/ --concurrency 4
+    python batch.py projets/*.json --fake-llm --fake-latency 0.2
+    python batch.py projets/*.json --budget-mode fanout   # un appel par livrable
+    python batch.py projets/*.json --metrics-file batch.prom   # métriques Prometheus en fin de lot
+    python batch.py projets/*.json --profile   # LLM factice, profil par étape dans cdc_profile/
+    python batch.py projets/*.json --fake-llm --track-memory 50   # croissance mémoire par étape
+    python batch.py projets/*.json --fake-llm --export html pdf   # exports sur tous les cœurs dans cdc_batch/exports/
+"""
+import argparse
+import os
+import time
+from contextlib import ExitStack
+from typing import ContextManager, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from models.Project import Project
+from models.projectSchema import format_errors, gc_paused, validate_projects
+from service import build_clients
+from utils.budget_estimator import ESTIMATION_MODES, BudgetEstimator
+from utils.cdc_exporter import FORMATS, export_many
+from utils.cdc_generator import CDCGenerator
+from utils.job_scheduler import JobScheduler, Priority
+from utils.memory_tracking import MemoryTracker, track_stage
+from utils.metrics import REGISTRY
+from utils.profiling import DEFAULT_PROFILE_DIR, Profiler, profile_stage
+
+
+PROJECTS = REGISTRY.counter("cdc_batch_projects_total", "Projets traités par le lot, par statut", ("status",))
+PROJECT_SECONDS = REGISTRY.histogram("cdc_batch_project_seconds", "Durée de traitement d'un projet, en secondes")
+
+
+def _stage(name: str, profiler: Optional[Profiler], tracker: Optional[MemoryTracker]) -> ContextManager[None]:
+    stack = ExitStack()
+    stack.enter_context(profile_stage(profiler, name))
+    stack.enter_context(track_stage(tracker, name))
+    return stack
+
+
+def load_projects(paths: List[str]) -> Tuple[Dict[str, Project], Dict[str, str]]:
+    """
+    Lit tous les projets et les valide en un seul appel (voir models.projectSchema.validate_projects).
+
+    Args:
+        paths: Fichiers produits par Project.to_bytes()
+
+    Returns:
+        (projets valides par chemin, message d'erreur par chemin refusé)
+    """
+    raw, errors = [], {}
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                raw.append((path, Project.decode_bytes(f.read())))
+        except (OSError, ValueError) as e:
+            errors[path] = f"{type(e).__name__}: {e}"
+    # Avant le démarrage des workers : suspendre le ramasse-miettes ne gêne aucun autre thread
+    with gc_paused():
+        projects, rejected = validate_projects([data for _, data in raw])
+    for index, project_errors in rejected:
+        errors[raw[index][0]] = format_errors(project_errors)
+    valid_paths = [path for path, _ in raw if path not in errors]
+    return dict(zip(valid_paths, projects)), errors
+
+
+def process_project(path: str, out_dir: str, estimator: BudgetEstimator, generator: CDCGenerator,
+                    budget_mode: str = "single", profiler: Optional[Profiler] = None,
+                    tracker: Optional[MemoryTracker] = None, project: Optional[Project] = None) -> str:
+    """
+    Estime le budget d'un projet (voir BudgetEstimator.estimate), l'applique, puis génère et sauvegarde son CDC.
+
+    Args:
+        project: Projet déjà chargé et validé (voir load_projects) ; None = lu depuis `path`
+        profiler: Profileur des étapes (voir utils.profiling) ; None = pas de profilage
+        tracker: Suivi mémoire des étapes (voir utils.memory_tracking) ; None = pas de suivi
+
+    Returns:
+        Chemin du CDC généré
+    """
+    with PROJECT_SECONDS.time():
+        if project is None:
+            with _stage("load", profiler, tracker), open(path, "rb") as f:
+                project = Project.from_bytes(f.read())
+        with _stage("budget", profiler, tracker):
+            estimator.apply_budget_to_project(project, estimator.estimate(project, budget_mode))
+        with _stage("generation", profiler, tracker):
+            content = "".join(generator.stream_cdc(project))
+        with _stage("finalize", profiler, tracker):
+            cdc_content, _ = generator.finalize_cdc(content)
+        with _stage("save", profiler, tracker):
+            name = os.path.splitext(os.path.basename(path))[0]
+            return generator.save_cdc_to_file(cdc_content, os.path.join(out_dir, f"CDC_{name}.md"))
+
+
+def export_cdcs(cdc_paths: List[str], formats: List[str], out_dir: str) -> None:
+    """
+    Exporte les CDC générés par le lot dans un pool de processus (voir utils.cdc_exporter.export_many).
+
+    Args:
+        cdc_paths: Fichiers .md produits par process_project
+        formats: Formats à produire ("html", "pdf", "docx")
+        out_dir: Dossier de sortie des exports
+    """
+    documents = {}
+    for cdc_path in cdc_paths:
+        with open(cdc_path, encoding="utf-8") as f:
+            documents[os.path.splitext(os.path.basename(cdc_path))[0]] = f.read()
+    start = time.perf_counter()
+    results = export_many(documents, formats, out_dir)
+    errors = [result for result in results if result.error]
+    for result in errors:
+        print(f"❌ export {result.source}.{result.fmt}: {result.error}")
+    print(f"📄 {len(results) - len(errors)}/{len(results)} exports dans {out_dir} "
+          f"en {time.perf_counter() - start:.1f} s ({sum(result.cached for result in results)} depuis le cache)")
+
+
+def main() -> None:
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Estimation et génération de CDC par lots")
+    parser.add_argument("projects", nargs="+", help="fichiers produits par Project.to_bytes()")
+    parser.add_argument("--out", default="cdc_batch")
+    parser.add_argument("--concurrency", type=int, default=4, help="appels LLM simultanés")
+    parser.add_argument("--budget-mode", choices=ESTIMATION_MODES, default="single",
+                        help="estimation en un appel ou par livrable (fanout)")
+    parser.add_argument("--fake-llm", action="store_true", help="modèle local factice, sans clé API")
+    parser.add_argument("--fake-latency", type=float, default=0.0)
+    parser.add_argument("--metrics-file", help="écrit les métriques (format texte Prometheus) en fin de lot")
+    parser.add_argument("--profile", nargs="?", const=DEFAULT_PROFILE_DIR, metavar="DIR",
+                        help="profile chaque étape avec le modèle factice (résultats dans DIR)")
+    parser.add_argument("--export", nargs="+", choices=FORMATS, metavar="FORMAT",
+                        help="exporte les CDC générés (html, pdf, docx) sur tous les cœurs, dans OUT/exports")
+    parser.add_argument("--track-memory", nargs="?", type=int, const=100, metavar="N",
+                        help="suit la mémoire retenue par étape (instantané tous les N projets, défaut : CDC_MEMORY_TRACKING)")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    # Profilage : seul le temps local compte, le LLM est toujours remplacé par le modèle factice
+    profiler = Profiler() if args.profile else None
+    tracker = MemoryTracker(every=args.track_memory) if args.track_memory else MemoryTracker.from_env()
+    estimator, generator = build_clients(args.fake_llm or profiler is not None, args.fake_latency)
+    start = time.perf_counter()
+    projects, errors = load_projects(args.projects)
+    failed = len(errors)
+    for path, error in errors.items():
+        PROJECTS.inc(status="invalid")
+        print(f"❌ {path}: projet invalide, ignoré ({error})")
+
+    generated: Dict[str, str] = {}
+    # Aucune tâche interactive dans ce processus : pas de place réservée, --concurrency appels simultanés
+    with JobScheduler(max_concurrent=args.concurrency, interactive_reserve=0, name="batch") as scheduler:
+        futures = {
+            path: scheduler.submit(process_project, path, args.out, estimator, generator, args.budget_mode, profiler, tracker,
+                                   project, priority=Priority.BATCH, author=os.path.dirname(os.path.abspath(path)))
+            for path, project in projects.items()
+        }
+        for path, future in futures.items():
+            try:
+                cdc_path = future.result()
+                generated[path] = cdc_path
+                print(f"✅ {path} -> {cdc_path}")
+                PROJECTS.inc(status="ok")
+            except Exception as e:
+                failed += 1
+                PROJECTS.inc(status="failed")
+                print(f"❌ {path}: {type(e).__name__}: {e}")
+
+        metrics = scheduler.metrics()["batch"]
+
+    print(f"\n{len(args.projects) - failed}/{len(args.projects)} CDC générés en {time.perf_counter() - start:.1f} s "
+          f"(attente p95 : {metrics['wait_p95_ms']:.0f} ms)")
+    if args.export and generated:
+        export_cdcs(list(generated.values()), args.export, os.path.join(args.out, "exports"))
+    if args.metrics_file:
+        REGISTRY.dump(args.metrics_file)
+        print(f"📈 Métriques écrites dans {args.metrics_file}")
+    if profiler is not None:
+        profiler.stop()
+        print("\n" + profiler.summary(top=10))
+        print(f"🔬 Profil écrit dans {profiler.write(args.profile)['collapsed']} (et .pstats par étape)")
+    if tracker is not None:
+        print("\n" + tracker.report(top=10))
+        tracker.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Estimation budgétaire en un appel ("single") contre un appel par livrable
+("fanout"), sur le modèle LLM factice.
+
+Le modèle factice simule un débit de sortie (--tokens-per-second) : un seul
+appel qui rédige tous les items est limité par la longueur de sa réponse,
+alors qu'en fan-out la latence suit le livrable le plus lent. Avec
+--error-rate, une part des réponses est tronquée : en mode single toute
+l'estimation échoue, en fan-out seul le livrable concerné est relancé.
+
+Usage:
+    python -m benchmarks.budget_fanout_bench [--deliverables 20] [--runs 5] [--latency 0.3]
+        [--tokens-per-second 80] [--error-rate 0.1] [--workers 8]
+"""
+import argparse
+import time
+
+from benchmarks.sample_project import make_project
+from utils.budget_estimator import BudgetEstimator, unestimated_deliverables
+from utils.fake_llm import FakeChatModel
+from utils.job_scheduler import _percentile
+
+
+def run(args, mode: str) -> dict:
+    llm = FakeChatModel(latency=args.latency, tokens_per_second=args.tokens_per_second,
+                        error_rate=args.error_rate, seed=1)
+    estimator = BudgetEstimator(llm=llm, fanout_workers=args.workers)
+    latencies, failures, incomplete = [], 0, 0
+    for run_index in range(args.runs):
+        project = make_project(args.deliverables, seed=run_index)
+        start = time.perf_counter()
+        try:
+            estimate = estimator.estimate(project, mode)
+        except Exception:
+            failures += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+        if mode == "fanout" and unestimated_deliverables(estimate):
+            incomplete += 1
+        # Vérifie l'agrégation locale
+        if mode == "fanout":
+            assert abs(estimate.total_cost - sum(item.cost for item in estimate.items)) < 0.01
+    return {
+        "p50_s": _percentile(latencies, 50),
+        "max_s": max(latencies, default=0.0),
+        "failures": failures,
+        "incomplete": incomplete,
+        "calls": llm.calls,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--deliverables", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.3, help="délai avant le premier token (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=80.0, help="débit de sortie simulé")
+    parser.add_argument("--error-rate", type=float, default=0.1, help="part de réponses tronquées")
+    parser.add_argument("--workers", type=int, default=8, help="appels simultanés en fan-out")
+    args = parser.parse_args()
+
+    print(f"{args.runs} estimations de {args.deliverables} livrables, latence {args.latency * 1000:.0f} ms, "
+          f"{args.tokens_per_second:.0f} tokens/s, {args.error_rate:.0%} de réponses invalides")
+    for mode in ("single", "fanout"):
+        result = run(args, mode)
+        print(f"  {mode:<7} p50 {result['p50_s']:6.2f} s   max {result['max_s']:6.2f} s   "
+              f"échecs {result['failures']}/{args.runs}   incomplètes {result['incomplete']}   "
+              f"appels LLM {result['calls']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Soumissions répétées sur le modèle LLM factice : la mémoire doit rester bornée.
+
+Chaque soumission reproduit le Submit de l'interface avec des clients
+partagés : projet désérialisé, estimation budgétaire, génération et
+validation du CDC, rendu de describe() et construction du payload webhook.
+Les projets tournent sur --projects variantes (plus que la taille du cache
+d'estimations, pour que ses évictions soient exercées).
+
+La croissance de la mémoire tracée (tracemalloc) entre la fin de
+l'échauffement et la dernière soumission doit rester sous --max-growth-kb ;
+sinon les sites d'allocation qui grossissent sont affichés et le
+benchmark échoue (code de sortie 1).
+
+Usage:
+    python -m benchmarks.memory_soak [--submissions 10000] [--projects 300] [--warmup 1000]
+        [--every 1000] [--max-growth-kb 1024] [--budget-mode single]
+"""
+import argparse
+import sys
+import time
+
+from benchmarks.sample_project import make_project
+from models.Project import Project
+from models.projectRenderer import StringSink
+from utils.budget_estimator import ESTIMATION_MODES, BudgetEstimator
+from utils.cdc_generator import CDCGenerator
+from utils.fake_llm import FakeChatModel
+from utils.memory_tracking import MemoryTracker
+from utils.webhook_client import build_payload, encode_payload
+
+
+STAGES = ("budget", "generation", "describe", "payload")
+
+
+def submit(data: bytes, estimator: BudgetEstimator, generator: CDCGenerator, tracker: MemoryTracker, mode: str) -> None:
+    project = Project.from_bytes(data)
+    with tracker.stage("budget"):
+        estimator.apply_budget_to_project(project, estimator.estimate(project, mode))
+    with tracker.stage("generation"):
+        cdc_content, _ = generator.finalize_cdc("".join(generator.stream_cdc(project)))
+    with tracker.stage("describe"):
+        project.describe(sink=StringSink())
+    with tracker.stage("payload"):
+        encode_payload(build_payload(project, cdc_content=cdc_content))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--submissions", type=int, default=10000)
+    parser.add_argument("--projects", type=int, default=300, help="variantes de projets soumises à tour de rôle")
+    parser.add_argument("--warmup", type=int, default=1000, help="soumissions avant la mesure de référence")
+    parser.add_argument("--every", type=int, default=1000, help="soumissions entre deux instantanés")
+    parser.add_argument("--max-growth-kb", type=float, default=1024.0, help="croissance tolérée après l'échauffement")
+    parser.add_argument("--budget-mode", choices=ESTIMATION_MODES, default="single")
+    args = parser.parse_args()
+
+    projects = [make_project(4 + i % 5, seed=i).to_bytes() for i in range(args.projects)]
+    llm = FakeChatModel()
+    estimator = BudgetEstimator(llm=llm)
+    generator = CDCGenerator(llm=llm, attachments_budget=None)
+    tracker = MemoryTracker(every=args.every, warmup=args.warmup)
+    tracker.start()
+
+    print(f"{args.submissions} soumissions, {args.projects} projets, mode {args.budget_mode}")
+    start = time.perf_counter()
+    for i in range(args.submissions):
+        submit(projects[i % len(projects)], estimator, generator, tracker, args.budget_mode)
+        if (i + 1) % args.every == 0:
+            stage = tracker.stages["payload"]
+            current = stage.points[-1][1] if stage.points else 0
+            print(f"  {i + 1:>6} soumissions  {time.perf_counter() - start:7.1f} s  mémoire tracée {current / 1e6:6.2f} Mo")
+
+    print("\n" + tracker.report(top=8))
+    growth = tracker.stages["payload"].growth
+    tracker.stop()
+    print(f"\nCroissance après échauffement : {growth / 1024:+.1f} Ko (limite {args.max_growth_kb:.0f} Ko), "
+          f"{args.submissions / (time.perf_counter() - start):.0f} soumissions/s")
+    if growth > args.max_growth_kb * 1024:
+        print("❌ Mémoire non bornée")
+        sys.exit(1)
+    print("✅ Mémoire bornée")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Débit cumulé de plusieurs processus partageant le limiteur (utils.rate_limiter),
+sur le modèle LLM factice.
+
+Chaque processus appelle le modèle en boucle avec --threads threads pendant
+--duration secondes. Le débit mesuré (requêtes et tokens par minute) doit
+rester au niveau des limites sans les dépasser.
+
+Usage:
+    python -m benchmarks.rate_limit_bench [--processes 4] [--rpm 1200] [--tpm 600000] [--duration 10]
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks.sample_project import make_project
+from utils.budget_estimator import BudgetEstimator
+from utils.fake_llm import FakeChatModel
+from utils.rate_limiter import RateLimitedChatModel, RateLimiter
+
+
+def _worker(args, path: str, results) -> None:
+    limiter = RateLimiter({"fake-chat": (args.rpm, args.tpm)}, path=path, burst_seconds=args.burst)
+    llm = RateLimitedChatModel(FakeChatModel(latency=args.latency), limiter, max_completion_tokens=args.max_completion)
+    messages = BudgetEstimator(llm=FakeChatModel())._project_to_context(make_project(10, seed=os.getpid()))
+    deadline = time.time() + args.duration
+    counts = {"requests": 0, "tokens": 0, "first": time.time(), "last": 0.0}
+    lock = threading.Lock()
+
+    def loop():
+        while time.time() < deadline:
+            response = llm.invoke([("system", "Estimation budgétaire"), ("human", messages)])
+            with lock:
+                counts["requests"] += 1
+                counts["tokens"] += response.usage_metadata["total_tokens"]
+                counts["last"] = time.time()
+
+    threads = [threading.Thread(target=loop) for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put(counts)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4, help="threads par processus")
+    parser.add_argument("--rpm", type=float, default=1200)
+    parser.add_argument("--tpm", type=float, default=600000)
+    parser.add_argument("--burst", type=float, default=1.0, help="capacité des seaux en secondes de débit")
+    parser.add_argument("--max-completion", type=int, default=4096)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ratelimit.sqlite3")
+        RateLimiter({}, path=path)  # crée le schéma avant le démarrage des processus
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=_worker, args=(args, path, results)) for _ in range(args.processes)]
+        for process in processes:
+            process.start()
+        totals = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+    # Fenêtre réelle des appels (les processus ne démarrent pas tous au même instant)
+    elapsed = max(t["last"] for t in totals) - min(t["first"] for t in totals)
+
+    requests = sum(t["requests"] for t in totals)
+    tokens = sum(t["tokens"] for t in totals)
+    # Le seau est plein au départ : on autorise une rafale de burst secondes en plus
+    allowed_requests = args.rpm / 60 * (elapsed + args.burst)
+    allowed_tokens = args.tpm / 60 * (elapsed + args.burst)
+    print(f"{args.processes} processus × {args.threads} threads pendant {elapsed:.1f} s "
+          f"(limites {args.rpm:.0f} RPM, {args.tpm:.0f} TPM)")
+    print(f"  requêtes  {requests:>8}  ({requests / elapsed * 60:,.0f}/min, max autorisé {allowed_requests:,.0f})")
+    print(f"  tokens    {tokens:>8}  ({tokens / elapsed * 60:,.0f}/min, max autorisé {allowed_tokens:,.0f})")
+    print(f"  dépassement : {'NON' if requests <= allowed_requests and tokens <= allowed_tokens else 'OUI'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark de l'historique des révisions : stockage en deltas JSON Patch vs copies complètes.
+
+Chaque révision applique une petite modification au projet (objectif ajouté
+ou retiré, déclencheur réécrit, notes complétées…), puis toutes les versions
+sont reconstruites depuis un RevisionStore neuf (sans tête en mémoire).
+
+Usage:
+    python -m benchmarks.revision_bench [--revisions 500] [--size 10] [--snapshot-every 20]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import orjson
+
+from benchmarks.sample_project import make_project
+from utils.revision_store import RevisionStore, project_key
+
+
+def _edit(project, rng: random.Random, i: int) -> None:
+    choice = rng.randrange(4)
+    if choice == 0:
+        project.objectives.insert(rng.randrange(len(project.objectives) + 1), f"Objectif ajouté {i}")
+    elif choice == 1 and project.objectives:
+        project.objectives.pop(rng.randrange(len(project.objectives)))
+    elif choice == 2:
+        project.context["trigger"] = f"Déclencheur révisé {i}"
+    else:
+        project.notes += f" Compte rendu {i}."
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--revisions", type=int, default=500)
+    parser.add_argument("--size", type=int, default=10, help="éléments par liste")
+    parser.add_argument("--snapshot-every", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    project = make_project(args.size)
+    key = project_key(project)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "revisions.sqlite3")
+        store = RevisionStore(path, snapshot_every=args.snapshot_every)
+        full_bytes = 0
+        start = time.perf_counter()
+        for i in range(args.revisions):
+            _edit(project, rng, i)
+            store.commit(key, project)
+            full_bytes += len(orjson.dumps(project.to_dict()))
+        commit_time = time.perf_counter() - start
+
+        history = store.history(key)
+        stored = sum(revision.size for revision in history)
+        snapshots = sum(revision.kind == "snapshot" for revision in history)
+        print(f"{args.revisions} révisions, {args.size} éléments par liste, copie complète toutes les {args.snapshot_every}\n")
+        print(f"commit      {commit_time / args.revisions * 1000:8.2f} ms/révision")
+        print(f"stockage    {stored / 1024:8.1f} Ko ({snapshots} copies complètes)   "
+              f"copies complètes : {full_bytes / 1024:.1f} Ko ({full_bytes / stored:.1f}x)")
+
+        fresh = RevisionStore(path, snapshot_every=args.snapshot_every)
+        start = time.perf_counter()
+        for version in range(1, args.revisions + 1):
+            fresh.get_dict(key, version)
+        rebuild_time = time.perf_counter() - start
+        print(f"reconstruction {rebuild_time / args.revisions * 1000:5.2f} ms/version")
+        assert fresh.get_dict(key) == orjson.loads(orjson.dumps(project.to_dict()))
+
+
+if __name__ == "__main__":
+    main()
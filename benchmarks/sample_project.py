@@ -0,0 +1,56 @@
+from models.Project import Project
+
+
+def make_project(size: int = 10, seed: int = 0) -> Project:
+    """
+    Construit un projet réaliste pour les benchmarks.
+
+    Args:
+        size: Nombre d'éléments dans chaque liste (enjeux, objectifs, périmètre…)
+        seed: Suffixe pour différencier les projets d'un même lot
+
+    Returns:
+        Project rempli sur toutes ses sections
+    """
+    project = Project()
+    project.meta = {
+        "client_name": f"Client {seed}",
+        "project_name": f"Refonte site e-commerce {seed}",
+        "entreprise_name": "Entreprise ABC",
+        "author": "Consultant",
+        "version": "1.0",
+        "created_at": "2026-01-15T10:00:00"
+    }
+    project.context = {
+        "trigger": "Chute du taux de conversion mobile depuis 6 mois",
+        "current_state": "Site Magento vieillissant, non responsive",
+        "stakes": [f"Enjeu {i} : perte de chiffre d'affaires sur le canal {i}" for i in range(size)]
+    }
+    project.objectives = [f"Augmenter les conversions mobiles de {i + 5}% en 6 mois" for i in range(size)]
+    project.targets = {
+        "primary": [f"Acheteurs mobiles segment {i}" for i in range(size)],
+        "secondary": [f"Prescripteurs B2B segment {i}" for i in range(size)],
+        "journey": "Découverte → Exploration → Achat → Fidélisation"
+    }
+    project.scope = {
+        "in": [f"Refonte du gabarit de page {i}" for i in range(size)],
+        "out": [f"Migration du module historique {i}" for i in range(size)],
+        "changeRule": "Tout changement majeur doit être validé par le client"
+    }
+    project.deliverables = [f"Livrable {i} : maquettes et intégration" for i in range(size)]
+    project.constraints = {f"contrainte_{i}": "RGPD, accessibilité RGAA, SEO" for i in range(size)}
+    project.timeline = [f"Semaine {i} : jalon {i}" for i in range(size)]
+    project.governance = {
+        "decision_maker": "Directeur produit",
+        "validators": [f"Validateur {i}" for i in range(size)],
+        "contacts": [f"contact{i}@entreprise.com" for i in range(size)]
+    }
+    project.budget = {
+        "total": "45 000,00 €",
+        "items": [f"Poste {i}: 10h × 80€/h = 800,00€" for i in range(size)],
+        "tradeoffs": "Reporter la V2 du tunnel de paiement"
+    }
+    project.acceptance = {"criteria": [f"Critère {i} : Lighthouse > 90" for i in range(size)]}
+    project.risks = [f"Risque {i} : retard de livraison des contenus" for i in range(size)]
+    project.notes = "Notes de réunion. " * size
+    return project
@@ -0,0 +1,80 @@
+"""
+Latence des soumissions interactives pendant un lot, avec et sans
+l'ordonnanceur (utils.job_scheduler), sur le modèle LLM factice.
+
+Un lot de --batch projets (répartis sur --authors auteurs) est soumis d'un
+coup, puis --interactive soumissions interactives arrivent pendant le lot.
+Sans ordonnanceur (file FIFO d'un ThreadPoolExecutor), elles attendent la fin
+du lot ; avec, elles passent devant.
+
+Usage:
+    python -m benchmarks.scheduler_bench [--batch 500] [--interactive 20] [--concurrency 8] [--latency 0.02]
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.sample_project import make_project
+from utils.budget_estimator import BudgetEstimator
+from utils.fake_llm import FakeChatModel
+from utils.job_scheduler import JobScheduler, Priority, _percentile
+
+
+def _timed(estimator: BudgetEstimator, project, submitted_at: float) -> float:
+    estimator.estimate_budget(project)
+    return time.perf_counter() - submitted_at
+
+
+def run(args, use_scheduler: bool) -> dict:
+    estimator = BudgetEstimator(llm=FakeChatModel(latency=args.latency))
+    batch = [make_project(5, seed=i) for i in range(args.batch)]
+    interactive = [make_project(5, seed=-i) for i in range(args.interactive)]
+
+    if use_scheduler:
+        pool = JobScheduler(max_concurrent=args.concurrency)
+        submit_batch = lambda i, p: pool.submit(_timed, estimator, p, time.perf_counter(),
+                                                priority=Priority.BATCH, author=f"auteur-{i % args.authors}")
+        submit_interactive = lambda p: pool.submit(_timed, estimator, p, time.perf_counter(),
+                                                   priority=Priority.INTERACTIVE, author="gui")
+    else:
+        pool = ThreadPoolExecutor(max_workers=args.concurrency)  # type: ignore
+        submit_batch = lambda i, p: pool.submit(_timed, estimator, p, time.perf_counter())
+        submit_interactive = lambda p: pool.submit(_timed, estimator, p, time.perf_counter())
+
+    start = time.perf_counter()
+    batch_futures = [submit_batch(i, p) for i, p in enumerate(batch)]
+    interactive_futures = []
+    for project in interactive:
+        time.sleep(args.batch * args.latency / args.concurrency / max(1, args.interactive) / 2)
+        interactive_futures.append(submit_interactive(project))
+
+    interactive_latencies = [f.result() for f in interactive_futures]
+    [f.result() for f in batch_futures]
+    elapsed = time.perf_counter() - start
+    pool.shutdown()
+    return {
+        "interactive_p50_ms": _percentile(interactive_latencies, 50) * 1000,
+        "interactive_p95_ms": _percentile(interactive_latencies, 95) * 1000,
+        "batch_total_s": elapsed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--authors", type=int, default=3)
+    parser.add_argument("--interactive", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.02, help="latence simulée par appel LLM (s)")
+    args = parser.parse_args()
+
+    print(f"Lot de {args.batch} projets + {args.interactive} soumissions interactives, "
+          f"{args.concurrency} appels simultanés, latence LLM {args.latency * 1000:.0f} ms")
+    for label, use_scheduler in (("FIFO", False), ("ordonnanceur", True)):
+        result = run(args, use_scheduler)
+        print(f"  {label:<13} interactif p50 {result['interactive_p50_ms']:8.1f} ms   "
+              f"p95 {result['interactive_p95_ms']:8.1f} ms   lot {result['batch_total_s']:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Benchmark de sérialisation des projets : stdlib json vs orjson vs ormsgpack.
+
+Usage:
+    python -m benchmarks.serialization_bench [--projects 5000] [--size 10]
+"""
+import argparse
+import json
+import time
+
+from models.Project import Project
+from benchmarks.sample_project import make_project
+
+
+def _bench(label: str, projects: list, dump, load) -> None:
+    start = time.perf_counter()
+    payloads = [dump(project) for project in projects]
+    dump_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    restored = [load(payload) for payload in payloads]
+    load_time = time.perf_counter() - start
+
+    assert restored[0].to_dict() == projects[0].to_dict()
+    total_bytes = sum(len(payload) for payload in payloads)
+    print(
+        f"{label:<10} dump {dump_time * 1000:8.1f} ms   load {load_time * 1000:8.1f} ms   "
+        f"{total_bytes / len(projects):8.0f} octets/projet"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--projects", type=int, default=5000)
+    parser.add_argument("--size", type=int, default=10, help="éléments par liste")
+    args = parser.parse_args()
+
+    projects = [make_project(args.size, seed=i) for i in range(args.projects)]
+    print(f"{args.projects} projets, {args.size} éléments par liste\n")
+
+    _bench(
+        "json",
+        projects,
+        lambda p: json.dumps(p.to_dict(), ensure_ascii=False).encode("utf-8"),
+        lambda b: Project.from_dict(json.loads(b), copy=False),
+    )
+    _bench("orjson", projects, lambda p: p.to_bytes("json"), Project.from_bytes)
+    _bench("msgpack", projects, lambda p: p.to_bytes("msgpack"), Project.from_bytes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Test de charge du mode service (service.py) avec le modèle LLM factice.
+
+Démarre le service dans le processus courant, envoie des requêtes
+/estimate (wait) et /generate (streaming) en parallèle, puis affiche le
+débit, les latences et le nombre de requêtes refusées (429).
+
+Usage:
+    python -m benchmarks.service_bench [--requests 500] [--concurrency 64] [--workers 8] [--latency 0.05]
+"""
+import argparse
+import asyncio
+import time
+
+import aiohttp
+
+from benchmarks.sample_project import make_project
+from service import build_service, serve
+
+
+def _percentile(values, p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+async def run(args) -> None:
+    service = build_service(fake_llm=True, fake_latency=args.latency, workers=args.workers, queue_size=args.queue_size)
+    server = await serve(service, port=0)
+    url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+
+    latencies = []
+    statuses: dict = {}
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=args.concurrency)) as session:
+        async with session.post(f"{url}/projects", json=make_project(args.size, seed=0).to_dict()) as response:
+            project_id = (await response.json())["project_id"]
+
+        async def one(i: int) -> None:
+            generate = i % 2 == 1
+            async with semaphore:
+                start = time.perf_counter()
+                body = {"project_id": project_id, "wait": True}
+                async with session.post(f"{url}/{'generate' if generate else 'estimate'}", json=body) as response:
+                    await response.read()
+                    statuses[response.status] = statuses.get(response.status, 0) + 1
+                if response.status == 200:
+                    latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - start
+
+    server.close()
+    await server.wait_closed()
+    await service.stop()
+
+    print(f"{args.requests} requêtes, {args.concurrency} clients, {args.workers} workers, "
+          f"file de {args.queue_size}, latence LLM {args.latency * 1000:.0f} ms")
+    print(f"  statuts          {dict(sorted(statuses.items()))}")
+    print(f"  débit            {statuses.get(200, 0) / elapsed:,.1f} req/s")
+    print(f"  latence p50      {_percentile(latencies, 50) * 1000:,.1f} ms")
+    print(f"  latence p95      {_percentile(latencies, 95) * 1000:,.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--queue-size", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.05, help="latence simulée par appel LLM (s)")
+    parser.add_argument("--size", type=int, default=10, help="taille des listes du projet de test")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
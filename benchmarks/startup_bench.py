@@ -0,0 +1,99 @@
+"""
+Benchmark de démarrage de l'interface graphique.
+
+Mesure :
+- le coût des imports de main_test (python -X importtime), avec les modules les plus lourds ;
+- le temps jusqu'à la première fenêtre affichée (lancement du processus → window.show()
+  + premier cycle d'événements), comparé à un objectif.
+
+Usage:
+    python -m benchmarks.startup_bench [--runs 5] [--target-ms 800]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+
+IMPORTTIME_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+FIRST_WINDOW_SNIPPET = """
+from PySide6.QtWidgets import QApplication
+app = QApplication([])
+import main_test
+window = main_test.MainWindow()
+window.show()
+app.processEvents()
+print("FIRST_WINDOW", flush=True)
+"""
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    # Pas d'outbox ni de réseau pendant la mesure
+    env.pop("N8N_WEBHOOK_URL", None)
+    return env
+
+
+def import_profile(top: int):
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main_test"],
+        capture_output=True, text=True, env=_env()
+    )
+    entries = []
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            entries.append((int(match.group(2)), len(match.group(3)), match.group(4)))
+    total = next((cumulative for cumulative, _, name in entries if name == "main_test"), 0)
+    # Modules importés directement par main_test (premier niveau d'indentation)
+    direct = sorted((e for e in entries if e[1] == 3), reverse=True)[:top]
+    return total, direct
+
+
+def time_to_first_window() -> float:
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-c", FIRST_WINDOW_SNIPPET],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, env=_env()
+    )
+    for line in process.stdout:  # type: ignore
+        if line.startswith("FIRST_WINDOW"):
+            elapsed = time.perf_counter() - start
+            break
+    else:
+        raise RuntimeError("the GUI process exited before showing a window")
+    process.kill()
+    process.wait()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--target-ms", type=float, default=800.0,
+                        help="objectif de temps jusqu'à la première fenêtre")
+    args = parser.parse_args()
+
+    total, direct = import_profile(args.top)
+    print(f"Imports de main_test : {total / 1000:.0f} ms cumulés")
+    for cumulative, _, name in direct:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    timings = [time_to_first_window() * 1000 for _ in range(args.runs)]
+    median = statistics.median(timings)
+    print(f"\nPremière fenêtre : médiane {median:.0f} ms, min {min(timings):.0f} ms "
+          f"sur {args.runs} lancements (objectif {args.target_ms:.0f} ms)")
+    if median > args.target_ms:
+        print("❌ Objectif de démarrage dépassé")
+        sys.exit(1)
+    print("✅ Objectif de démarrage respecté")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Benchmark de validation des projets : builder section par section vs TypeAdapter en lot.
+
+Usage:
+    python -m benchmarks.validation_bench [--projects 5000] [--size 10] [--invalid 0.01]
+"""
+import argparse
+import time
+
+from benchmarks.sample_project import make_project
+from models.projectBuilder import ConcreteProjectBuilder
+from models.projectBuilderDirector import ProjectBuilderDirector
+from models.projectSchema import gc_paused, validate_projects
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--projects", type=int, default=5000)
+    parser.add_argument("--size", type=int, default=10, help="éléments par liste")
+    parser.add_argument("--invalid", type=float, default=0.01, help="part de projets mal formés")
+    args = parser.parse_args()
+
+    raw = [make_project(args.size, seed=i).to_dict() for i in range(args.projects)]
+    if args.invalid > 0:
+        for i in range(0, len(raw), max(1, round(1 / args.invalid))):
+            raw[i] = {**raw[i], "objectives": {"objectif": raw[i]["objectives"]}}
+    print(f"{args.projects} projets, {args.size} éléments par liste, {args.invalid:.0%} invalides\n")
+
+    start = time.perf_counter()
+    accepted = 0
+    for data in raw:
+        try:
+            ProjectBuilderDirector(ConcreteProjectBuilder()).construct_from_dict(data)
+            accepted += 1
+        except ValueError:
+            pass
+    builder_time = time.perf_counter() - start
+    print(f"{'builder':<10} {builder_time * 1000:8.1f} ms   {accepted} acceptés")
+
+    start = time.perf_counter()
+    with gc_paused():  # comme batch.load_projects
+        projects, rejected = validate_projects(raw)
+    batch_time = time.perf_counter() - start
+    print(f"{'lot':<10} {batch_time * 1000:8.1f} ms   {len(projects)} acceptés, {len(rejected)} refusés")
+    assert len(projects) == accepted
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Benchmark de livraison webhook contre le serveur local (sans n8n).
+
+Usage:
+    python -m benchmarks.webhook_bench [--submissions 2000] [--latency 0.02] [--limit 50]
+"""
+import argparse
+import asyncio
+
+from benchmarks.sample_project import make_project
+from utils.fake_webhook_server import FakeWebhookServer
+from utils.webhook_client import WebhookClient, build_payload
+
+
+async def run(args) -> None:
+    server = FakeWebhookServer(api_key="bench", latency=args.latency, failure_rate=args.failure_rate)
+    url = await server.start()
+    cdc = "# Cahier des Charges\n\n" + "## Section\nTexte du CDC.\n" * 400
+    payloads = [build_payload(make_project(10, seed=i), cdc) for i in range(args.submissions)]
+
+    try:
+        async with WebhookClient(url, api_key="bench", per_endpoint_limit=args.limit,
+                                 compress=not args.no_gzip) as client:
+            _, metrics = await client.send_many(payloads)
+    finally:
+        await server.stop()
+
+    print(f"{args.submissions} soumissions, limite {args.limit} par endpoint, latence serveur {args.latency * 1000:.0f} ms")
+    for key, value in metrics.summary().items():
+        print(f"  {key:<18} {value:,.2f}" if isinstance(value, float) else f"  {key:<18} {value}")
+    print(f"  reçues par le serveur: {server.accepted_count}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--submissions", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--limit", type=int, default=50, help="requêtes simultanées par endpoint")
+    parser.add_argument("--no-gzip", action="store_true")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
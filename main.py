@@ -1,10 +1,12 @@
-# import requests
 from dotenv import load_dotenv
+import argparse
 import os
 import datetime
 
 from models.projectBuilder import ConcreteProjectBuilder
 from models.projectBuilderDirector import ProjectBuilderDirector
+from utils.webhook_client import post_to_n8n
+from utils.profiling import DEFAULT_PROFILE_DIR, Profiler, profile_stage
 
 load_dotenv()
 
@@ -12,16 +14,14 @@ webhook_url = os.getenv("N8N_WEBHOOK_URL")
 api_key_cdc = os.getenv("API_KEY_CDC")
 
 
-# url = "http://localhost:5678/webhook-test/test-logiciel-cdc"
-# headers = {
-#     "Content-Type": "application/json",
-#     "API-KEY-CDC": webhook_url,
-# }
-# json = {
-#     "id": "1234",
-# }
-
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Saisie d'un projet de cahier des charges en ligne de commande")
+    parser.add_argument("--profile", nargs="?", const=DEFAULT_PROFILE_DIR, metavar="DIR",
+                        help="profile le rendu et l'envoi du projet (résultats dans DIR)")
+    args = parser.parse_args()
+    # Seules les étapes sont profilées, pas le temps passé à saisir les réponses
+    profiler = Profiler() if args.profile else None
+    
     director = ProjectBuilderDirector(ConcreteProjectBuilder())
     print("Bienvenue dans le générateur de cahier des charges !")
     print("Cette première partie est faites spécialement pour le moment où vous êtes en réunion avec votre client.")
@@ -53,7 +53,8 @@ if __name__ == "__main__":
         "created_at": datetime.datetime.now().isoformat()
     })
     print(project, "meta constructed successfully.")
-    project.describe()
+    with profile_stage(profiler, "describe"):
+        project.describe()
     print("\n-------------------------------\n")
     
     # Collect context information about the project (2nd step)
@@ -74,7 +75,8 @@ if __name__ == "__main__":
         "stakes": stakes
     })
     print(project, "context added successfully.")
-    project.describe()
+    with profile_stage(profiler, "describe"):
+        project.describe()
     print("\n-------------------------------\n")
     
     # Collect objectives information about the project (3rd step)
@@ -88,7 +90,8 @@ if __name__ == "__main__":
         objective = input()
     project = director.construct_objectives(objectives)
     print(project, "objectives added successfully.")
-    project.describe()
+    with profile_stage(profiler, "describe"):
+        project.describe()
     print("\n-------------------------------\n")
     
     # Collect targets information about the project (4th step)
@@ -114,7 +117,8 @@ if __name__ == "__main__":
         "journey": journey_target
     })
     print(project, "targets added successfully.")
-    project.describe()
+    with profile_stage(profiler, "describe"):
+        project.describe()
     print("\n-------------------------------\n")
     
     # Collect scope information about the project (5th step)
@@ -140,7 +144,8 @@ if __name__ == "__main__":
         "changeRule": change_rule
     })
     print(project, "scope added successfully.")
-    project.describe()
+    with profile_stage(profiler, "describe"):
+        project.describe()
     print("\n-------------------------------\n")
     
     # Collect deliverables information about the project (6th step)
@@ -154,10 +159,22 @@ if __name__ == "__main__":
         deliverable = input()
     project = director.construct_deliverables(deliverables)
     print(project, "deliverables added successfully.")
-    project.describe()
+    with profile_stage(profiler, "describe"):
+        project.describe()
     print("\n-------------------------------\n")
     
-    
-    # x = requests.post(url, headers=headers, json=json)
-    # print(x.status_code)
-    print("Hello, World!")
\ No newline at end of file
+    # Envoi du projet au webhook n8n
+    if webhook_url:
+        with profile_stage(profiler, "webhook"):
+            delivery = post_to_n8n(project, url=webhook_url, api_key=api_key_cdc)
+        if delivery.ok:
+            print(f"Projet envoyé au webhook (statut {delivery.status}).")
+        else:
+            print(f"Échec de l'envoi au webhook : {delivery.error}")
+    else:
+        print("N8N_WEBHOOK_URL non configurée : le projet n'a pas été envoyé.")
+
+    if profiler is not None:
+        profiler.stop()
+        print(profiler.summary(top=10))
+        print(f"Profil écrit dans {profiler.write(args.profile)['collapsed']}")
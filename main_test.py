@@ -2,44 +2,72 @@ from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget,
     QVBoxLayout, QHBoxLayout, QPushButton, QStackedWidget, QMessageBox
 )
-from pages.meta_page import MetaPage
-from pages.context_page import ContextPage
-from pages.objectives_page import ObjectivesPage
-from pages.targets_page import TargetsPage
-from pages.scope_page import ScopePage
-from pages.governance_page import GovernancePage
-from pages.notes_page import NotesPage
+from PySide6.QtCore import QTimer
+from pages.registry import WIZARD_PAGES
+from pages.restore import restore_page
 from models.projectBuilderDirector import ProjectBuilderDirector
 from models.projectBuilder import ConcreteProjectBuilder
-from utils.budget_estimator import estimate_project_budget
-from utils.cdc_generator import generate_cdc_from_project
+import argparse
+import importlib
+from contextlib import ExitStack
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 # Charger les variables d'environnement depuis le fichier .env
 load_dotenv()
 
+# Modules lourds (LangChain, OpenAI, pydantic, aiohttp) : inutiles pour afficher
+# la fenêtre, ils ne sont importés qu'en arrière-plan une fois celle-ci visible,
+# ou au plus tard au Submit.
+DEFERRED_MODULES = (
+    "utils.budget_estimator",
+    "utils.cdc_generator",
+    "utils.webhook_client",
+    "utils.webhook_outbox",
+    "utils.revision_store",
+)
+
+# Section à partir de laquelle le budget est estimé en arrière-plan pendant la
+# saisie (les pages suivantes ne changent presque jamais l'estimation)
+SPECULATION_START = "governance"
+
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, llm=None, profiler=None, profile_dir="cdc_profile", memory_tracker=None):
         super().__init__()
         self.setWindowTitle("CDC Builder")
         self.resize(900, 600)
         
         self.director = ProjectBuilderDirector(ConcreteProjectBuilder())
+        
+        # Outbox webhook (la soumission n'attend jamais n8n), créée par _warm_up
+        self.outbox = None
+        self.flusher = None
+        self._warm_up_thread = None
+        
+        # Calculs anticipés (voir speculate), créés à la première utilisation
+        self.speculator = None
+        self._budget_estimator = None
+        self._cdc_generator = None
+        self._revision_store = None
+        
+        # Modèle de chat imposé (FakeChatModel avec --fake-llm / --profile) et profileur du Submit
+        self.llm = llm
+        self.profiler = profiler
+        self.profile_dir = profile_dir
+        # Suivi mémoire des Submit sur les longues sessions (--track-memory ou CDC_MEMORY_TRACKING)
+        self.memory_tracker = memory_tracker
 
-        # Pages
+        # Pages : construites à la première navigation (voir pages/registry.py)
+        self.page_specs = WIZARD_PAGES
+        self.speculation_start = next(
+            i for i, spec in enumerate(self.page_specs) if spec.section == SPECULATION_START
+        )
+        self.pages = {}
+        self._index = 0
         self.stack = QStackedWidget()
-        self.pages = [
-            MetaPage(),
-            ContextPage(),
-            ObjectivesPage(),
-            TargetsPage(),
-            ScopePage(),
-            GovernancePage(),
-            NotesPage(),
-        ]
-        for page in self.pages:
-            self.stack.addWidget(page)
+        self.show_page(0)
 
         # Nav buttons
         self.btn_next = QPushButton("Next")
@@ -60,54 +88,163 @@ class MainWindow(QMainWindow):
         container.setLayout(root)
         self.setCentralWidget(container)
     
+    def start_background_services(self):
+        """Précharge les modules LLM et démarre l'outbox sans bloquer l'interface."""
+        if self._warm_up_thread is None:
+            self._warm_up_thread = threading.Thread(target=self._warm_up, name="warm-up", daemon=True)
+            self._warm_up_thread.start()
+    
+    def _warm_up(self):
+        for module in DEFERRED_MODULES:
+            importlib.import_module(module)
+        
+        # Métriques Prometheus (GET /metrics) si CDC_METRICS_PORT est défini
+        if os.getenv("CDC_METRICS_PORT"):
+            from utils.metrics import REGISTRY
+            REGISTRY.serve(int(os.getenv("CDC_METRICS_PORT")))  # type: ignore
+        
+        if os.getenv("N8N_WEBHOOK_URL"):
+            from utils.webhook_outbox import WebhookOutbox, OutboxFlusher
+            self.outbox = WebhookOutbox(os.getenv("CDC_OUTBOX_PATH", "outbox.sqlite3"))
+            self.flusher = OutboxFlusher(
+                self.outbox, str(os.getenv("N8N_WEBHOOK_URL")), api_key=os.getenv("API_KEY_CDC")
+            ).start()
+    
+    def wait_background_services(self):
+        """Attend la fin du préchargement (en le lançant s'il ne l'a pas encore été)."""
+        self.start_background_services()
+        self._warm_up_thread.join() # type: ignore
+    
+    def budget_estimator(self):
+        """Estimateur partagé par les calculs anticipés et le Submit."""
+        if self._budget_estimator is None:
+            from utils.budget_estimator import BudgetEstimator
+            from utils.rate_limiter import RateLimiter
+            self._budget_estimator = BudgetEstimator(
+                api_key=str(os.getenv("OPENAI_API_KEY")), llm=self.llm, rate_limiter=RateLimiter.from_env() # type: ignore
+            )
+        return self._budget_estimator
+    
+    def cdc_generator(self):
+        """Générateur partagé par les Submit successifs (clients LLM créés une seule fois)."""
+        if self._cdc_generator is None:
+            from utils.cdc_generator import CDCGenerator
+            from utils.rate_limiter import RateLimiter
+            self._cdc_generator = CDCGenerator(
+                api_key=str(os.getenv("OPENAI_API_KEY")), llm=self.llm, rate_limiter=RateLimiter.from_env() # type: ignore
+            )
+        return self._cdc_generator
+    
+    def revision_store(self):
+        """Historique des révisions (deltas JSON Patch), une révision par Submit."""
+        if self._revision_store is None:
+            from utils.revision_store import RevisionStore
+            self._revision_store = RevisionStore(os.getenv("CDC_REVISIONS_PATH", "revisions.sqlite3"))
+        return self._revision_store
+    
+    def speculate(self):
+        """
+        Lance en arrière-plan, sur une copie du projet, l'estimation budgétaire
+        et la condensation des notes longues. Le Submit reprend ces résultats
+        si le projet n'a pas changé entre-temps (voir utils/speculation.py).
+        """
+        if not self.llm_available():
+            return
+        from utils.fingerprint import output_fingerprint
+        from utils.speculation import Speculator
+        if self.speculator is None:
+            self.speculator = Speculator()
+        project = self.director._builder.get_project()
+        # Empreintes limitées aux champs lus : remplir les notes ne relance pas l'estimation
+        self.speculator.start("budget", project, lambda p: self.budget_estimator().estimate(p),
+                              fingerprint=lambda p: output_fingerprint(p, "budget"))
+        if project.notes:
+            # Le condensé est mis en cache sur disque : la génération le relira
+            self.speculator.start("notes", project, self._condense_notes,
+                                  fingerprint=lambda p: output_fingerprint(p, "notes"))
+    
+    def _condense_notes(self, project):
+        return self.cdc_generator()._condenser().condense_project(project)[1]
+    
+    def llm_available(self) -> bool:
+        return self.llm is not None or bool(os.getenv("OPENAI_API_KEY"))
+    
+    def stage(self, name: str):
+        """Étape du Submit : durée dans les métriques, profilée si --profile est actif, mémoire suivie si demandé."""
+        from utils.memory_tracking import track_stage
+        from utils.metrics import SUBMIT_LATENCY
+        from utils.profiling import profile_stage
+        stack = ExitStack()
+        stack.enter_context(SUBMIT_LATENCY.time(stage=name))
+        stack.enter_context(profile_stage(self.profiler, name))
+        stack.enter_context(track_stage(self.memory_tracker, name))
+        return stack
+    
+    def page_at(self, index: int):
+        """Retourne la page d'index donné, en la construisant au premier accès."""
+        page = self.pages.get(index)
+        if page is None:
+            page = self.page_specs[index].create()
+            self.pages[index] = page
+            self.stack.addWidget(page)
+        return page
+    
+    def show_page(self, index: int):
+        """Affiche une page après l'avoir resynchronisée avec le projet du builder."""
+        page = self.page_at(index)
+        # Diff : seuls les champs qui diffèrent du projet sont réécrits
+        restore_page(page, getattr(self.director._builder.get_project(), self.page_specs[index].section))
+        self.stack.setCurrentWidget(page)
+        self._index = index
+    
+    def save_current_page(self):
+        """Enregistre la page courante dans le builder (construct_<section>)."""
+        data = self.current_page().get_data()  # type: ignore
+        getattr(self.director, f"construct_{self.page_specs[self._index].section}")(data)
+    
     def current_index(self) -> int:
-        return self.stack.currentIndex()
+        return self._index
 
     def current_page(self):
-        return self.stack.currentWidget()
+        return self.page_at(self._index)
 
     def refresh_buttons(self):
         i = self.current_index()
         self.btn_back.setEnabled(i > 0)
-        is_last = (i == self.stack.count() - 1)
+        is_last = (i == len(self.page_specs) - 1)
         self.btn_next.setText("Submit" if is_last else "Next")
 
     def on_next(self):
         i = self.current_index()
-        page = self.current_page()
-        data = page.get_data()  # type: ignore
 
         # 1) Apply data -> builder (construct)
-        if i == 0:
-            # Meta page
-            self.director.construct_meta(data)
-        elif i == 1:
-            # Context page
-            self.director.construct_context(data)
-        elif i == 2:
-            # Objectives page
-            self.director.construct_objectives(data)
-        elif i == 3:
-            # Targets page
-            self.director.construct_targets(data)
-        elif i == 4:
-            # Scope page
-            self.director.construct_scope(data)
-        elif i == 5:
-            # Governance page
-            self.director.construct_governance(data)
-        elif i == 6:
-            # Notes page
-            self.director.construct_notes(data)
-        # ...
-        else:
-            pass
-
-        # 2) Navigation
-        is_last = (i == self.stack.count() - 1)
+        self.save_current_page()
+
+        # 2) Calculs anticipés, une fois les pages dont dépend le budget validées
+        is_last = (i == len(self.page_specs) - 1)
+        if not is_last and i >= self.speculation_start:
+            self.speculate()
+
+        # 3) Navigation
         if is_last:
             # Ici : build project + estimation budgétaire + POST n8n
             project = self.director._builder.get_project()  # à adapter selon ton implémentation
+            submit_start = time.perf_counter()
+            
+            self.wait_background_services()
+            from utils.budget_estimator import budget_to_dict
+            from utils.cdc_generator import generate_cdc_from_project
+            from utils.webhook_client import build_payload
+            from utils.metrics import SUBMIT_LATENCY
+            from utils.revision_store import project_key
+            
+            cdc_result = None
+            
+            # Révision de la saisie soumise : meta["version"] passe à "N.0" avant la génération du CDC
+            with self.stage("revision"):
+                version = self.revision_store().commit(project_key(project), project, author=project.meta.get("author"),
+                                                       message="Submit")
+            print(f"🗂️  Révision {version}.0 enregistrée")
             
             # Estimation budgétaire automatique avec LangChain + OpenAI
             print("\n" + "="*80)
@@ -115,9 +252,17 @@ class MainWindow(QMainWindow):
             print("="*80 + "\n")
             
             try:
-                if os.getenv("OPENAI_API_KEY"):
-                    # Étape 1: Estimation budgétaire
-                    result = estimate_project_budget(project, api_key=str(os.getenv("OPENAI_API_KEY")))
+                if self.llm_available():
+                    # Étape 1: Estimation budgétaire, reprise du calcul anticipé si le projet n'a pas changé
+                    estimator = self.budget_estimator()
+                    with self.stage("budget"):
+                        budget_estimate = self.speculator.take("budget", project) if self.speculator else None
+                        if budget_estimate is not None:
+                            print("⚡ Estimation reprise du calcul anticipé pendant la saisie")
+                        else:
+                            budget_estimate = estimator.estimate(project)
+                    estimator.apply_budget_to_project(project, budget_estimate)
+                    result = budget_to_dict(budget_estimate)
                     
                     print(f"✅ Budget estimé: {result['total_cost']:,.2f} €")
                     print(f"⏱️  Temps estimé: {result['total_hours']:.1f} heures")
@@ -128,18 +273,29 @@ class MainWindow(QMainWindow):
                     print("📝 GÉNÉRATION DU CAHIER DES CHARGES...")
                     print("="*80 + "\n")
                     
+                    # Condensation des notes anticipée : attendre qu'elle soit en cache
+                    if self.speculator is not None:
+                        self.speculator.take("notes", project)
+                    
                     try:
-                        cdc_result = generate_cdc_from_project(
-                            project, 
-                            api_key=str(os.getenv("OPENAI_API_KEY")),
-                            save_to_file=True
-                        )
+                        with self.stage("generation"):
+                            # Générateur partagé : quota OpenAI commun aux autres fenêtres et aux lots
+                            # (si OPENAI_RATE_LIMITS est défini), clients créés une seule fois
+                            cdc_result = generate_cdc_from_project(
+                                project, 
+                                save_to_file=True,
+                                generator=self.cdc_generator()
+                            )
                         
                         print(f"✅ CDC généré et sauvegardé: {cdc_result['file_path']}")
+                        diagrams = cdc_result['diagrams']
+                        print(f"🧩 Diagrammes Mermaid: {diagrams['diagrams']} "
+                              f"(réparés: {diagrams['repaired']}, encore invalides: {diagrams['still_invalid']})")
                         print("\n" + "="*80 + "\n")
                         
                         # Afficher le projet complet avec le budget
-                        project.describe()
+                        with self.stage("describe"):
+                            project.describe()
                         
                         # Message de confirmation
                         QMessageBox.information(
@@ -188,25 +344,63 @@ class MainWindow(QMainWindow):
                     "Le projet a été soumis sans estimation."
                 )
             
-            # TODO: post_to_n8n(project)
+            # Envoi du projet (et du CDC s'il a été généré) au webhook n8n :
+            # écrit dans l'outbox locale, livré en arrière-plan par le flusher
+            if self.outbox is not None:
+                with self.stage("webhook"):
+                    payload = build_payload(project, cdc_content=cdc_result['cdc_content'] if cdc_result else None)
+                    self.outbox.enqueue(payload, project_key=project_key(project))
+                print("📨 Projet placé dans l'outbox, envoi au webhook n8n en arrière-plan")
+            SUBMIT_LATENCY.observe(time.perf_counter() - submit_start, stage="total")
+            
+            # Profil cumulé de tous les Submit de la session
+            if self.profiler is not None:
+                print(self.profiler.summary(top=10))
+                print(f"🔬 Profil écrit dans {self.profiler.write(self.profile_dir)['collapsed']}")
+            if self.memory_tracker is not None:
+                print(self.memory_tracker.report(top=5))
             return
 
-        self.stack.setCurrentIndex(i + 1)
-
-        # 3) Optionnel : load data when entering next page (utile pour Back/restore)
-        # next_page = self.current_page()
-        # next_page.set_data(...)
-
+        self.show_page(i + 1)
         self.refresh_buttons()
     
+    def closeEvent(self, event):
+        if self.flusher is not None:
+            self.flusher.stop()
+        if self.speculator is not None:
+            self.speculator.shutdown()
+        super().closeEvent(event)
+    
     def on_back(self):
-        current_index = self.stack.currentIndex()
+        current_index = self.current_index()
         if current_index > 0:
-            self.stack.setCurrentIndex(current_index - 1)
+            # Sans cela, la restauration au retour écraserait la saisie en cours
+            self.save_current_page()
+            self.show_page(current_index - 1)
         self.refresh_buttons()
 
 if __name__ == "__main__":
-    app = QApplication([])
-    window = MainWindow()
+    parser = argparse.ArgumentParser(description="Interface graphique de saisie des CDC")
+    parser.add_argument("--fake-llm", action="store_true", help="modèle local factice, sans clé API")
+    parser.add_argument("--profile", nargs="?", const="cdc_profile", metavar="DIR",
+                        help="profile chaque étape du Submit avec le modèle factice (résultats dans DIR)")
+    parser.add_argument("--track-memory", nargs="?", type=int, const=100, metavar="N",
+                        help="suit la mémoire retenue par étape du Submit (instantané tous les N Submit)")
+    args, qt_args = parser.parse_known_args()
+    
+    llm, profiler = None, None
+    if args.fake_llm or args.profile:
+        from utils.fake_llm import FakeChatModel
+        llm = FakeChatModel()
+    if args.profile:
+        from utils.profiling import Profiler
+        profiler = Profiler()
+    from utils.memory_tracking import MemoryTracker
+    memory_tracker = MemoryTracker(every=args.track_memory) if args.track_memory else MemoryTracker.from_env()
+    
+    app = QApplication([__file__, *qt_args])
+    window = MainWindow(llm=llm, profiler=profiler, profile_dir=args.profile,
+                        memory_tracker=memory_tracker)
     window.show()
+    QTimer.singleShot(0, window.start_background_services)
     app.exec()
@@ -1,4 +1,28 @@
 from dataclasses import dataclass
+import orjson
+import ormsgpack
+
+from models.projectRenderer import RenderSink, render_project
+
+
+# Version du schéma de sérialisation, incrémentée à chaque changement de structure
+SCHEMA_VERSION = 1
+
+# Sections du projet, dans l'ordre de to_dict()
+SECTIONS = (
+    "meta", "context", "objectives", "targets", "scope", "deliverables",
+    "constraints", "timeline", "governance", "budget", "acceptance", "risks", "notes",
+    "attachments"
+)
+
+
+def _deep_copy(value):
+    """Copie les dictionnaires et listes imbriqués (les autres valeurs sont immuables ou laissées telles quelles)."""
+    if isinstance(value, dict):
+        return {key: _deep_copy(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_deep_copy(item) for item in value]
+    return value
 
 
 @dataclass
@@ -59,129 +83,24 @@ class Project:
         
         self.notes = ""
 
-    def describe(self):
-        """Affiche une description complète et formatée du projet"""
-        print("\n" + "="*80)
-        print("DESCRIPTION DU PROJET")
-        print("="*80)
-        
-        # META INFORMATIONS
-        print("\n📋 INFORMATIONS GÉNÉRALES")
-        print("-" * 40)
-        for key, value in self.meta.items():
-            print(f"  {key.replace('_', ' ').title()}: {value}")
-        
-        # CONTEXTE
-        print("\n🎯 CONTEXTE")
-        print("-" * 40)
-        print(f"  Déclencheur: {self.context.get('trigger')}")
-        print(f"  État actuel: {self.context.get('current_state')}")
-        if self.context.get('stakes'):
-            print("  Enjeux:")
-            for stake in self.context['stakes']:
-                print(f"    • {stake}")
-        
-        # OBJECTIFS
-        if self.objectives:
-            print("\n🎯 OBJECTIFS")
-            print("-" * 40)
-            for objective in self.objectives:
-                print(f"  • {objective}")
-        
-        # CIBLES
-        print("\n👥 CIBLES")
-        print("-" * 40)
-        if self.targets.get('primary'):
-            print("  Primaires:")
-            for target in self.targets['primary']:
-                print(f"    • {target}")
-        if self.targets.get('secondary'):
-            print("  Secondaires:")
-            for target in self.targets['secondary']:
-                print(f"    • {target}")
-        if self.targets.get('journey'):
-            print(f"  Parcours utilisateur: {self.targets['journey']}")
-        
-        # PÉRIMÈTRE
-        print("\n🔲 PÉRIMÈTRE")
-        print("-" * 40)
-        if self.scope.get('in'):
-            print("  Inclus:")
-            for item in self.scope['in']:
-                print(f"    ✓ {item}")
-        if self.scope.get('out'):
-            print("  Exclus:")
-            for item in self.scope['out']:
-                print(f"    ✗ {item}")
-        if self.scope.get('changeRule'):
-            print(f"  Règle de changement: {self.scope['changeRule']}")
-        
-        # LIVRABLES
-        if self.deliverables:
-            print("\n📦 LIVRABLES")
-            print("-" * 40)
-            for i, deliverable in enumerate(self.deliverables, 1):
-                print(f"  {i}. {deliverable}")
-        
-        # CONTRAINTES
-        if self.constraints:
-            print("\n⚠️  CONTRAINTES")
-            print("-" * 40)
-            for key, value in self.constraints.items():
-                print(f"  {key.replace('_', ' ').title()}: {value}")
-        
-        # TIMELINE
-        if self.timeline:
-            print("\n📅 PLANNING")
-            print("-" * 40)
-            for event in self.timeline:
-                print(f"  • {event}")
-        
-        # GOUVERNANCE
-        print("\n👔 GOUVERNANCE")
-        print("-" * 40)
-        print(f"  Décideur: {self.governance.get('decision_maker')}")
-        if self.governance.get('validators'):
-            print("  Validateurs:")
-            for validator in self.governance['validators']:
-                print(f"    • {validator}")
-        if self.governance.get('contacts'):
-            print("  Contacts:")
-            for contact in self.governance['contacts']:
-                print(f"    • {contact}")
-        
-        # BUDGET
-        print("\n💰 BUDGET")
-        print("-" * 40)
-        print(f"  Total: {self.budget.get('total')}")
-        if self.budget.get('items'):
-            print("  Détails:")
-            for item in self.budget['items']:
-                print(f"    • {item}")
-        if self.budget.get('tradeoffs'):
-            print(f"  Arbitrages: {self.budget['tradeoffs']}")
-        
-        # CRITÈRES D'ACCEPTATION
-        if self.acceptance.get('criteria'):
-            print("\n✅ CRITÈRES D'ACCEPTATION")
-            print("-" * 40)
-            for i, criterion in enumerate(self.acceptance['criteria'], 1):
-                print(f"  {i}. {criterion}")
-        
-        # RISQUES
-        if self.risks:
-            print("\n⚠️  RISQUES")
-            print("-" * 40)
-            for i, risk in enumerate(self.risks, 1):
-                print(f"  {i}. {risk}")
-        
-        # NOTES SUPPLÉMENTAIRES
-        if self.notes:
-            print("\n📝 NOTES SUPPLÉMENTAIRES")
-            print("-" * 40)
-            print(f"  {self.notes}")
-        
-        print("\n" + "="*80 + "\n")
+        # Documents client indexés (métadonnées de utils.attachments.ingest_file)
+        self.attachments = []
+
+    def describe(self, sink: RenderSink = None, sections: list = None): # type: ignore
+        """Affiche une description complète et formatée du projet
+
+        Les lignes sont produites par models.projectRenderer puis écrites en une
+        seule fois dans la destination choisie.
+
+        Args:
+            sink: Destination du rendu (terminal par défaut, voir StringSink,
+                  FileSink, QtTextSink)
+            sections: Noms des sections à afficher (toutes si None)
+
+        Returns:
+            RenderSink: La destination utilisée
+        """
+        return render_project(self, sink, sections)
     
     def to_dict(self):
         """Convertit l'objet Project en dictionnaire pour la sérialisation JSON"""
@@ -198,5 +117,85 @@ class Project:
             "budget": self.budget,
             "acceptance": self.acceptance,
             "risks": self.risks,
-            "notes": self.notes
+            "notes": self.notes,
+            "attachments": self.attachments
         }
+
+    @classmethod
+    def from_dict(cls, data: dict, copy: bool = True) -> "Project":
+        """Reconstruit un objet Project depuis un dictionnaire produit par to_dict()
+
+        Accepte aussi l'enveloppe versionnée produite par to_bytes()
+        ({"schema_version": ..., "project": {...}}). Les sections absentes
+        gardent leur valeur par défaut.
+
+        Args:
+            data: Dictionnaire du projet (ou enveloppe versionnée)
+            copy: Si True, copie en profondeur les listes et dictionnaires
+                  de chaque section : rien n'est partagé avec l'appelant
+
+        Returns:
+            Project: Le projet reconstruit
+        """
+        if "schema_version" in data:
+            version = data["schema_version"]
+            if version > SCHEMA_VERSION:
+                raise ValueError(
+                    f"Unsupported project schema version {version} (max supported: {SCHEMA_VERSION})"
+                )
+            data = data["project"]
+
+        project = cls()
+        for section in SECTIONS:
+            if section not in data:
+                continue
+            value = data[section]
+            setattr(project, section, _deep_copy(value) if copy else value)
+        return project
+
+    def to_bytes(self, fmt: str = "msgpack") -> bytes:
+        """Sérialise le projet en binaire avec le numéro de version du schéma
+
+        Args:
+            fmt: "msgpack" (ormsgpack, plus compact) ou "json" (orjson, lisible)
+
+        Returns:
+            bytes: Enveloppe {"schema_version": ..., "project": to_dict()} encodée
+        """
+        envelope = {"schema_version": SCHEMA_VERSION, "project": self.to_dict()}
+        if fmt == "msgpack":
+            return ormsgpack.packb(envelope)
+        if fmt == "json":
+            return orjson.dumps(envelope)
+        raise ValueError(f"Unknown serialization format: {fmt}")
+
+    @staticmethod
+    def decode_bytes(payload: bytes):
+        """Décode une enveloppe produite par to_bytes(), sans reconstruire le projet
+
+        Le format est détecté automatiquement : un document JSON commence
+        toujours par "{", alors qu'une map msgpack commence par un octet de
+        type (0x80-0x8f, 0xde ou 0xdf).
+
+        Args:
+            payload: Données produites par to_bytes()
+
+        Returns:
+            L'objet décodé (enveloppe {"schema_version": ..., "project": {...}})
+        """
+        if payload[:1] == b"{":
+            return orjson.loads(payload)
+        return ormsgpack.unpackb(payload)
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> "Project":
+        """Désérialise un projet produit par to_bytes() (voir decode_bytes)
+
+        Args:
+            payload: Données produites par to_bytes()
+
+        Returns:
+            Project: Le projet reconstruit
+        """
+        # Les objets décodés sont neufs : inutile de les recopier
+        return cls.from_dict(cls.decode_bytes(payload), copy=False)
@@ -20,6 +20,8 @@ class ProjectBuilder(ABC):
             set_budget: Define the budget allocation and financial parameters.
             set_acceptance: Set acceptance criteria and quality standards.
             set_risks: Identify and define project risks.
+            set_notes: Add free-form notes and remarks.
+            set_attachments: Attach indexed client documents.
             build: Construct and return the final Project object.
     """
     @abstractmethod
@@ -159,6 +161,17 @@ class ProjectBuilder(ABC):
         """
         pass
     
+    @abstractmethod
+    def set_attachments(self, attachments: list):
+        """method to set the client documents attached to the project
+
+        Args:
+            attachments (list): Metadata of the indexed documents, as returned
+                                by utils.attachments.ingest_file (name, path,
+                                sha256, size, chunks, tokens).
+        """
+        pass
+    
     @abstractmethod
     def build(self) -> Project:
         """method to build and return the final Project object.
@@ -168,48 +181,71 @@ class ProjectBuilder(ABC):
         """
         pass
 
+_validate_section = None
+
+
+def validate_section(section: str, value):
+    """Valide une section (voir models.projectSchema.validate_section).
+
+    Import différé : pydantic n'est chargé qu'à la première validation, après l'affichage de la fenêtre.
+    """
+    global _validate_section
+    if _validate_section is None:
+        from models.projectSchema import validate_section as validate
+        _validate_section = validate
+    return _validate_section(section, value)
+
+
 class ConcreteProjectBuilder(ProjectBuilder):
+    """Builder concret : chaque section est validée (models.projectSchema) avant d'être stockée.
+
+    Raises:
+        pydantic.ValidationError: Depuis les setters, si une section ne respecte pas son schéma
+    """
     def __init__ (self):
         self.project = Project()
     
     def set_meta(self, meta: dict):
-        self.project.meta = meta
+        self.project.meta = validate_section("meta", meta)
     
     def set_context(self, context: dict):
-        self.project.context = context
+        self.project.context = validate_section("context", context)
     
     def set_objectives(self, objectives: list):
-        self.project.objectives = objectives
+        self.project.objectives = validate_section("objectives", objectives)
     
     def set_targets(self, targets: dict):
-        self.project.targets = targets
+        self.project.targets = validate_section("targets", targets)
     
     def set_scope(self, scope: dict):
-        self.project.scope = scope
+        self.project.scope = validate_section("scope", scope)
     
     def set_deliverables(self, deliverables: list):
-        self.project.deliverables = deliverables
+        self.project.deliverables = validate_section("deliverables", deliverables)
     
     def set_constraints(self, constraints: dict):
-        self.project.constraints = constraints
+        self.project.constraints = validate_section("constraints", constraints)
     
     def set_timeline(self, timeline: list):
-        self.project.timeline = timeline
+        self.project.timeline = validate_section("timeline", timeline)
     
     def set_governance(self, governance: dict):
-        self.project.governance = governance
+        self.project.governance = validate_section("governance", governance)
     
     def set_budget(self, budget: dict):
-        self.project.budget = budget
+        self.project.budget = validate_section("budget", budget)
     
     def set_acceptance(self, acceptance: dict):
-        self.project.acceptance = acceptance
+        self.project.acceptance = validate_section("acceptance", acceptance)
     
     def set_risks(self, risks: list):
-        self.project.risks = risks
+        self.project.risks = validate_section("risks", risks)
     
     def set_notes(self, notes: str):
-        self.project.notes = notes
+        self.project.notes = validate_section("notes", notes)
+    
+    def set_attachments(self, attachments: list):
+        self.project.attachments = validate_section("attachments", attachments)
     
     def get_project(self) -> Project:
         """Retourne l'instance actuelle du projet en cours de construction.
@@ -1,5 +1,5 @@
 from models.projectBuilder import ConcreteProjectBuilder
-from models.Project import Project
+from models.Project import Project, SECTIONS
 
 class ProjectBuilderDirector:
     def __init__(self, builder: ConcreteProjectBuilder):
@@ -33,8 +33,6 @@ class ProjectBuilderDirector:
         self._builder.set_constraints(constraints)
         return self._builder.build()
     
-    # serializer l'objet pour renvoyer un objet une fois déserialisé
-    
     def construct_timeline(self, timeline: list):
         self._builder.set_timeline(timeline)
         return self._builder.build()
@@ -59,4 +57,19 @@ class ProjectBuilderDirector:
         self._builder.set_notes(notes)
         return self._builder.build()
     
-    
\ No newline at end of file
+    def construct_attachments(self, attachments: list):
+        self._builder.set_attachments(attachments)
+        return self._builder.build()
+    
+    def construct_from_dict(self, data: dict):
+        """Recharge un projet sérialisé (to_dict() ou to_bytes() décodé) dans le builder."""
+        return self._load_project(Project.from_dict(data))
+    
+    def construct_from_bytes(self, payload: bytes):
+        """Recharge un projet produit par Project.to_bytes() dans le builder."""
+        return self._load_project(Project.from_bytes(payload))
+    
+    def _load_project(self, project: Project):
+        for section in SECTIONS:
+            getattr(self._builder, f"set_{section}")(getattr(project, section))
+        return self._builder.build()
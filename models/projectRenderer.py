@@ -0,0 +1,287 @@
+import sys
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, Iterator, Optional, TextIO
+
+
+SEPARATOR = "=" * 80
+SUB_SEPARATOR = "-" * 40
+
+
+def _render_meta(project) -> Iterator[str]:
+    yield ""
+    yield "📋 INFORMATIONS GÉNÉRALES"
+    yield SUB_SEPARATOR
+    for key, value in project.meta.items():
+        yield f"  {key.replace('_', ' ').title()}: {value}"
+
+
+def _render_context(project) -> Iterator[str]:
+    yield ""
+    yield "🎯 CONTEXTE"
+    yield SUB_SEPARATOR
+    yield f"  Déclencheur: {project.context.get('trigger')}"
+    yield f"  État actuel: {project.context.get('current_state')}"
+    if project.context.get('stakes'):
+        yield "  Enjeux:"
+        for stake in project.context['stakes']:
+            yield f"    • {stake}"
+
+
+def _render_objectives(project) -> Iterator[str]:
+    if project.objectives:
+        yield ""
+        yield "🎯 OBJECTIFS"
+        yield SUB_SEPARATOR
+        for objective in project.objectives:
+            yield f"  • {objective}"
+
+
+def _render_targets(project) -> Iterator[str]:
+    yield ""
+    yield "👥 CIBLES"
+    yield SUB_SEPARATOR
+    if project.targets.get('primary'):
+        yield "  Primaires:"
+        for target in project.targets['primary']:
+            yield f"    • {target}"
+    if project.targets.get('secondary'):
+        yield "  Secondaires:"
+        for target in project.targets['secondary']:
+            yield f"    • {target}"
+    if project.targets.get('journey'):
+        yield f"  Parcours utilisateur: {project.targets['journey']}"
+
+
+def _render_scope(project) -> Iterator[str]:
+    yield ""
+    yield "🔲 PÉRIMÈTRE"
+    yield SUB_SEPARATOR
+    if project.scope.get('in'):
+        yield "  Inclus:"
+        for item in project.scope['in']:
+            yield f"    ✓ {item}"
+    if project.scope.get('out'):
+        yield "  Exclus:"
+        for item in project.scope['out']:
+            yield f"    ✗ {item}"
+    if project.scope.get('changeRule'):
+        yield f"  Règle de changement: {project.scope['changeRule']}"
+
+
+def _render_deliverables(project) -> Iterator[str]:
+    if project.deliverables:
+        yield ""
+        yield "📦 LIVRABLES"
+        yield SUB_SEPARATOR
+        for i, deliverable in enumerate(project.deliverables, 1):
+            yield f"  {i}. {deliverable}"
+
+
+def _render_constraints(project) -> Iterator[str]:
+    if project.constraints:
+        yield ""
+        yield "⚠️  CONTRAINTES"
+        yield SUB_SEPARATOR
+        for key, value in project.constraints.items():
+            yield f"  {key.replace('_', ' ').title()}: {value}"
+
+
+def _render_timeline(project) -> Iterator[str]:
+    if project.timeline:
+        yield ""
+        yield "📅 PLANNING"
+        yield SUB_SEPARATOR
+        for event in project.timeline:
+            yield f"  • {event}"
+
+
+def _render_governance(project) -> Iterator[str]:
+    yield ""
+    yield "👔 GOUVERNANCE"
+    yield SUB_SEPARATOR
+    yield f"  Décideur: {project.governance.get('decision_maker')}"
+    if project.governance.get('validators'):
+        yield "  Validateurs:"
+        for validator in project.governance['validators']:
+            yield f"    • {validator}"
+    if project.governance.get('contacts'):
+        yield "  Contacts:"
+        for contact in project.governance['contacts']:
+            yield f"    • {contact}"
+
+
+def _render_budget(project) -> Iterator[str]:
+    yield ""
+    yield "💰 BUDGET"
+    yield SUB_SEPARATOR
+    yield f"  Total: {project.budget.get('total')}"
+    if project.budget.get('items'):
+        yield "  Détails:"
+        for item in project.budget['items']:
+            yield f"    • {item}"
+    if project.budget.get('tradeoffs'):
+        yield f"  Arbitrages: {project.budget['tradeoffs']}"
+
+
+def _render_acceptance(project) -> Iterator[str]:
+    if project.acceptance.get('criteria'):
+        yield ""
+        yield "✅ CRITÈRES D'ACCEPTATION"
+        yield SUB_SEPARATOR
+        for i, criterion in enumerate(project.acceptance['criteria'], 1):
+            yield f"  {i}. {criterion}"
+
+
+def _render_risks(project) -> Iterator[str]:
+    if project.risks:
+        yield ""
+        yield "⚠️  RISQUES"
+        yield SUB_SEPARATOR
+        for i, risk in enumerate(project.risks, 1):
+            yield f"  {i}. {risk}"
+
+
+def _render_notes(project) -> Iterator[str]:
+    if project.notes:
+        yield ""
+        yield "📝 NOTES SUPPLÉMENTAIRES"
+        yield SUB_SEPARATOR
+        yield f"  {project.notes}"
+
+
+def _render_attachments(project) -> Iterator[str]:
+    if project.attachments:
+        yield ""
+        yield "📎 DOCUMENTS JOINTS"
+        yield SUB_SEPARATOR
+        for i, attachment in enumerate(project.attachments, 1):
+            yield f"  {i}. {attachment.get('name')} ({attachment.get('chunks', 0)} extraits, ~{attachment.get('tokens', 0)} tokens)"
+
+
+# Ordre d'affichage des sections, par nom d'attribut du Project
+SECTION_RENDERERS: Dict[str, Callable[..., Iterator[str]]] = {
+    "meta": _render_meta,
+    "context": _render_context,
+    "objectives": _render_objectives,
+    "targets": _render_targets,
+    "scope": _render_scope,
+    "deliverables": _render_deliverables,
+    "constraints": _render_constraints,
+    "timeline": _render_timeline,
+    "governance": _render_governance,
+    "budget": _render_budget,
+    "acceptance": _render_acceptance,
+    "risks": _render_risks,
+    "notes": _render_notes,
+    "attachments": _render_attachments,
+}
+
+
+def iter_description_lines(project, sections: Optional[Iterable[str]] = None) -> Iterator[str]:
+    """Produit paresseusement les lignes de la description d'un projet
+
+    Args:
+        project: Objet Project à décrire
+        sections: Noms des sections à inclure (ex: ["meta", "scope"]) ;
+                  toutes les sections si None
+
+    Yields:
+        str: Lignes de la description, sans retour à la ligne final
+    """
+    if sections is None:
+        selected = SECTION_RENDERERS.keys()
+    else:
+        selected = set(sections)
+        unknown = selected - SECTION_RENDERERS.keys()
+        if unknown:
+            raise ValueError(f"Unknown project sections: {', '.join(sorted(unknown))}")
+
+    yield ""
+    yield SEPARATOR
+    yield "DESCRIPTION DU PROJET"
+    yield SEPARATOR
+    for name, renderer in SECTION_RENDERERS.items():
+        if name in selected:
+            yield from renderer(project)
+    yield ""
+    yield SEPARATOR
+    yield ""
+
+
+class RenderSink(ABC):
+    """Destination de rendu : reçoit toutes les lignes d'une description en une fois."""
+
+    @abstractmethod
+    def write_lines(self, lines: Iterable[str]) -> None:
+        """Écrit les lignes rendues (sans retour à la ligne final)."""
+
+
+class TerminalSink(RenderSink):
+    """Écrit la description sur un flux texte (stdout par défaut) en une seule écriture."""
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        self.stream = stream
+
+    def write_lines(self, lines: Iterable[str]) -> None:
+        stream = self.stream or sys.stdout
+        stream.write("\n".join(lines) + "\n")
+        stream.flush()
+
+
+class StringSink(RenderSink):
+    """Accumule la description dans une chaîne, récupérable via getvalue()."""
+
+    def __init__(self):
+        self._parts: list[str] = []
+
+    def write_lines(self, lines: Iterable[str]) -> None:
+        self._parts.append("\n".join(lines) + "\n")
+
+    def getvalue(self) -> str:
+        return "".join(self._parts)
+
+
+class FileSink(RenderSink):
+    """Écrit la description dans un fichier (écrasé par défaut, mode="a" pour ajouter)."""
+
+    def __init__(self, path: str, mode: str = "w"):
+        self.path = path
+        self.mode = mode
+
+    def write_lines(self, lines: Iterable[str]) -> None:
+        with open(self.path, self.mode, encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+class QtTextSink(RenderSink):
+    """Affiche la description dans un widget texte Qt (QPlainTextEdit, QTextEdit, QLabel…).
+
+    Le widget est seulement supposé exposer setPlainText() ou setText() :
+    ce module ne dépend donc pas de PySide6.
+    """
+
+    def __init__(self, widget):
+        self.widget = widget
+
+    def write_lines(self, lines: Iterable[str]) -> None:
+        text = "\n".join(lines)
+        if hasattr(self.widget, "setPlainText"):
+            self.widget.setPlainText(text)
+        else:
+            self.widget.setText(text)
+
+
+def render_project(project, sink: Optional[RenderSink] = None, sections: Optional[Iterable[str]] = None) -> RenderSink:
+    """Rend la description d'un projet dans une destination
+
+    Args:
+        project: Objet Project à décrire
+        sink: Destination du rendu (TerminalSink sur stdout si None)
+        sections: Sections à inclure (toutes si None)
+
+    Returns:
+        RenderSink: La destination utilisée, pour chaîner un getvalue() par exemple
+    """
+    sink = sink or TerminalSink()
+    sink.write_lines(iter_description_lines(project, sections))
+    return sink
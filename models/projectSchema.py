@@ -0,0 +1,219 @@
+"""
+Schémas pydantic des sections d'un Project, appliqués à l'entrée du builder.
+
+Chaque setter de ConcreteProjectBuilder valide sa section avant de la
+stocker : un type inattendu (liste à la place d'un dictionnaire, nombre à la
+place d'un texte…) est refusé immédiatement, au lieu d'échouer plus loin
+dans la construction du contexte LLM, après un appel déjà payé. Les clés
+absentes reçoivent leur valeur par défaut (celle de Project()) ; les clés
+inconnues des sections dictionnaire sont conservées.
+
+Les schémas sont des TypedDict : pydantic-core valide directement vers des
+dictionnaires et des listes neufs, sans instancier de modèle à reconvertir
+ensuite (la structure de Project reste celle de to_dict()).
+
+Pour les imports en masse, validate_projects() valide une liste de projets
+bruts en un seul appel pydantic-core (TypeAdapter) et sépare les projets
+valides des projets refusés, avec les erreurs de chacun.
+
+Usage:
+    meta = validate_section("meta", {"client_name": "ACME"})
+    with gc_paused():  # chargement en masse, avant le démarrage des threads
+        projects, rejected = validate_projects(raw_dicts)
+"""
+import gc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple, get_args
+
+from pydantic import ConfigDict, Field, TypeAdapter, ValidationError
+from typing_extensions import Annotated, NotRequired, TypedDict
+
+from models.Project import SCHEMA_VERSION, SECTIONS, Project
+
+
+# Champs facultatifs, complétés par leur valeur par défaut quand ils sont absents
+Text = Annotated[NotRequired[Optional[str]], Field(default=None)]
+TextList = Annotated[NotRequired[List[str]], Field(default_factory=list)]
+
+# Sections dictionnaire : les clés inconnues sont conservées
+_SECTION_CONFIG = ConfigDict(extra="allow")
+
+
+class MetaSection(TypedDict):
+    """Informations générales du projet."""
+    __pydantic_config__ = _SECTION_CONFIG  # type: ignore
+    client_name: Text
+    project_name: Text
+    entreprise_name: Text
+    author: Text
+    version: Text
+    created_at: Text
+
+
+class ContextSection(TypedDict):
+    """Contexte : déclencheur, état actuel et enjeux."""
+    __pydantic_config__ = _SECTION_CONFIG  # type: ignore
+    trigger: Text
+    current_state: Text
+    stakes: TextList
+
+
+class TargetsSection(TypedDict):
+    """Cibles primaires et secondaires, parcours utilisateur."""
+    __pydantic_config__ = _SECTION_CONFIG  # type: ignore
+    primary: TextList
+    secondary: TextList
+    journey: Text
+
+
+# "in" est un mot réservé : syntaxe fonctionnelle
+ScopeSection = TypedDict("ScopeSection", {"in": TextList, "out": TextList, "changeRule": Text})
+ScopeSection.__doc__ = "Périmètre inclus et exclu, règle de changement."
+ScopeSection.__pydantic_config__ = _SECTION_CONFIG  # type: ignore
+
+
+class GovernanceSection(TypedDict):
+    """Décideur, validateurs et contacts."""
+    __pydantic_config__ = _SECTION_CONFIG  # type: ignore
+    decision_maker: Text
+    validators: TextList
+    contacts: TextList
+
+
+class BudgetSection(TypedDict):
+    """Budget : total formaté, postes ("nom: heures × taux = coût") et arbitrages."""
+    __pydantic_config__ = _SECTION_CONFIG  # type: ignore
+    total: Text
+    items: TextList
+    tradeoffs: Text
+
+
+class AcceptanceSection(TypedDict):
+    """Critères de recette."""
+    __pydantic_config__ = _SECTION_CONFIG  # type: ignore
+    criteria: TextList
+
+
+class AttachmentEntry(TypedDict):
+    """Document client indexé (métadonnées de utils.attachments.ingest_file)."""
+    __pydantic_config__ = _SECTION_CONFIG  # type: ignore
+    name: str
+    path: str
+    sha256: str
+    size: Annotated[NotRequired[int], Field(default=0)]
+    chunks: Annotated[NotRequired[int], Field(default=0)]
+    tokens: Annotated[NotRequired[int], Field(default=0)]
+
+
+class ProjectSchema(TypedDict):
+    """Projet complet (Project.to_dict()) ; les sections absentes prennent leur valeur par défaut."""
+    __pydantic_config__ = ConfigDict(extra="forbid")  # type: ignore
+    meta: Annotated[NotRequired[MetaSection], Field(default_factory=dict, validate_default=True)]
+    context: Annotated[NotRequired[ContextSection], Field(default_factory=dict, validate_default=True)]
+    objectives: TextList
+    targets: Annotated[NotRequired[TargetsSection], Field(default_factory=dict, validate_default=True)]
+    scope: Annotated[NotRequired[ScopeSection], Field(default_factory=dict, validate_default=True)]
+    deliverables: TextList
+    constraints: Annotated[NotRequired[Dict[str, str]], Field(default_factory=dict)]
+    timeline: TextList
+    governance: Annotated[NotRequired[GovernanceSection], Field(default_factory=dict, validate_default=True)]
+    budget: Annotated[NotRequired[BudgetSection], Field(default_factory=dict, validate_default=True)]
+    acceptance: Annotated[NotRequired[AcceptanceSection], Field(default_factory=dict, validate_default=True)]
+    risks: TextList
+    notes: Annotated[NotRequired[str], Field(default="")]
+    attachments: Annotated[NotRequired[List[AttachmentEntry]], Field(default_factory=list)]
+
+
+def _section_type(section: str) -> Any:
+    """Type d'une section de ProjectSchema, sans Annotated ni NotRequired."""
+    annotation = get_args(ProjectSchema.__annotations__[section])[0]
+    return get_args(annotation)[0]
+
+
+# Un adaptateur par section : le schéma pydantic-core n'est compilé qu'une fois
+SECTION_ADAPTERS: Dict[str, TypeAdapter] = {section: TypeAdapter(_section_type(section)) for section in SECTIONS}
+PROJECTS_ADAPTER = TypeAdapter(List[ProjectSchema])
+
+
+def validate_section(section: str, value: Any) -> Any:
+    """
+    Valide une section et la renvoie complétée (dictionnaires et listes neufs).
+
+    Args:
+        section: Nom de la section (voir models.Project.SECTIONS)
+        value: Valeur fournie au builder
+
+    Returns:
+        Section validée, complétée des clés par défaut
+
+    Raises:
+        ValidationError: Si la valeur ne respecte pas le schéma de la section
+    """
+    return SECTION_ADAPTERS[section].validate_python(value)
+
+
+@contextmanager
+def gc_paused() -> Iterator[None]:
+    """Suspend le ramasse-miettes cyclique pendant un chargement en masse : la validation alloue des milliers
+    de conteneurs sans cycle, et chaque collecte de génération 2 reparcourrait tout le tas.
+
+    L'arrêt vaut pour tout le processus : à réserver aux chargements faits avant le démarrage des threads
+    (batch.load_projects), jamais dans un serveur où d'autres requêtes s'exécutent en parallèle."""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _unwrap(data: Any) -> Any:
+    """Retire l'enveloppe versionnée de to_bytes() ({"schema_version", "project"})."""
+    if isinstance(data, dict) and "schema_version" in data:
+        version = data["schema_version"]
+        if not isinstance(version, int) or version > SCHEMA_VERSION:
+            raise ValueError(f"Unsupported project schema version {version} (max supported: {SCHEMA_VERSION})")
+        return data.get("project")
+    return data
+
+
+def validate_projects(raw: List[Any]) -> Tuple[List[Project], List[Tuple[int, List[Dict[str, Any]]]]]:
+    """
+    Valide une liste de projets bruts (to_dict() ou enveloppes to_bytes() décodées).
+
+    La liste entière passe en un seul appel pydantic-core ; si des projets
+    sont invalides, les erreurs sont regroupées par projet et seuls les
+    projets valides sont reconstruits.
+
+    Args:
+        raw: Projets bruts
+
+    Returns:
+        (projets valides dans l'ordre d'entrée, [(index du projet refusé, erreurs pydantic)])
+    """
+    rejected: Dict[int, List[Dict[str, Any]]] = {}
+    candidates = []
+    for index, data in enumerate(raw):
+        try:
+            candidates.append((index, _unwrap(data)))
+        except ValueError as e:
+            rejected[index] = [{"type": "schema_version", "loc": ("schema_version",), "msg": str(e)}]
+
+    try:
+        validated = PROJECTS_ADAPTER.validate_python([data for _, data in candidates])
+    except ValidationError as e:
+        for error in e.errors(include_url=False):
+            position, *loc = error["loc"]
+            rejected.setdefault(candidates[position][0], []).append({**error, "loc": tuple(loc)})  # type: ignore
+        candidates = [(index, data) for index, data in candidates if index not in rejected]
+        # Les projets restants sont valides : une seconde passe les complète
+        validated = PROJECTS_ADAPTER.validate_python([data for _, data in candidates])
+    # Dictionnaires neufs produits par pydantic : inutile de les recopier
+    projects = [Project.from_dict(data, copy=False) for data in validated]
+    return projects, sorted(rejected.items())
+
+
+def format_errors(errors: List[Dict[str, Any]]) -> str:
+    """Erreurs pydantic d'un projet sur une ligne ("section.champ: message; …")."""
+    return "; ".join(f"{'.'.join(str(part) for part in error['loc']) or 'project'}: {error['msg']}" for error in errors)
@@ -0,0 +1,93 @@
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import (
+    QApplication, QFileDialog, QHBoxLayout, QLabel, QListWidget, QMessageBox, QPushButton, QVBoxLayout, QWidget
+)
+from utils.attachments import AttachmentError, ingest_file
+
+
+class AttachmentsPage(QWidget):
+    """
+    Client documents (briefs, brand guidelines, existing specs) attached to the project.
+
+    Files are chunked and indexed as soon as they are added; only their
+    metadata is stored in the project, and the most relevant excerpts are
+    retrieved at generation time (see utils.attachments).
+    """
+
+    def __init__(self):
+        super().__init__()
+
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel("Documents client"))
+
+        help_label = QLabel(
+            "Joignez les documents fournis par le client (brief, charte graphique, cahier des charges "
+            "existant…) au format PDF, DOCX, Markdown ou texte. Seuls les extraits pertinents seront "
+            "repris lors de la génération."
+        )
+        help_label.setWordWrap(True)
+        layout.addWidget(help_label)
+
+        self.list_widget = QListWidget()
+        self.list_widget.setSelectionMode(QListWidget.SelectionMode.ExtendedSelection)
+        layout.addWidget(self.list_widget)
+
+        buttons = QHBoxLayout()
+        self.btn_add = QPushButton("+ Ajouter des documents…")
+        self.btn_add.clicked.connect(self.add_from_dialog)
+        buttons.addWidget(self.btn_add)
+        self.btn_remove = QPushButton("Retirer la sélection")
+        self.btn_remove.clicked.connect(self.remove_selected)
+        buttons.addWidget(self.btn_remove)
+        layout.addLayout(buttons)
+
+        self.setLayout(layout)
+        self._entries: list[dict] = []
+
+    def add_from_dialog(self) -> None:
+        paths, _ = QFileDialog.getOpenFileNames(
+            self, "Ajouter des documents", "", "Documents (*.pdf *.docx *.md *.markdown *.txt)"
+        )
+        if paths:
+            self.add_files(paths)
+
+    def add_files(self, paths: list[str]) -> None:
+        """Indexes the files and adds them; already attached contents are skipped."""
+        errors = []
+        known = {entry.get("sha256") for entry in self._entries}
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            for path in paths:
+                try:
+                    entry = ingest_file(path)
+                except (AttachmentError, OSError) as e:
+                    errors.append(str(e))
+                    continue
+                if entry["sha256"] not in known:
+                    known.add(entry["sha256"])
+                    self._entries.append(entry)
+        finally:
+            QApplication.restoreOverrideCursor()
+        self._refresh()
+        if errors:
+            QMessageBox.warning(self, "Documents non ajoutés", "\n".join(errors))
+
+    def remove_selected(self) -> None:
+        rows = {index.row() for index in self.list_widget.selectedIndexes()}
+        if rows:
+            self._entries = [entry for row, entry in enumerate(self._entries) if row not in rows]
+            self._refresh()
+
+    def _refresh(self) -> None:
+        self.list_widget.clear()
+        for entry in self._entries:
+            self.list_widget.addItem(f"{entry.get('name')} — {entry.get('chunks', 0)} extraits")
+
+    def get_data(self) -> list:
+        return [dict(entry) for entry in self._entries]
+
+    def set_data(self, attachments: list) -> None:
+        if attachments == self._entries:
+            return
+        self._entries = [dict(entry) for entry in attachments or []]
+        self._refresh()
@@ -0,0 +1,188 @@
+from PySide6.QtCore import QAbstractListModel, QModelIndex, Qt
+from PySide6.QtGui import QKeySequence, QShortcut
+from PySide6.QtWidgets import (
+    QAbstractItemView, QApplication, QHBoxLayout, QLineEdit, QListView, QPushButton, QVBoxLayout, QWidget
+)
+from pages.restore import set_text
+
+
+class StringListModel(QAbstractListModel):
+    """
+    Editable list of strings backed by a plain Python list.
+    Appends and bulk inserts emit a single rowsInserted signal, whatever their size.
+    """
+
+    def __init__(self, values=None, parent=None):
+        super().__init__(parent)
+        self._values: list[str] = list(values or [])
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._values)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if index.isValid() and role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return self._values[index.row()]
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole) -> bool:
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole:
+            return False
+        self._values[index.row()] = str(value)
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEditable
+
+    def append(self, values: list[str]) -> None:
+        """
+        Appends values at the end of the list in one model update.
+        """
+        if not values:
+            return
+        first = len(self._values)
+        self.beginInsertRows(QModelIndex(), first, first + len(values) - 1)
+        self._values.extend(values)
+        self.endInsertRows()
+
+    def remove_rows(self, rows: list[int]) -> None:
+        """
+        Removes the given rows, one model update per contiguous range.
+        """
+        ranges: list[list[int]] = []
+        for row in sorted(set(rows), reverse=True):
+            if ranges and ranges[-1][0] == row + 1:
+                ranges[-1][0] = row
+            else:
+                ranges.append([row, row])
+        # Highest ranges first, so the remaining row numbers stay valid
+        for first, last in ranges:
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._values[first:last + 1]
+            self.endRemoveRows()
+
+    def set_values(self, values: list[str]) -> None:
+        """
+        Replaces the list content by diffing it against the current one:
+        rows that did not change are left alone (the view keeps its selection
+        and scroll position), changed rows emit one dataChanged for their span,
+        and only the tail is inserted or removed.
+        """
+        values = list(values)
+        common = min(len(values), len(self._values))
+        changed = [row for row in range(common) if self._values[row] != values[row]]
+        if changed:
+            self._values[:common] = values[:common]
+            self.dataChanged.emit(self.index(changed[0]), self.index(changed[-1]))
+
+        if len(values) > len(self._values):
+            self.append(values[common:])
+        elif len(values) < len(self._values):
+            self.beginRemoveRows(QModelIndex(), common, len(self._values) - 1)
+            del self._values[common:]
+            self.endRemoveRows()
+
+    def values(self) -> list[str]:
+        return list(self._values)
+
+
+class ListEditor(QWidget):
+    """
+    Reusable list input for the wizard pages:
+    [new item input] [add button]
+    [list view: double-click to edit]
+    [paste list] [remove selection]
+
+    Pasting (button or Ctrl+V on the list) adds one item per clipboard line.
+    """
+
+    def __init__(self, placeholder: str = "", add_label: str = "+ Ajouter", parent=None):
+        super().__init__(parent)
+        self.model = StringListModel(parent=self)
+
+        self.new_item_input = QLineEdit()
+        self.new_item_input.setPlaceholderText(placeholder)
+        self.new_item_input.returnPressed.connect(self.add_from_input)
+
+        self.btn_add = QPushButton(add_label)
+        self.btn_add.clicked.connect(self.add_from_input)
+
+        self.view = QListView()
+        self.view.setModel(self.model)
+        self.view.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.view.setEditTriggers(
+            QAbstractItemView.EditTrigger.DoubleClicked | QAbstractItemView.EditTrigger.EditKeyPressed
+        )
+        # All rows have the same height: lets the view skip measuring thousands of items
+        self.view.setUniformItemSizes(True)
+        self.view.setMaximumHeight(160)
+
+        self.btn_paste = QPushButton("Coller une liste")
+        self.btn_paste.clicked.connect(self.paste_from_clipboard)
+        self.btn_remove = QPushButton("Supprimer la sélection")
+        self.btn_remove.clicked.connect(self.remove_selected)
+
+        QShortcut(QKeySequence.StandardKey.Paste, self.view, activated=self.paste_from_clipboard)
+        QShortcut(QKeySequence.StandardKey.Delete, self.view, activated=self.remove_selected)
+
+        input_row = QHBoxLayout()
+        input_row.addWidget(self.new_item_input)
+        input_row.addWidget(self.btn_add)
+
+        actions_row = QHBoxLayout()
+        actions_row.addWidget(self.btn_paste)
+        actions_row.addWidget(self.btn_remove)
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(input_row)
+        layout.addWidget(self.view)
+        layout.addLayout(actions_row)
+        self.setLayout(layout)
+
+    def add_from_input(self):
+        """
+        Adds the text typed in the input as a new item.
+        """
+        text = self.new_item_input.text().strip()
+        if text:
+            self.model.append([text])
+            self.new_item_input.clear()
+
+    def add_items(self, items: list[str]):
+        """
+        Adds several items at once, skipping blank ones.
+        """
+        self.model.append([item.strip() for item in items if item and item.strip()])
+
+    def paste_from_clipboard(self):
+        """
+        Adds one item per non-empty line of the clipboard text.
+        """
+        self.add_items(QApplication.clipboard().text().splitlines())
+
+    def remove_selected(self):
+        """
+        Removes the selected items.
+        """
+        rows = [index.row() for index in self.view.selectionModel().selectedRows()]
+        self.model.remove_rows(rows)
+
+    def get_values(self) -> list[str]:
+        """
+        Returns the non-empty items, stripped, plus any text left in the input.
+        """
+        values = [value.strip() for value in self.model.values() if value.strip()]
+        pending = self.new_item_input.text().strip()
+        if pending:
+            values.append(pending)
+        return values
+
+    def set_values(self, values: list[str]) -> None:
+        """
+        Restores the items, touching only the rows that differ (see StringListModel.set_values).
+        """
+        set_text(self.new_item_input, "")
+        self.model.set_values([value for value in values or [] if value])
@@ -1,5 +1,6 @@
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QLineEdit
 from datetime import datetime
+from pages.restore import set_text
 
 class MetaPage(QWidget):
     def __init__(self):
@@ -26,6 +27,10 @@ class MetaPage(QWidget):
 
         self.setLayout(layout)
 
+        # Version (owned by the RevisionStore) and creation date of a reloaded project, kept as is
+        self._version = None
+        self._created_at = None
+
     def get_data(self) -> dict:
         company = self.company_name_input.text().strip()
         if company == "" or company.lower() == "non":
@@ -36,12 +41,14 @@ class MetaPage(QWidget):
             "client_name": self.client_name_input.text().strip(),
             "project_name": self.project_name_input.text().strip(),
             "entreprise_name": company,
-            "version": "1.0",
-            "created_at": datetime.now().isoformat()
+            "version": self._version or "1.0",
+            "created_at": self._created_at or datetime.now().isoformat()
         }
 
     def set_data(self, meta: dict) -> None:
-        self.author_name_input.setText(meta.get("author", "") or "")
-        self.client_name_input.setText(meta.get("client_name", "") or "")
-        self.project_name_input.setText(meta.get("project_name", "") or "")
-        self.company_name_input.setText(meta.get("entreprise_name", "") or "")
+        self._version = meta.get("version")
+        self._created_at = meta.get("created_at")
+        set_text(self.author_name_input, meta.get("author", "") or "")
+        set_text(self.client_name_input, meta.get("client_name", "") or "")
+        set_text(self.project_name_input, meta.get("project_name", "") or "")
+        set_text(self.company_name_input, meta.get("entreprise_name", "") or "")
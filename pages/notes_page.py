@@ -1,4 +1,5 @@
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QTextEdit
+from pages.restore import set_text
 
 class NotesPage(QWidget):
     def __init__(self):
@@ -41,4 +42,4 @@ class NotesPage(QWidget):
         """
         Charge les notes dans le champ.
         """
-        self.notes_input.setPlainText(notes or "")
+        set_text(self.notes_input, notes or "")
@@ -1,4 +1,5 @@
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QLineEdit, QHBoxLayout, QPushButton
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel
+from pages.list_editor import ListEditor
 
 class ObjectivesPage(QWidget):
     def __init__(self):
@@ -8,56 +9,22 @@ class ObjectivesPage(QWidget):
         layout.addWidget(QLabel("Objectifs du projet"))
         
         layout.addWidget(QLabel("Quels sont les objectifs du projet ?"))
-        
-        self.objectives_container = QVBoxLayout()
-        self.objective_inputs: list[QLineEdit] = []
-        self.add_objective_input()
-        layout.addLayout(self.objectives_container)
-        
-        self.btn_add_objective = QPushButton("+ Ajouter un enjeu")
-        self.btn_add_objective.clicked.connect(self.add_objective_input)
-        layout.addWidget(self.btn_add_objective)
+        self.objectives_editor = ListEditor(
+            "Ex: Augmenter les conversions, améliorer l'expérience utilisateur…",
+            "+ Ajouter un objectif"
+        )
+        layout.addWidget(self.objectives_editor)
         
         self.setLayout(layout)
     
-    def add_objective_input(self):
-        """
-        Adds a new row: [QLineEdit] [Remove button]
-        """
-        row = QHBoxLayout()
-
-        input_ = QLineEdit()
-        input_.setPlaceholderText("Ex: Augmenter les conversions, améliorer l'expérience utilisateur…")
-        self.objective_inputs.append(input_)
-
-        btn_remove = QPushButton("Supprimer")
-        btn_remove.clicked.connect(lambda: self.remove_objective_input(row, input_))
-
-        row.addWidget(input_)
-        row.addWidget(btn_remove)
-
-        self.objectives_container.addLayout(row)
-    
-    def remove_objective_input(self, row_layout: QHBoxLayout, input_: QLineEdit):
-        """
-        Removes a row cleanly from the UI and from self.objective_inputs.
-        """
-        # Remove widgets inside the row layout
-        while row_layout.count():
-            item = row_layout.takeAt(0)
-            w = item.widget()
-            if w is not None:
-                w.setParent(None)
-
-        # Remove the input from the list
-        if input_ in self.objective_inputs:
-            self.objective_inputs.remove(input_)
-    
     def get_objectives(self) -> list[str]:
         """
         Returns the list of objectives entered by the user.
         """
-        return [input_.text().strip() for input_ in self.objective_inputs]
+        return self.objectives_editor.get_values()
     
-    def get_data(self) -> dict:
-        return self.get_objectives()
\ No newline at end of file
+    def get_data(self) -> list[str]:
+        return self.get_objectives()
+
+    def set_data(self, objectives: list) -> None:
+        self.objectives_editor.set_values(objectives or [])
@@ -0,0 +1,35 @@
+import importlib
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class PageSpec:
+    """
+    Describes one wizard step without building it.
+
+    Attributes:
+        module: Module containing the page class (imported on first use)
+        class_name: QWidget subclass implementing get_data() / set_data()
+        section: Project attribute filled by the page; the matching
+                 director method is construct_<section>()
+    """
+    module: str
+    class_name: str
+    section: str
+
+    def create(self):
+        """Imports the page module and instantiates the page."""
+        return getattr(importlib.import_module(self.module), self.class_name)()
+
+
+# Wizard steps, in navigation order. Add a PageSpec here to add a step.
+WIZARD_PAGES = (
+    PageSpec("pages.meta_page", "MetaPage", "meta"),
+    PageSpec("pages.context_page", "ContextPage", "context"),
+    PageSpec("pages.objectives_page", "ObjectivesPage", "objectives"),
+    PageSpec("pages.targets_page", "TargetsPage", "targets"),
+    PageSpec("pages.scope_page", "ScopePage", "scope"),
+    PageSpec("pages.governance_page", "GovernancePage", "governance"),
+    PageSpec("pages.notes_page", "NotesPage", "notes"),
+    PageSpec("pages.attachments_page", "AttachmentsPage", "attachments"),
+)
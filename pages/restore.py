@@ -0,0 +1,44 @@
+from PySide6.QtCore import QSignalBlocker
+
+
+def set_text(widget, value) -> bool:
+    """
+    Sets the text of a QLineEdit / QTextEdit only if it differs from the
+    current one, with the widget's signals blocked during the update.
+
+    Leaving an unchanged widget alone keeps its cursor, selection and undo
+    history, and skips a relayout.
+
+    Returns:
+        True if the widget was updated
+    """
+    value = value or ""
+    plain = hasattr(widget, "toPlainText")
+    current = widget.toPlainText() if plain else widget.text()
+    if current == value:
+        return False
+    blocker = QSignalBlocker(widget)
+    try:
+        if plain:
+            widget.setPlainText(value)
+        else:
+            widget.setText(value)
+    finally:
+        blocker.unblock()
+    return True
+
+
+def restore_page(page, value) -> bool:
+    """
+    Rehydrates a wizard page from its Project section.
+
+    set_data() is only called when the section differs from what the page
+    already shows; pages then diff field by field (set_text, ListEditor.set_values).
+
+    Returns:
+        True if set_data() was called
+    """
+    if not hasattr(page, "set_data") or page.get_data() == value:
+        return False
+    page.set_data(value)
+    return True
@@ -0,0 +1,454 @@
+"""
+Mode service : expose l'estimation budgétaire et la génération de CDC en HTTP,
+pour les outils qui n'utilisent pas l'interface PySide6.
+
+Serveur asyncio de la bibliothèque standard. Les appels LLM (bloquants)
+passent par utils.job_scheduler : concurrence plafonnée, priorité aux
+requêtes interactives sur les lots ("priority": "batch"), tour de rôle par
+auteur. Quand la file est pleine, le service répond 429 au lieu d'accumuler
+les requêtes. Les clients LLM sont créés une seule fois et partagés.
+
+Endpoints:
+    POST /projects       corps = Project.to_dict() (ou enveloppe to_bytes JSON) -> {"project_id"}
+    POST /estimate       {"project_id"} ou {"project": {...}}, "wait": true pour attendre le résultat,
+                         "priority": "interactive" (défaut) ou "batch",
+                         "mode": "single" (défaut) ou "fanout" (un appel par livrable)
+    POST /generate       idem ; stream le CDC (chunked) sauf si "stream": false
+    GET  /jobs/{id}      statut et résultat d'une tâche
+    GET  /health         taille de la file, tâches en cours, temps d'attente par priorité
+    GET  /metrics        métriques au format texte Prometheus (voir utils.metrics)
+
+Usage:
+    python service.py --port 8080 --workers 8 --queue-size 64
+    python service.py --fake-llm --fake-latency 0.5   # sans clé API (tests de charge)
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from itertools import islice
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+from dotenv import load_dotenv
+
+from models.Project import Project
+from models.projectSchema import format_errors, validate_projects
+from utils.budget_estimator import ESTIMATION_MODES, BudgetEstimator, budget_to_dict
+from utils.cdc_generator import CDCGenerator
+from utils.job_scheduler import JobScheduler, Priority, SchedulerFull
+from utils.mermaid_validator import summarize_reports
+from utils.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY
+from utils.rate_limiter import RateLimiter
+
+
+MAX_BODY_BYTES = 8 * 1024 * 1024
+
+JOBS = REGISTRY.counter("cdc_service_jobs_total", "Tâches du service par type et statut final", ("kind", "status"))
+JOB_QUEUE_SECONDS = REGISTRY.histogram("cdc_service_queue_seconds", "Attente des tâches dans la file, en secondes", ("kind",))
+JOB_RUN_SECONDS = REGISTRY.histogram("cdc_service_job_seconds", "Durée d'exécution des tâches, en secondes", ("kind",))
+REJECTED = REGISTRY.counter("cdc_service_rejected_total", "Tâches refusées (file pleine, 429)")
+QUEUED = REGISTRY.gauge("cdc_service_queued_jobs", "Tâches en attente par priorité", ("priority",))
+RUNNING = REGISTRY.gauge("cdc_service_running_jobs", "Tâches en cours par priorité", ("priority",))
+
+REASONS = {
+    200: "OK", 201: "Created", 202: "Accepted", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 413: "Payload Too Large", 429: "Too Many Requests",
+    500: "Internal Server Error",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+@dataclass
+class Job:
+    """Tâche d'estimation ou de génération placée dans la file du service."""
+    id: str
+    kind: str
+    project: Project
+    mode: str = "single"
+    status: str = "queued"
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    # Morceaux de CDC transmis au client pendant la génération (None = fin du flux)
+    chunks: Optional[asyncio.Queue] = None
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at,
+            "queue_seconds": (self.started_at or time.time()) - self.created_at,
+            "run_seconds": (self.finished_at or time.time()) - self.started_at if self.started_at else None,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class CDCService:
+    """
+    Tâches d'estimation et de génération autour de BudgetEstimator et CDCGenerator.
+
+    Args:
+        estimator: Estimateur partagé par toutes les requêtes
+        generator: Générateur partagé par toutes les requêtes
+        workers: Nombre d'appels LLM simultanés
+        queue_size: Tâches en attente maximum avant de répondre 429
+        max_jobs: Tâches terminées conservées pour GET /jobs/{id}
+        max_projects: Projets conservés pour POST /projects
+    """
+
+    def __init__(self, estimator: BudgetEstimator, generator: CDCGenerator, workers: int = 4,
+                 queue_size: int = 64, max_jobs: int = 10000, max_projects: int = 10000):
+        self.estimator = estimator
+        self.generator = generator
+        self.workers = workers
+        self.queue_size = queue_size
+        self.max_jobs = max_jobs
+        self.max_projects = max_projects
+        self.projects: "OrderedDict[str, Project]" = OrderedDict()
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self.rejected = 0
+        self.scheduler: Optional[JobScheduler] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    # --- file de tâches -------------------------------------------------
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self.scheduler = JobScheduler(max_concurrent=self.workers, max_queued=self.queue_size, name="cdc-worker")
+
+    async def stop(self) -> None:
+        if self.scheduler is not None:
+            self.scheduler.shutdown(wait=False, cancel_pending=True)
+
+    def submit(self, kind: str, project: Project, stream: bool = False,
+               priority: Priority = Priority.INTERACTIVE, mode: str = "single") -> Job:
+        """Place une tâche dans la file ; HTTPError 429 si elle est pleine."""
+        assert self.scheduler is not None, "CDCService.start() must be awaited first"
+        job = Job(uuid.uuid4().hex, kind, project, mode=mode, chunks=asyncio.Queue() if stream else None)
+        try:
+            self.scheduler.submit(self._run, job, priority=priority, author=project.meta.get("author"))
+        except SchedulerFull:
+            self.rejected += 1
+            REJECTED.inc()
+            raise HTTPError(429, "queue is full, retry later")
+        self.jobs[job.id] = job
+        self._evict(self.jobs, self.max_jobs, lambda old: old.done.is_set())
+        return job
+
+    @staticmethod
+    def _evict(store: OrderedDict, limit: int, can_drop=lambda _: True) -> None:
+        # Les plus anciennes entrées supprimables d'abord ; une tâche longue en tête n'empêche pas l'éviction
+        excess = len(store) - limit
+        if excess <= 0:
+            return
+        droppable = islice((key for key, value in store.items() if can_drop(value)), excess)
+        for key in list(droppable):
+            del store[key]
+
+    def _run(self, job: Job) -> None:
+        # Exécuté dans un thread de l'ordonnanceur
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.result = self._estimate(job) if job.kind == "estimate" else self._generate(job)
+            job.status = "done"
+        except Exception as e:
+            job.status = "failed"
+            job.error = f"{type(e).__name__}: {e}"
+        finally:
+            job.finished_at = time.time()
+            JOBS.inc(kind=job.kind, status=job.status)
+            JOB_QUEUE_SECONDS.observe(job.started_at - job.created_at, kind=job.kind)
+            JOB_RUN_SECONDS.observe(job.finished_at - job.started_at, kind=job.kind)
+            self._loop.call_soon_threadsafe(self._finish, job)  # type: ignore
+
+    @staticmethod
+    def _finish(job: Job) -> None:
+        if job.chunks is not None:
+            job.chunks.put_nowait(None)
+        job.done.set()
+
+    def _estimate(self, job: Job) -> Dict[str, Any]:
+        budget_estimate = self.estimator.estimate(job.project, job.mode)
+        return budget_to_dict(budget_estimate)
+
+    def _generate(self, job: Job) -> Dict[str, Any]:
+        parts = []
+        for chunk in self.generator.stream_cdc(job.project):
+            parts.append(chunk)
+            if job.chunks is not None:
+                self._loop.call_soon_threadsafe(job.chunks.put_nowait, chunk)  # type: ignore
+        cdc_content, reports = self.generator.finalize_cdc("".join(parts))
+        return {"cdc_content": cdc_content, "diagrams": summarize_reports(reports)}
+
+    # --- projets --------------------------------------------------------
+
+    @staticmethod
+    def _build_project(data: Dict[str, Any]) -> Project:
+        # Une seule validation, du projet entier : l'erreur cite chaque champ fautif, section comprise
+        projects, rejected = validate_projects([data])
+        if rejected:
+            raise HTTPError(400, f"invalid project: {format_errors(rejected[0][1])}")
+        return projects[0]
+
+    def create_project(self, data: Dict[str, Any]) -> str:
+        project_id = uuid.uuid4().hex
+        self.projects[project_id] = self._build_project(data)
+        self._evict(self.projects, self.max_projects)
+        return project_id
+
+    def resolve_project(self, body: Dict[str, Any]) -> Project:
+        """Projet d'une requête /estimate ou /generate (copie : les tâches ne modifient pas l'original)."""
+        if "project_id" in body:
+            project = self.projects.get(body["project_id"])
+            if project is None:
+                raise HTTPError(404, f"unknown project_id {body['project_id']}")
+            return Project.from_dict(project.to_dict())
+        if isinstance(body.get("project"), dict):
+            return self._build_project(body["project"])
+        raise HTTPError(400, "body must contain project_id or project")
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "queue_size": self.queue_size,
+            "workers": self.workers,
+            "rejected": self.rejected,
+            "jobs": len(self.jobs),
+            "projects": len(self.projects),
+            **(self.scheduler.metrics() if self.scheduler else {}),
+        }
+
+    def metrics(self) -> str:
+        """Métriques du processus (appels LLM, caches, tâches) au format texte Prometheus."""
+        if self.scheduler is not None:
+            scheduler_metrics = self.scheduler.metrics()
+            for priority in Priority:
+                QUEUED.set(scheduler_metrics[priority.name.lower()]["queued"], priority=priority.name.lower())
+                RUNNING.set(scheduler_metrics[priority.name.lower()]["running"], priority=priority.name.lower())
+        return REGISTRY.render()
+
+    # --- HTTP -------------------------------------------------------------
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                try:
+                    await self._dispatch(method, path, body, writer, keep_alive)
+                except HTTPError as e:
+                    await _write_json(writer, e.status, {"error": e.message}, keep_alive)
+                except Exception as e:
+                    await _write_json(writer, 500, {"error": f"{type(e).__name__}: {e}"}, keep_alive)
+                if not keep_alive:
+                    break
+        except HTTPError as e:
+            await _write_json(writer, e.status, {"error": e.message}, False)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method: str, path: str, body: bytes, writer: asyncio.StreamWriter, keep_alive: bool) -> None:
+        path = path.split("?", 1)[0].rstrip("/")
+
+        if method == "GET" and path == "/health":
+            return await _write_json(writer, 200, self.health(), keep_alive)
+        if method == "GET" and path == "/metrics":
+            return await _write_body(writer, 200, self.metrics().encode("utf-8"), METRICS_CONTENT_TYPE, keep_alive)
+        if method == "GET" and path.startswith("/jobs/"):
+            job = self.jobs.get(path[len("/jobs/"):])
+            if job is None:
+                raise HTTPError(404, "unknown job")
+            return await _write_json(writer, 200, job.to_dict(), keep_alive)
+        if path not in ("/projects", "/estimate", "/generate"):
+            raise HTTPError(404, f"no route for {path}")
+        if method != "POST":
+            raise HTTPError(405, "use POST")
+
+        try:
+            data = orjson.loads(body or b"{}")
+        except orjson.JSONDecodeError:
+            raise HTTPError(400, "body must be JSON")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "body must be a JSON object")
+
+        if path == "/projects":
+            return await _write_json(writer, 201, {"project_id": self.create_project(data)}, keep_alive)
+
+        kind = path[1:]
+        stream = kind == "generate" and data.get("stream", True)
+        try:
+            priority = Priority[str(data.get("priority", "interactive")).upper()]
+        except KeyError:
+            raise HTTPError(400, "priority must be interactive or batch")
+        mode = str(data.get("mode", "single"))
+        if mode not in ESTIMATION_MODES:
+            raise HTTPError(400, f"mode must be one of {', '.join(ESTIMATION_MODES)}")
+        job = self.submit(kind, self.resolve_project(data), stream=stream, priority=priority, mode=mode)
+
+        if stream:
+            return await _stream_job(writer, job, keep_alive)
+        if data.get("wait"):
+            await job.done.wait()
+            return await _write_json(writer, 200 if job.status == "done" else 500, job.to_dict(), keep_alive)
+        await _write_json(writer, 202, {"job_id": job.id, "status": job.status}, keep_alive)
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, path, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "malformed request line")
+
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", 0) or 0)
+    except ValueError:
+        raise HTTPError(400, "invalid Content-Length")
+    if length < 0:
+        raise HTTPError(400, "invalid Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, "request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), path, headers, body
+
+
+def _head(status: int, headers: Dict[str, str], keep_alive: bool) -> bytes:
+    headers = {**headers, "Connection": "keep-alive" if keep_alive else "close"}
+    lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}"] + [f"{k}: {v}" for k, v in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def _write_json(writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool) -> None:
+    await _write_body(writer, status, orjson.dumps(payload), "application/json", keep_alive)
+
+
+async def _write_body(writer: asyncio.StreamWriter, status: int, body: bytes, content_type: str, keep_alive: bool) -> None:
+    headers = {"Content-Type": content_type, "Content-Length": str(len(body))}
+    if status == 429:
+        headers["Retry-After"] = "1"
+    writer.write(_head(status, headers, keep_alive) + body)
+    await writer.drain()
+
+
+async def _stream_job(writer: asyncio.StreamWriter, job: Job, keep_alive: bool) -> None:
+    """
+    Transmet le CDC au fil de la génération (Transfer-Encoding: chunked).
+    Le texte streamé est brut ; la version nettoyée et aux diagrammes réparés
+    est disponible ensuite via GET /jobs/{id}.
+    """
+    writer.write(_head(200, {
+        "Content-Type": "text/markdown; charset=utf-8",
+        "Transfer-Encoding": "chunked",
+        "X-Job-Id": job.id,
+    }, keep_alive))
+    while True:
+        chunk = await job.chunks.get()  # type: ignore
+        if chunk is None:
+            break
+        data = chunk.encode("utf-8")
+        writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        await writer.drain()
+    writer.write(b"0\r\n\r\n")
+    await writer.drain()
+
+
+def build_clients(fake_llm: bool = False, fake_latency: float = 0.0,
+                  api_key: Optional[str] = None) -> Tuple[BudgetEstimator, CDCGenerator]:
+    """
+    Construit l'estimateur et le générateur partagés (un client LLM par usage).
+    Si OPENAI_RATE_LIMITS est défini, leurs appels passent par le limiteur
+    partagé entre processus (voir utils.rate_limiter).
+
+    Args:
+        fake_llm: Utiliser utils.fake_llm.FakeChatModel (aucun appel réseau)
+        fake_latency: Latence simulée par appel du modèle factice, en secondes
+        api_key: Clé API OpenAI (si None, utilise OPENAI_API_KEY)
+    """
+    rate_limiter = RateLimiter.from_env()
+    if fake_llm:
+        from utils.fake_llm import FakeChatModel
+        llm = FakeChatModel(latency=fake_latency)
+        return BudgetEstimator(llm=llm, rate_limiter=rate_limiter), CDCGenerator(llm=llm, rate_limiter=rate_limiter)  # type: ignore
+    return (BudgetEstimator(api_key=api_key, rate_limiter=rate_limiter),  # type: ignore
+            CDCGenerator(api_key=api_key, rate_limiter=rate_limiter))  # type: ignore
+
+
+def build_service(fake_llm: bool = False, fake_latency: float = 0.0, workers: int = 4,
+                  queue_size: int = 64, api_key: Optional[str] = None) -> CDCService:
+    """
+    Construit le service avec des clients LLM partagés (voir build_clients).
+
+    Args:
+        workers: Nombre d'appels LLM simultanés
+        queue_size: Tâches en attente maximum avant 429
+    """
+    estimator, generator = build_clients(fake_llm, fake_latency, api_key)
+    return CDCService(estimator, generator, workers=workers, queue_size=queue_size)
+
+
+async def serve(service: CDCService, host: str = "127.0.0.1", port: int = 8080) -> asyncio.base_events.Server:
+    """Démarre l'ordonnanceur et le serveur HTTP ; retourne le serveur asyncio."""
+    await service.start()
+    return await asyncio.start_server(service.handle_connection, host, port, limit=MAX_BODY_BYTES)
+
+
+def main() -> None:
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Service HTTP d'estimation et de génération de CDC")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("CDC_SERVICE_WORKERS", 4)))
+    parser.add_argument("--queue-size", type=int, default=int(os.getenv("CDC_SERVICE_QUEUE_SIZE", 64)))
+    parser.add_argument("--fake-llm", action="store_true", help="modèle local factice, sans clé API")
+    parser.add_argument("--fake-latency", type=float, default=0.0, help="latence du modèle factice (s)")
+    args = parser.parse_args()
+
+    async def run():
+        service = build_service(args.fake_llm, args.fake_latency, args.workers, args.queue_size)
+        server = await serve(service, args.host, args.port)
+        print(f"🚀 Service CDC en écoute sur http://{args.host}:{args.port} "
+              f"({args.workers} workers, file de {args.queue_size})")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await service.stop()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+"""
+Documents client joints au projet (briefs, chartes graphiques, specs existantes).
+
+Plutôt que de coller les documents dans les notes, on les découpe en morceaux
+indexés localement (faiss) ; au moment de la génération, seuls les morceaux
+les plus pertinents pour chaque section du CDC (ou pour l'estimation
+budgétaire) sont ajoutés au prompt, dans un budget de tokens fixe, quel que
+soit le nombre de documents joints.
+
+Formats : .md, .txt, .docx (lecture directe du XML), .pdf (nécessite pypdf).
+
+Le texte découpé et les vecteurs sont mis en cache sous le hash du fichier
+(`.cdc_attachments/`) : le projet ne stocke que les métadonnées des pièces
+jointes, et l'index se reconstruit en quelques millisecondes.
+
+Usage:
+    entry = ingest_file("brief.pdf")
+    project.attachments.append(entry)
+    print(attachment_context(project, CDC_SECTION_QUERIES, max_tokens=3000))
+"""
+import hashlib
+import io
+import json
+import os
+import re
+import unicodedata
+import zipfile
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from xml.etree import ElementTree
+
+import faiss
+import numpy as np
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from utils.metrics import record_cache
+from utils.rate_limiter import count_tokens
+from utils.utils import atomic_write
+
+
+# Incrémenter pour invalider le cache quand le découpage change
+ATTACHMENTS_VERSION = "1"
+DEFAULT_CACHE_DIR = ".cdc_attachments"
+SUPPORTED_EXTENSIONS = (".md", ".markdown", ".txt", ".docx", ".pdf")
+
+# Requêtes de recherche par section du CDC
+CDC_SECTION_QUERIES = {
+    "Contexte & déclencheur": "contexte historique situation actuelle enjeux problème déclencheur marché",
+    "Objectifs": "objectifs KPI indicateurs résultats attendus cibles chiffrées",
+    "Cibles": "cibles utilisateurs persona audience clients parcours",
+    "Périmètre": "périmètre fonctionnalités pages modules inclus exclus",
+    "Livrables": "livrables maquettes contenus formats documents à fournir",
+    "Contraintes": "contraintes techniques charte graphique logo couleurs typographie RGPD accessibilité hébergement",
+    "Planning": "planning délais dates jalons lancement échéance",
+    "Budget": "budget enveloppe coût tarif prix",
+    "Recette": "recette validation critères acceptation tests",
+}
+
+# Requête de l'estimation budgétaire
+BUDGET_QUERY = "livrables fonctionnalités pages volume contenus contraintes techniques délais budget enveloppe"
+
+_WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+class AttachmentError(Exception):
+    """Levée quand un document ne peut pas être lu."""
+
+
+@dataclass
+class Chunk:
+    """Morceau de document indexé."""
+    source: str
+    index: int
+    text: str
+
+
+def _read_docx(path: str) -> str:
+    # Un .docx est une archive zip ; le texte est dans word/document.xml
+    try:
+        with zipfile.ZipFile(path) as archive:
+            root = ElementTree.fromstring(archive.read("word/document.xml"))
+    except (zipfile.BadZipFile, KeyError, ElementTree.ParseError) as e:
+        raise AttachmentError(f"Invalid DOCX file {path}: {e}") from e
+    paragraphs = []
+    for paragraph in root.iter(f"{_WORD_NS}p"):
+        text = "".join(
+            (node.text or "") if node.tag == f"{_WORD_NS}t" else "\t"
+            for node in paragraph.iter() if node.tag in (f"{_WORD_NS}t", f"{_WORD_NS}tab")
+        )
+        if text.strip():
+            paragraphs.append(text)
+    return "\n\n".join(paragraphs)
+
+
+def _read_pdf(path: str) -> str:
+    try:
+        from pypdf import PdfReader
+    except ImportError as e:
+        raise AttachmentError("PDF ingestion requires pypdf (pip install pypdf)") from e
+    try:
+        reader = PdfReader(path)
+        return "\n\n".join(page.extract_text() or "" for page in reader.pages)
+    except Exception as e:
+        raise AttachmentError(f"Invalid PDF file {path}: {e}") from e
+
+
+def read_document(path: str) -> str:
+    """
+    Extrait le texte d'un document.
+
+    Args:
+        path: Chemin d'un fichier .md, .txt, .docx ou .pdf
+
+    Returns:
+        Texte du document
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in SUPPORTED_EXTENSIONS:
+        raise AttachmentError(f"Unsupported attachment type: {extension or path}")
+    if extension == ".docx":
+        return _read_docx(path)
+    if extension == ".pdf":
+        return _read_pdf(path)
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+def _normalize(text: str) -> List[str]:
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return [word for word in re.findall(r"[a-z0-9]+", text.casefold()) if len(word) > 2]
+
+
+class HashingEmbedder:
+    """
+    Vecteurs locaux par hachage des mots et bigrammes (sans appel réseau).
+
+    Même interface que les Embeddings LangChain (embed_documents / embed_query) :
+    OpenAIEmbeddings ou tout autre modèle d'embeddings peut le remplacer.
+
+    Args:
+        dim: Dimension des vecteurs
+    """
+
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+        self.model = f"hashing-{dim}"
+
+    def _vector(self, text: str) -> List[float]:
+        words = _normalize(text)
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for term in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            h = zlib.crc32(term.encode("ascii"))
+            vector[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        # Atténue le poids des termes très répétés
+        vector = np.sign(vector) * np.log1p(np.abs(vector))
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._vector(text)
+
+
+def _embedder_id(embedder: Any) -> str:
+    name = str(getattr(embedder, "model", None) or type(embedder).__name__)
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
+
+
+def _normalized(vectors: Any) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class AttachmentStore:
+    """
+    Cache sur disque du texte découpé et des vecteurs de chaque document, par hash de contenu.
+
+    Args:
+        embedder: Modèle d'embeddings (embed_documents / embed_query) ; HashingEmbedder par défaut
+        cache_dir: Dossier du cache
+        chunk_tokens: Taille des morceaux, en tokens
+        chunk_overlap: Recouvrement entre morceaux, en tokens
+    """
+
+    def __init__(self, embedder: Any = None, cache_dir: str = DEFAULT_CACHE_DIR,
+                 chunk_tokens: int = 350, chunk_overlap: int = 40):
+        self.embedder = embedder or HashingEmbedder()
+        self.cache_dir = cache_dir
+        self.splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_tokens,
+            chunk_overlap=chunk_overlap,
+            length_function=count_tokens,
+            separators=["\n\n", "\n", ". ", " ", ""],
+            keep_separator="end",
+        )
+
+    def _path(self, sha256: str, suffix: str) -> str:
+        return os.path.join(self.cache_dir, f"{sha256}-v{ATTACHMENTS_VERSION}{suffix}")
+
+    def ingest(self, path: str) -> Dict[str, Any]:
+        """
+        Lit, découpe et vectorise un document, puis le met en cache.
+
+        Args:
+            path: Chemin du document
+
+        Returns:
+            Métadonnées à ajouter à project.attachments
+            ({"name", "path", "sha256", "size", "chunks", "tokens"})
+        """
+        with open(path, "rb") as f:
+            sha256 = hashlib.sha256(f.read()).hexdigest()
+        chunks = self.chunks(sha256, path)
+        self.vectors(sha256, chunks)
+        return {
+            "name": os.path.basename(path),
+            "path": os.path.abspath(path),
+            "sha256": sha256,
+            "size": os.path.getsize(path),
+            "chunks": len(chunks),
+            "tokens": sum(count_tokens(chunk) for chunk in chunks),
+        }
+
+    def chunks(self, sha256: str, path: Optional[str] = None) -> List[str]:
+        """Morceaux d'un document (depuis le cache, sinon relus depuis `path`)."""
+        cached = self._path(sha256, ".json")
+        record_cache("attachments_chunks", os.path.exists(cached))
+        if os.path.exists(cached):
+            with open(cached, "r", encoding="utf-8") as f:
+                return json.load(f)
+        if not path or not os.path.exists(path):
+            raise AttachmentError(f"Attachment {path or sha256} is neither cached nor readable")
+        chunks = [chunk.strip() for chunk in self.splitter.split_text(read_document(path)) if chunk.strip()]
+        os.makedirs(self.cache_dir, exist_ok=True)
+        atomic_write(cached, json.dumps(chunks, ensure_ascii=False).encode("utf-8"))
+        return chunks
+
+    def vectors(self, sha256: str, chunks: List[str]) -> np.ndarray:
+        """Vecteurs normalisés des morceaux d'un document (calculés une fois par modèle d'embeddings)."""
+        cached = self._path(sha256, f"-{_embedder_id(self.embedder)}.npy")
+        record_cache("attachments_vectors", os.path.exists(cached))
+        if os.path.exists(cached):
+            return np.load(cached)
+        vectors = _normalized(self.embedder.embed_documents(chunks)) if chunks else np.zeros((0, 1), np.float32)
+        buffer = io.BytesIO()
+        np.save(buffer, vectors)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        atomic_write(cached, buffer.getvalue())
+        return vectors
+
+
+class AttachmentIndex:
+    """
+    Index faiss (produit scalaire sur vecteurs normalisés = similarité cosinus)
+    des morceaux de plusieurs documents.
+
+    Args:
+        store: Cache des documents (et modèle d'embeddings utilisé)
+    """
+
+    def __init__(self, store: Optional[AttachmentStore] = None):
+        self.store = store or AttachmentStore()
+        self.chunks: List[Chunk] = []
+        self.errors: List[str] = []
+        self._index: Optional[faiss.IndexFlatIP] = None
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        """Ajoute un document décrit par une entrée de project.attachments."""
+        try:
+            texts = self.store.chunks(entry["sha256"], entry.get("path"))
+            vectors = self.store.vectors(entry["sha256"], texts)
+        except (AttachmentError, OSError) as e:
+            self.errors.append(str(e))
+            return
+        if not texts:
+            return
+        if self._index is None:
+            self._index = faiss.IndexFlatIP(vectors.shape[1])
+        self._index.add(vectors)  # type: ignore
+        name = entry.get("name") or os.path.basename(entry.get("path") or entry["sha256"])
+        self.chunks.extend(Chunk(name, i, text) for i, text in enumerate(texts))
+
+    @classmethod
+    def from_attachments(cls, attachments: Iterable[Dict[str, Any]], store: Optional[AttachmentStore] = None) -> "AttachmentIndex":
+        """Construit l'index des pièces jointes d'un projet (les fichiers introuvables sont ignorés, voir errors)."""
+        index = cls(store)
+        for entry in attachments:
+            index.add(entry)
+        return index
+
+    def search(self, query: str, k: int = 4) -> List[Tuple[Chunk, float]]:
+        """
+        Morceaux les plus proches d'une requête.
+
+        Returns:
+            Liste de (morceau, score cosinus), du plus au moins pertinent
+        """
+        if self._index is None or not self.chunks:
+            return []
+        query_vector = _normalized(self.store.embedder.embed_query(query))
+        scores, ids = self._index.search(query_vector, min(k, len(self.chunks)))  # type: ignore
+        return [(self.chunks[i], float(score)) for score, i in zip(scores[0], ids[0]) if i >= 0]
+
+
+def attachment_context(project: Any, queries: Dict[str, str], k: int = 3, max_tokens: int = 3000,
+                       store: Optional[AttachmentStore] = None, min_score: float = 0.05) -> str:
+    """
+    Extraits des pièces jointes d'un projet, choisis par requête, dans un budget de tokens.
+
+    Chaque morceau n'apparaît qu'une fois (sous la première requête qui le
+    retient). Les requêtes sont servies à tour de rôle, rang par rang, pour que
+    le budget ne soit pas consommé par la première section.
+
+    Args:
+        project: Projet dont les pièces jointes sont interrogées
+        queries: {titre: requête} (voir CDC_SECTION_QUERIES, BUDGET_QUERY)
+        k: Morceaux retenus au plus par requête
+        max_tokens: Taille maximale des extraits
+        store: Cache des documents (modèle d'embeddings compris)
+        min_score: Score cosinus en dessous duquel un morceau est ignoré
+
+    Returns:
+        Extraits formatés par titre, ou "" si le projet n'a pas de pièce jointe exploitable
+    """
+    attachments = getattr(project, "attachments", None)
+    if not attachments:
+        return ""
+    index = AttachmentIndex.from_attachments(attachments, store)
+    results = {title: index.search(query, k) for title, query in queries.items()}
+
+    selected: Dict[str, List[Chunk]] = {title: [] for title in queries}
+    seen = set()
+    used = 0
+    for rank in range(k):
+        for title in queries:
+            if rank >= len(results[title]):
+                continue
+            chunk, score = results[title][rank]
+            key = (chunk.source, chunk.index)
+            if score < min_score or key in seen:
+                continue
+            tokens = count_tokens(chunk.text) + 10
+            if used + tokens > max_tokens:
+                continue
+            seen.add(key)
+            selected[title].append(chunk)
+            used += tokens
+
+    blocks = []
+    for title, chunks in selected.items():
+        if chunks:
+            blocks.append(f"[{title}]\n" + "\n".join(
+                f"- ({chunk.source}, extrait {chunk.index + 1}) {chunk.text}" for chunk in chunks
+            ))
+    return "\n\n".join(blocks)
+
+
+def ingest_file(path: str, embedder: Any = None, cache_dir: str = DEFAULT_CACHE_DIR) -> Dict[str, Any]:
+    """
+    Fonction utilitaire : indexe un document et renvoie l'entrée à ajouter à project.attachments.
+
+    Args:
+        path: Chemin du document (.md, .txt, .docx, .pdf)
+        embedder: Modèle d'embeddings (HashingEmbedder par défaut)
+        cache_dir: Dossier du cache
+
+    Returns:
+        Métadonnées du document
+    """
+    return AttachmentStore(embedder, cache_dir).ingest(path)
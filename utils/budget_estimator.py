@@ -1,10 +1,17 @@
 import os
-from typing import Dict, List, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.exceptions import OutputParserException
 from pydantic import BaseModel, Field
-from models.Project import Project
+from models.Project import Project, SECTIONS
+from utils.rate_limiter import RateLimitedChatModel, RateLimiter
+from utils.context_packing import ContextPacker, PackingReport
+from utils.attachments import BUDGET_QUERY, AttachmentStore, attachment_context
+from utils.fingerprint import FingerprintCache, output_fingerprint
+from utils.metrics import PARSE_FAILURES, instrument_llm, record_cache
 
 
 class BudgetItem(BaseModel):
@@ -25,31 +32,115 @@ class BudgetEstimate(BaseModel):
     deliverables: List[str] = Field(description="Liste des livrables principaux identifiés")
 
 
+class DeliverableList(BaseModel):
+    """Liste des livrables d'un projet (première étape du mode fan-out)"""
+    deliverables: List[str] = Field(description="Liste des livrables à chiffrer, un élément par livrable")
+
+
+ESTIMATION_MODES = ("single", "fanout")
+
+
+# Analyseurs et prompts construits une seule fois : les instructions de format
+# (schéma JSON des modèles pydantic) coûtent cher à générer à chaque appel
+BUDGET_PARSER = PydanticOutputParser(pydantic_object=BudgetEstimate)
+ITEM_PARSER = PydanticOutputParser(pydantic_object=BudgetItem)
+LIST_PARSER = PydanticOutputParser(pydantic_object=DeliverableList)
+
+BUDGET_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """Tu es un expert en estimation budgétaire pour des projets digitaux et IT.
+Ta mission est d'analyser un projet et de fournir une estimation budgétaire détaillée.
+
+Pour chaque projet, tu dois:
+1. Identifier tous les livrables nécessaires (documents, développements, formations, etc.)
+2. Décomposer le travail en items budgétaires concrets
+3. Estimer le nombre d'heures pour chaque item
+4. Proposer un taux horaire adapté selon la complexité et l'expertise requise
+5. Calculer le coût total
+6. Proposer des arbitrages possibles pour optimiser le budget
+
+Sois réaliste et professionnel dans tes estimations. Prends en compte:
+- La complexité technique
+- Les contraintes du projet
+- Les risques identifiés
+- Les standards du marché français
+
+{format_instructions}"""),
+    ("user", """Analyse ce projet et estime son budget:
+
+{project_context}
+
+Fournis une estimation budgétaire complète et détaillée.""")
+]).partial(format_instructions=BUDGET_PARSER.get_format_instructions())
+ITEM_FORMAT_INSTRUCTIONS = ITEM_PARSER.get_format_instructions()
+LIST_FORMAT_INSTRUCTIONS = LIST_PARSER.get_format_instructions()
+
+
 class BudgetEstimator:
     """
     Service d'estimation budgétaire utilisant LangChain et OpenAI.
     Analyse un projet et génère une estimation détaillée des coûts.
     """
     
-    def __init__(self, api_key: str, model: str = "gpt-4o-mini"):
+    def __init__(self, api_key: str = None, model: str = "gpt-4o-mini", llm: Any = None, # type: ignore
+                 rate_limiter: RateLimiter = None, context_budget: Optional[int] = 8000, # type: ignore
+                 attachments_budget: Optional[int] = 1500, embedder: Any = None,
+                 fanout_workers: int = 8, fanout_attempts: int = 3, fanout_context_budget: Optional[int] = 2500,
+                 cache: Optional[FingerprintCache] = None):
         """
         Initialise l'estimateur budgétaire.
         
         Args:
             api_key: Clé API OpenAI (si None, utilise la variable d'environnement OPENAI_API_KEY)
             model: Modèle OpenAI à utiliser (gpt-4, gpt-3.5-turbo, etc.)
+            llm: Modèle de chat déjà construit (client partagé, utils.fake_llm.FakeChatModel…) ;
+                 si renseigné, api_key et model sont ignorés
+            rate_limiter: Limiteur RPM/TPM partagé (voir utils.rate_limiter) ; None = pas de limite
+            context_budget: Taille maximale du contenu du projet dans le prompt, en tokens
+                            (voir utils.context_packing) ; None = contenu envoyé tel quel
+            attachments_budget: Taille maximale des extraits de documents joints, en tokens
+                                (voir utils.attachments) ; None = documents ignorés
+            embedder: Modèle d'embeddings des documents joints (HashingEmbedder local par défaut)
+            fanout_workers: Appels simultanés en mode fan-out (un appel par livrable)
+            fanout_attempts: Tentatives par livrable en mode fan-out avant abandon
+            fanout_context_budget: Taille du contexte projet de chaque appel fan-out, en tokens
+            cache: Estimations déjà calculées, par empreinte des champs lus (voir
+                   utils.fingerprint) ; par défaut un cache propre à l'estimateur
         """
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-        if not self.api_key:
-            raise ValueError("OPENAI_API_KEY must be set in environment or passed as parameter")
+        if llm is not None:
+            self.llm = llm
+        else:
+            if not self.api_key:
+                raise ValueError("OPENAI_API_KEY must be set in environment or passed as parameter")
+            
+            self.llm = ChatOpenAI(
+                api_key=self.api_key, # type: ignore
+                model=model,
+                temperature=0.3  # Température basse pour des estimations plus cohérentes
+            )
         
-        self.llm = ChatOpenAI(
-            api_key=self.api_key, # type: ignore
-            model=model,
-            temperature=0.3  # Température basse pour des estimations plus cohérentes
-        )
+        self.llm = instrument_llm(self.llm)
+        if rate_limiter is not None:
+            self.llm = RateLimitedChatModel(self.llm, rate_limiter)
+        self.model = str(getattr(self.llm, "model_name", None) or model)
+        
+        self.parser = BUDGET_PARSER
+        self.item_parser = ITEM_PARSER
+        self.list_parser = LIST_PARSER
         
-        self.parser = PydanticOutputParser(pydantic_object=BudgetEstimate)
+        # Le budget et les notes ne font pas partie du contexte d'estimation
+        sections = [section for section in SECTIONS if section not in ("budget", "notes", "attachments")]
+        self.packer = ContextPacker(budget=context_budget, model=model, sections=sections) if context_budget else None
+        # Contexte plus court pour les appels par livrable, répété autant de fois qu'il y a de livrables
+        fanout_budget = min(filter(None, (context_budget, fanout_context_budget)), default=None)
+        self.item_packer = ContextPacker(budget=fanout_budget, model=model, sections=sections) if fanout_budget else None
+        self.fanout_workers = fanout_workers
+        self.fanout_attempts = fanout_attempts
+        self.cache = cache if cache is not None else FingerprintCache()
+        self._settings = {"model": self.model, "context_budget": context_budget, "attachments_budget": attachments_budget,
+                          "fanout_context_budget": fanout_context_budget}
+        self.attachments_budget = attachments_budget
+        self.attachment_store = AttachmentStore(embedder)
     
     def _project_to_context(self, project: Project) -> str:
         """
@@ -166,61 +257,177 @@ class BudgetEstimator:
         
         return "\n".join(context_parts)
     
-    def estimate_budget(self, project: Project) -> BudgetEstimate:
+    def _build_context(self, project: Project, packer: Optional[ContextPacker]) -> Tuple[str, Optional[PackingReport]]:
         """
-        Estime le budget d'un projet en analysant toutes ses composantes.
+        Contexte projet envoyé au LLM : contenu borné par `packer` et extraits des documents joints.
         
         Args:
             project: Objet Project à analyser
+            packer: Mise au budget à appliquer (None = contenu tel quel)
             
         Returns:
-            BudgetEstimate contenant les items, coûts et recommandations
+            Tuple (contexte textuel du projet, bilan de la mise au budget ou None) ; rien n'est gardé
+            sur l'estimateur, partagé entre threads (calculs anticipés, lots, service)
         """
+        # Borner la taille du contenu (doublons, sections peu prioritaires), sur une copie
+        report = None
+        if packer is not None:
+            project, report = packer.pack(project)
         
         # Créer le contexte du projet
         project_context = self._project_to_context(project)
         
-        # Créer le prompt
-        prompt_template = ChatPromptTemplate.from_messages([
-            ("system", """Tu es un expert en estimation budgétaire pour des projets digitaux et IT.
-Ta mission est d'analyser un projet et de fournir une estimation budgétaire détaillée.
-
-Pour chaque projet, tu dois:
-1. Identifier tous les livrables nécessaires (documents, développements, formations, etc.)
-2. Décomposer le travail en items budgétaires concrets
-3. Estimer le nombre d'heures pour chaque item
-4. Proposer un taux horaire adapté selon la complexité et l'expertise requise
-5. Calculer le coût total
-6. Proposer des arbitrages possibles pour optimiser le budget
-
-Sois réaliste et professionnel dans tes estimations. Prends en compte:
-- La complexité technique
-- Les contraintes du projet
-- Les risques identifiés
-- Les standards du marché français
-
-{format_instructions}"""),
-            ("user", """Analyse ce projet et estime son budget:
-
-{project_context}
-
-Fournis une estimation budgétaire complète et détaillée.""")
-        ])
+        # Extraits des documents joints utiles au chiffrage
+        if self.attachments_budget and project.attachments:
+            query = " ".join([BUDGET_QUERY, *map(str, project.deliverables), *map(str, project.scope.get("in") or [])])
+            excerpts = attachment_context(project, {"Documents client": query[:2000]}, k=6,
+                                          max_tokens=self.attachments_budget, store=self.attachment_store)
+            if excerpts:
+                project_context += "\n=== EXTRAITS DES DOCUMENTS CLIENT ===\n" + excerpts + "\n"
+        
+        return project_context, report
+    
+    def estimate(self, project: Project, mode: str = "single") -> BudgetEstimate:
+        """
+        Estime le budget d'un projet selon le mode choisi.
+        
+        Le résultat est mis en cache sous l'empreinte des seuls champs lus par
+        l'estimation (voir utils.fingerprint.BUDGET_FIELDS) : modifier les
+        notes, les contacts ou l'auteur réutilise l'estimation précédente sans
+        appel LLM. Une estimation fan-out incomplète (livrables non chiffrés)
+        n'est pas mise en cache : l'appel suivant retente ces livrables.
+        
+        Args:
+            project: Objet Project à analyser
+            mode: "single" (un seul appel, voir estimate_budget) ou "fanout"
+                  (un appel par livrable, voir estimate_budget_fanout)
+            
+        Returns:
+            BudgetEstimate contenant les items, coûts et recommandations
+        """
+        if mode not in ESTIMATION_MODES:
+            raise ValueError(f"Unknown estimation mode: {mode} (expected one of {', '.join(ESTIMATION_MODES)})")
+        key = output_fingerprint(project, "budget", mode=mode, **self._settings)
+        cached = self.cache.get(key)
+        record_cache("budget", cached is not None)
+        if cached is not None:
+            return cached.model_copy(deep=True)
+        budget_estimate = self.estimate_budget(project) if mode == "single" else self.estimate_budget_fanout(project)
+        if mode == "single" or not unestimated_deliverables(budget_estimate):
+            self.cache.put(key, budget_estimate.model_copy(deep=True))
+        return budget_estimate
+    
+    def estimate_budget(self, project: Project) -> BudgetEstimate:
+        """
+        Estime le budget d'un projet en analysant toutes ses composantes.
+        
+        Args:
+            project: Objet Project à analyser
+            
+        Returns:
+            BudgetEstimate contenant les items, coûts et recommandations
+        """
+        project_context, _ = self._build_context(project, self.packer)
+        
         
         # Formatter le prompt
-        messages = prompt_template.format_messages(
-            project_context=project_context,
-            format_instructions=self.parser.get_format_instructions()
-        )
+        messages = BUDGET_PROMPT.format_messages(project_context=project_context)
         
         # Appeler le LLM
         response = self.llm.invoke(messages)
         
         # Parser la réponse
-        budget_estimate = self.parser.parse(response.content) # type: ignore
+        try:
+            budget_estimate = self.parser.parse(response.content) # type: ignore
+        except OutputParserException:
+            PARSE_FAILURES.inc(parser="budget")
+            raise
         
         return budget_estimate
     
+    def estimate_budget_fanout(self, project: Project) -> BudgetEstimate:
+        """
+        Estime le budget livrable par livrable, avec un petit appel structuré par livrable.
+        
+        Les livrables viennent de project.deliverables (ou d'un court appel
+        préalable s'ils ne sont pas renseignés) ; leurs estimations sont
+        demandées en parallèle, et un livrable dont la réponse est invalide
+        est relancé seul. Les totaux sont calculés localement (coût = heures ×
+        taux), sans dépendre de l'arithmétique du modèle. Les livrables non
+        chiffrés après fanout_attempts tentatives sont signalés dans les
+        arbitrages (voir aussi unestimated_deliverables).
+        
+        Args:
+            project: Objet Project à analyser
+            
+        Returns:
+            BudgetEstimate contenant les items, coûts et recommandations
+        """
+        project_context, _ = self._build_context(project, self.item_packer)
+        deliverables = [str(d) for d in project.deliverables if str(d).strip()] or self._list_deliverables(project_context)
+        if not deliverables:
+            raise ValueError("No deliverable to estimate")
+        
+        with ThreadPoolExecutor(max_workers=min(self.fanout_workers, len(deliverables))) as pool:
+            results = list(pool.map(lambda d: self._estimate_item(project_context, d, deliverables), deliverables))
+        
+        items = [item for item in results if item is not None]
+        failed = [d for d, item in zip(deliverables, results) if item is None]
+        if not items:
+            raise ValueError(f"Budget estimation failed for every deliverable ({len(deliverables)})")
+        
+        return BudgetEstimate(
+            items=items,
+            total_cost=round(sum(item.cost for item in items), 2),
+            total_hours=sum(item.estimated_hours for item in items),
+            tradeoffs=_fanout_tradeoffs(items, failed),
+            deliverables=deliverables
+        )
+    
+    def _list_deliverables(self, project_context: str) -> List[str]:
+        """Demande la liste des livrables au LLM (un seul appel court, relancé si la réponse est invalide)."""
+        messages = [
+            ("system", "Tu es un expert en estimation budgétaire pour des projets digitaux et IT. "
+                       "Liste les livrables à chiffrer pour ce projet (documents, développements, "
+                       "contenus, formations…), de 3 à 12 éléments, sans les chiffrer.\n\n"
+                       + LIST_FORMAT_INSTRUCTIONS),
+            ("user", project_context),
+        ]
+        for attempt in range(self.fanout_attempts):
+            try:
+                return self.list_parser.parse(self.llm.invoke(messages).content).deliverables  # type: ignore
+            except OutputParserException:
+                PARSE_FAILURES.inc(parser="deliverables")
+                if attempt == self.fanout_attempts - 1:
+                    raise
+        return []
+    
+    def _estimate_item(self, project_context: str, deliverable: str, deliverables: List[str]) -> Optional[BudgetItem]:
+        """Estime un livrable ; None si aucune des fanout_attempts réponses n'est exploitable."""
+        others = [d for d in deliverables if d != deliverable]
+        messages = [
+            ("system", "Tu es un expert en estimation budgétaire pour des projets digitaux et IT. "
+                       "Estime UNIQUEMENT le livrable demandé (heures, taux horaire du marché français, "
+                       "coût), sans inclure le travail des autres livrables du projet.\n\n"
+                       + ITEM_FORMAT_INSTRUCTIONS),
+            ("user", f"{project_context}\n"
+                     + (f"Autres livrables (chiffrés séparément) : {'; '.join(others)}\n\n" if others else "\n")
+                     + f"Livrable à estimer : {deliverable}"),
+        ]
+        for _ in range(self.fanout_attempts):
+            try:
+                item = self.item_parser.parse(self.llm.invoke(messages).content)  # type: ignore
+            except OutputParserException:
+                PARSE_FAILURES.inc(parser="budget_item")
+                continue
+            if item.estimated_hours < 0 or item.hourly_rate < 0:
+                PARSE_FAILURES.inc(parser="budget_item")
+                continue
+            # Le coût est recalculé : seules les heures et le taux sont repris du modèle
+            return item.model_copy(update={"name": deliverable,
+                                           "cost": round(item.estimated_hours * item.hourly_rate, 2)})
+        return None
+    
     def apply_budget_to_project(self, project: Project, budget_estimate: BudgetEstimate) -> None:
         """
         Applique l'estimation budgétaire à l'objet Project.
@@ -244,21 +451,38 @@ Fournis une estimation budgétaire complète et détaillée.""")
         }
 
 
-def estimate_project_budget(project: Project, api_key: str) -> Dict[str, Any]:
+def estimate_project_budget(project: Project, api_key: str = None, llm: Any = None, # type: ignore
+                            rate_limiter: RateLimiter = None, mode: str = "single") -> Dict[str, Any]: # type: ignore
     """
     Fonction utilitaire pour estimer rapidement le budget d'un projet.
     
     Args:
         project: Objet Project à analyser
         api_key: Clé API OpenAI (optionnel)
+        llm: Modèle de chat à utiliser à la place de ChatOpenAI (optionnel)
+        rate_limiter: Limiteur RPM/TPM partagé (optionnel)
+        mode: "single" (un appel) ou "fanout" (un appel par livrable, totaux calculés localement)
         
     Returns:
         Dictionnaire contenant l'estimation et les détails
     """
-    estimator = BudgetEstimator(api_key=api_key)
-    budget_estimate = estimator.estimate_budget(project)
+    estimator = BudgetEstimator(api_key=api_key, llm=llm, rate_limiter=rate_limiter)
+    budget_estimate = estimator.estimate(project, mode)
     estimator.apply_budget_to_project(project, budget_estimate)
     
+    return budget_to_dict(budget_estimate)
+
+
+def budget_to_dict(budget_estimate: BudgetEstimate) -> Dict[str, Any]:
+    """
+    Convertit une estimation en dictionnaire sérialisable (résultat de estimate_project_budget).
+    
+    Args:
+        budget_estimate: Estimation produite par BudgetEstimator.estimate_budget
+        
+    Returns:
+        Dictionnaire {"total_cost", "total_hours", "items", "deliverables", "tradeoffs"}
+    """
     return {
         "total_cost": budget_estimate.total_cost,
         "total_hours": budget_estimate.total_hours,
@@ -266,3 +490,34 @@ def estimate_project_budget(project: Project, api_key: str) -> Dict[str, Any]:
         "deliverables": budget_estimate.deliverables,
         "tradeoffs": budget_estimate.tradeoffs
     }
+
+
+def unestimated_deliverables(budget_estimate: BudgetEstimate) -> List[str]:
+    """
+    Livrables d'une estimation fan-out restés sans poste (réponse invalide après plusieurs tentatives).
+
+    En mode fan-out, chaque poste porte le nom exact de son livrable ; en mode
+    "single", les noms viennent du modèle et ne se comparent pas.
+
+    Args:
+        budget_estimate: Résultat de BudgetEstimator.estimate_budget_fanout
+
+    Returns:
+        Livrables non chiffrés, dans l'ordre de budget_estimate.deliverables
+    """
+    estimated = {item.name for item in budget_estimate.items}
+    return [deliverable for deliverable in budget_estimate.deliverables if deliverable not in estimated]
+
+
+def _fanout_tradeoffs(items: List[BudgetItem], failed: List[str]) -> str:
+    """Arbitrages du mode fan-out, déduits localement des postes les plus coûteux."""
+    total = sum(item.cost for item in items) or 1
+    heaviest = sorted(items, key=lambda item: item.cost, reverse=True)[:3]
+    parts = [
+        "Postes les plus coûteux : " + ", ".join(
+            f"{item.name} ({item.cost:,.2f} €, {item.cost / total:.0%})" for item in heaviest
+        ) + ". Les phaser ou en réduire le périmètre est le levier le plus efficace."
+    ]
+    if failed:
+        parts.append(f"Non chiffrés (réponse invalide après plusieurs tentatives) : {'; '.join(failed)}.")
+    return " ".join(parts)
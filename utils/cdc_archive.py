@@ -0,0 +1,413 @@
+"""
+Archive compressée des CDC générés (zstandard + dictionnaire entraîné).
+
+Les CDC partagent énormément de texte (titres de sections, clause juridique,
+checklist, squelettes Mermaid). Un dictionnaire zstd entraîné sur notre propre
+corpus permet de compresser chaque document indépendamment tout en profitant
+de ce texte commun, ce qui garde l'accès aléatoire à un CDC isolé.
+
+Format du fichier (little-endian) :
+    en-tête   : MAGIC (4) | version (1) | type de dictionnaire (1) | taille du dictionnaire (4)
+    dictionnaire zstd
+    frames zstd, une par CDC
+    index     : JSON {cdc_id: [offset, taille compressée, taille brute]}
+    pied      : offset de l'index (8) | taille de l'index (4) | MAGIC (4)
+
+Les nouveaux CDC sont ajoutés après le dernier pied, puis flush() écrit un
+nouvel index et un nouveau pied à la suite : l'index précédent n'est jamais
+écrasé. Après une écriture interrompue, l'ouverture retient le dernier pied
+complet et ignore ce qui le suit. Les anciens index et les CDC remplacés
+restent dans le fichier jusqu'au prochain compact().
+
+Usage CLI:
+    python -m utils.cdc_archive build archive.cdcz CDC_*.md
+    python -m utils.cdc_archive list archive.cdcz
+    python -m utils.cdc_archive get archive.cdcz CDC_20260115_100000
+    python -m utils.cdc_archive compact archive.cdcz
+"""
+import argparse
+import codecs
+import io
+import mmap
+import os
+import struct
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import orjson
+import zstandard
+
+
+MAGIC = b"CDCZ"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sBBI")
+_FOOTER = struct.Struct("<QI4s")
+
+DEFAULT_DICT_SIZE = 112_640  # taille par défaut de zstd --train
+DEFAULT_LEVEL = 19
+# En dessous de ce nombre d'échantillons, l'entraînement zstd échoue ou donne
+# un dictionnaire médiocre : on utilise alors le corpus brut comme dictionnaire.
+MIN_TRAINING_SAMPLES = 8
+# close() compacte l'archive quand l'espace mort dépasse ce seuil et les données utiles
+AUTO_COMPACT_BYTES = 1 << 20
+
+
+def train_dictionary(samples: Iterable[str], dict_size: int = DEFAULT_DICT_SIZE) -> zstandard.ZstdCompressionDict:
+    """
+    Entraîne un dictionnaire zstd sur un corpus de CDC.
+
+    Args:
+        samples: Contenus markdown de CDC existants
+        dict_size: Taille maximale du dictionnaire en octets
+
+    Returns:
+        Dictionnaire zstd utilisable pour compresser de nouveaux CDC
+    """
+    encoded = [sample.encode("utf-8") for sample in samples]
+    if len(encoded) >= MIN_TRAINING_SAMPLES:
+        try:
+            return zstandard.train_dictionary(dict_size, encoded)
+        except zstandard.ZstdError:
+            pass
+    # Petit corpus : le texte brut sert directement de dictionnaire
+    raw = b"".join(encoded)[-dict_size:]
+    return zstandard.ZstdCompressionDict(raw, dict_type=zstandard.DICT_TYPE_RAWCONTENT)
+
+
+def _write_header(f, dictionary: zstandard.ZstdCompressionDict) -> None:
+    dict_bytes = dictionary.as_bytes()
+    dict_type = 1 if dictionary.dict_id() == 0 else 0  # dict_id 0 = contenu brut
+    f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, dict_type, len(dict_bytes)))
+    f.write(dict_bytes)
+
+
+class CDCArchive:
+    """
+    Archive de CDC compressés avec accès aléatoire par identifiant.
+
+    L'index est gardé en mémoire et écrit en fin de fichier par flush() ; les
+    nouveaux CDC sont ajoutés à la suite du dernier index, sans recopier l'archive.
+    """
+
+    def __init__(self, path: str, dictionary: Optional[zstandard.ZstdCompressionDict] = None,
+                 level: int = DEFAULT_LEVEL):
+        """
+        Ouvre une archive existante ou en crée une nouvelle.
+
+        Args:
+            path: Chemin du fichier d'archive
+            dictionary: Dictionnaire à utiliser pour une nouvelle archive
+                        (ignoré si l'archive existe déjà : son dictionnaire est relu)
+            level: Niveau de compression zstd pour les nouveaux CDC
+        """
+        self.path = path
+        self.level = level
+        self._index: Dict[str, List[int]] = {}
+        self._dirty = False
+        # Taille du dernier index écrit (pied compris)
+        self._index_bytes = 0
+        # Nouvelle archive : écrite dans un fichier temporaire jusqu'au premier flush()
+        self._tmp_path: Optional[str] = None
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self._file = open(path, "r+b")
+            self._read_existing()
+        else:
+            if dictionary is None:
+                raise ValueError("A dictionary is required to create a new archive (see train_dictionary)")
+            fd, self._tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+            self._file = os.fdopen(fd, "w+b")
+            self.dictionary = dictionary
+            _write_header(self._file, dictionary)
+            self._data_start = self._data_end = self._file.tell()
+            self._dirty = True
+
+        self._compressor = zstandard.ZstdCompressor(level=level, dict_data=self.dictionary)
+        self._decompressor = zstandard.ZstdDecompressor(dict_data=self.dictionary)
+
+    def _read_existing(self) -> None:
+        magic, version, dict_type, dict_len = _HEADER.unpack(self._file.read(_HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a CDC archive")
+        if version > FORMAT_VERSION:
+            raise ValueError(f"Unsupported CDC archive version {version}")
+
+        self.dictionary = zstandard.ZstdCompressionDict(
+            self._file.read(dict_len),
+            dict_type=zstandard.DICT_TYPE_RAWCONTENT if dict_type else zstandard.DICT_TYPE_AUTO
+        )
+        self._data_start = self._file.tell()
+
+        footer = self._last_footer()
+        if footer is None:
+            raise ValueError(f"{self.path} is truncated (missing index)")
+        self._index, self._index_bytes, self._data_end = footer
+
+    def _last_footer(self) -> Optional[Tuple[Dict[str, List[int]], int, int]]:
+        """
+        Dernier pied complet : (index, taille de l'index et du pied, fin du pied), ou None.
+
+        C'est normalement la fin du fichier ; après une écriture interrompue, il
+        est recherché en remontant depuis la fin.
+        """
+        with mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            end = len(data)
+            while True:
+                position = data.rfind(MAGIC, self._data_start, end)
+                if position < 0:
+                    return None
+                footer_end = position + len(MAGIC)
+                footer_start = footer_end - _FOOTER.size
+                end = footer_end - 1
+                if footer_start < self._data_start:
+                    continue
+                index_offset, index_len, _ = _FOOTER.unpack(data[footer_start:footer_end])
+                if index_offset < self._data_start or index_offset + index_len != footer_start:
+                    continue
+                try:
+                    index = orjson.loads(data[index_offset:footer_start])
+                except orjson.JSONDecodeError:
+                    continue
+                if isinstance(index, dict) and all(entry[0] + entry[1] <= index_offset for entry in index.values()):
+                    return index, index_len + _FOOTER.size, footer_end
+
+    def add(self, cdc_id: str, content: str) -> None:
+        """
+        Ajoute (ou remplace) un CDC dans l'archive.
+
+        Args:
+            cdc_id: Identifiant du CDC (ex: nom du fichier sans extension)
+            content: Contenu markdown du CDC
+        """
+        raw = content.encode("utf-8")
+        frame = self._compressor.compress(raw)
+        self._file.seek(self._data_end)
+        self._file.write(frame)
+        self._index[cdc_id] = [self._data_end, len(frame), len(raw)]
+        self._data_end += len(frame)
+        self._dirty = True
+
+    def get(self, cdc_id: str) -> str:
+        """
+        Relit un CDC complet.
+
+        Args:
+            cdc_id: Identifiant du CDC
+
+        Returns:
+            Contenu markdown du CDC
+        """
+        offset, size, raw_size = self._index[cdc_id]
+        self._file.seek(offset)
+        frame = self._file.read(size)
+        return self._decompressor.decompress(frame, max_output_size=raw_size).decode("utf-8")
+
+    def stream(self, cdc_id: str, chunk_size: int = 16384) -> Iterator[str]:
+        """
+        Décompresse un CDC par morceaux, sans le charger entièrement en mémoire.
+
+        Args:
+            cdc_id: Identifiant du CDC
+            chunk_size: Taille des blocs décompressés en octets
+
+        Yields:
+            Morceaux successifs du contenu markdown
+        """
+        offset, size, _ = self._index[cdc_id]
+        # Seule la frame compressée (quelques Ko) est lue d'un bloc ; le texte
+        # décompressé est produit par morceaux
+        self._file.seek(offset)
+        source = io.BytesIO(self._file.read(size))
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        with self._decompressor.stream_reader(source) as reader:
+            while True:
+                chunk = reader.read(chunk_size)
+                if not chunk:
+                    break
+                text = decoder.decode(chunk)
+                if text:
+                    yield text
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+    def ids(self) -> List[str]:
+        """Retourne les identifiants des CDC de l'archive."""
+        return list(self._index)
+
+    def stats(self) -> Dict[str, int]:
+        """Retourne le nombre de CDC, les tailles brute/compressée cumulées et l'espace récupérable par compact()."""
+        compressed = sum(entry[1] for entry in self._index.values())
+        # Tant que l'index en mémoire n'est pas écrit, le dernier index du fichier est déjà périmé
+        current_index = 0 if self._dirty else self._index_bytes
+        return {
+            "documents": len(self._index),
+            "raw_bytes": sum(entry[2] for entry in self._index.values()),
+            "compressed_bytes": compressed,
+            "dictionary_bytes": len(self.dictionary.as_bytes()),
+            "dead_bytes": self._data_end - self._data_start - compressed - current_index,
+        }
+
+    def flush(self) -> None:
+        """Écrit l'index et le pied de fichier à la suite des données, sans toucher au pied précédent."""
+        if not self._dirty:
+            return
+        index = orjson.dumps(self._index)
+        self._file.seek(self._data_end)
+        self._file.write(index)
+        self._file.write(_FOOTER.pack(self._data_end, len(index), MAGIC))
+        # Retire les restes d'une écriture interrompue
+        self._file.truncate()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._data_end = self._file.tell()
+        self._index_bytes = len(index) + _FOOTER.size
+        self._dirty = False
+        if self._tmp_path is not None:
+            # Nouvelle archive : elle n'apparaît qu'une fois complète (fermée avant le renommage, requis sous Windows)
+            self._file.close()
+            os.replace(self._tmp_path, self.path)
+            self._tmp_path = None
+            self._file = open(self.path, "r+b")
+
+    def compact(self) -> None:
+        """
+        Réécrit l'archive sans les CDC remplacés ni les anciens index.
+
+        La copie est écrite dans un fichier temporaire qui ne remplace
+        l'archive qu'une fois complète.
+        """
+        self.flush()
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w+b") as tmp:
+                _write_header(tmp, self.dictionary)
+                index: Dict[str, List[int]] = {}
+                for cdc_id, (offset, size, raw_size) in sorted(self._index.items(), key=lambda item: item[1][0]):
+                    self._file.seek(offset)
+                    index[cdc_id] = [tmp.tell(), size, raw_size]
+                    tmp.write(self._file.read(size))
+                index_offset = tmp.tell()
+                index_bytes = orjson.dumps(index)
+                tmp.write(index_bytes)
+                tmp.write(_FOOTER.pack(index_offset, len(index_bytes), MAGIC))
+                tmp.flush()
+                os.fsync(tmp.fileno())
+                data_end = tmp.tell()
+            self._file.close()
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        finally:
+            if self._file.closed:
+                self._file = open(self.path, "r+b")
+        self._index = index
+        self._index_bytes = len(index_bytes) + _FOOTER.size
+        self._data_end = data_end
+
+    def close(self) -> None:
+        self.flush()
+        stats = self.stats()
+        if stats["dead_bytes"] > max(AUTO_COMPACT_BYTES, stats["compressed_bytes"]):
+            self.compact()
+        self._file.close()
+
+    def __contains__(self, cdc_id: str) -> bool:
+        return cdc_id in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __enter__(self) -> "CDCArchive":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @classmethod
+    def build(cls, path: str, documents: Dict[str, str], dict_size: int = DEFAULT_DICT_SIZE,
+              level: int = DEFAULT_LEVEL) -> "CDCArchive":
+        """
+        Crée une archive complète : entraîne le dictionnaire sur les documents puis les ajoute.
+
+        Args:
+            path: Chemin du fichier d'archive (écrasé s'il existe)
+            documents: Dictionnaire {cdc_id: contenu markdown}
+            dict_size: Taille maximale du dictionnaire
+            level: Niveau de compression zstd
+
+        Returns:
+            L'archive ouverte (à fermer par l'appelant)
+        """
+        if os.path.exists(path):
+            os.remove(path)
+        archive = cls(path, dictionary=train_dictionary(documents.values(), dict_size), level=level)
+        for cdc_id, content in documents.items():
+            archive.add(cdc_id, content)
+        archive.flush()
+        return archive
+
+
+def _cdc_id_from_path(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Archive zstandard des CDC générés")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="crée une archive depuis des fichiers .md")
+    build.add_argument("archive")
+    build.add_argument("files", nargs="+")
+    build.add_argument("--dict-size", type=int, default=DEFAULT_DICT_SIZE)
+
+    add = sub.add_parser("add", help="ajoute des fichiers .md à une archive existante")
+    add.add_argument("archive")
+    add.add_argument("files", nargs="+")
+
+    list_ = sub.add_parser("list", help="liste les CDC de l'archive")
+    list_.add_argument("archive")
+
+    get = sub.add_parser("get", help="affiche un CDC de l'archive")
+    get.add_argument("archive")
+    get.add_argument("cdc_id")
+
+    compact = sub.add_parser("compact", help="retire les CDC remplacés et les anciens index")
+    compact.add_argument("archive")
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        documents = {}
+        for file_path in args.files:
+            with open(file_path, encoding="utf-8") as f:
+                documents[_cdc_id_from_path(file_path)] = f.read()
+        with CDCArchive.build(args.archive, documents, dict_size=args.dict_size) as archive:
+            stats = archive.stats()
+        ratio = stats["raw_bytes"] / max(1, stats["compressed_bytes"] + stats["dictionary_bytes"])
+        print(f"✅ {stats['documents']} CDC archivés : {stats['raw_bytes']:,} → "
+              f"{stats['compressed_bytes'] + stats['dictionary_bytes']:,} octets (×{ratio:.1f})")
+    elif args.command == "add":
+        with CDCArchive(args.archive) as archive:
+            for file_path in args.files:
+                with open(file_path, encoding="utf-8") as f:
+                    archive.add(_cdc_id_from_path(file_path), f.read())
+    elif args.command == "list":
+        with CDCArchive(args.archive) as archive:
+            for cdc_id in archive.ids():
+                print(cdc_id)
+    elif args.command == "get":
+        with CDCArchive(args.archive) as archive:
+            for chunk in archive.stream(args.cdc_id):
+                print(chunk, end="")
+    elif args.command == "compact":
+        with CDCArchive(args.archive) as archive:
+            before = os.path.getsize(args.archive)
+            archive.compact()
+        print(f"✅ {before:,} → {os.path.getsize(args.archive):,} octets")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,515 @@
+"""
+Export des CDC markdown en HTML, PDF et DOCX, en parallèle sur tous les cœurs.
+
+- HTML : conversion markdown locale (sans dépendance), diagrammes Mermaid
+  rendus en SVG par mermaid-cli (`mmdc`) quand il est installé, sinon par
+  une copie locale de mermaid.js intégrée au document (variable
+  CDC_MERMAID_JS), sinon laissés sous forme de code source. Aucune
+  ressource réseau : les exports s'affichent et s'impriment hors ligne.
+- PDF : impression du HTML par wkhtmltopdf, weasyprint ou Chromium headless.
+- DOCX : conversion du HTML par pandoc (diagrammes en PNG via `mmdc`).
+
+Chaque export est mis en cache par format, sous une clé dérivée du hash du
+contenu : ré-exporter un CDC inchangé ne coûte qu'une copie de fichier.
+
+Usage CLI:
+    python -m utils.cdc_exporter CDC_*.md --formats html pdf docx --out exports/
+    python -m utils.cdc_exporter --archive cdc.cdcz --formats pdf -j 8
+    python batch.py projets/*.msgpack --export pdf docx
+"""
+import argparse
+import base64
+import hashlib
+import html
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.metrics import record_cache
+from utils.utils import atomic_write
+
+
+# Incrémenter pour invalider le cache quand le rendu change
+EXPORTER_VERSION = "3"
+FORMATS = ("html", "pdf", "docx")
+DEFAULT_CACHE_DIR = ".cdc_export_cache"
+# Chemin d'un mermaid.min.js local (ex: node_modules/mermaid/dist/mermaid.min.js), utilisé sans mmdc
+MERMAID_JS_ENV = "CDC_MERMAID_JS"
+# Schémas de liens conservés ; les autres (javascript:, data:…) sont rendus en texte
+_SAFE_LINK_RE = re.compile(r"^(https?:|mailto:|#)", re.IGNORECASE)
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="fr">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: "Segoe UI", Helvetica, Arial, sans-serif; max-width: 900px; margin: 2em auto; line-height: 1.5; color: #222; }}
+h1, h2, h3 {{ color: #1a3c6e; }}
+h2 {{ border-bottom: 1px solid #ccd; padding-bottom: .2em; }}
+table {{ border-collapse: collapse; margin: 1em 0; }}
+th, td {{ border: 1px solid #bbb; padding: .35em .6em; vertical-align: top; }}
+th {{ background: #eef2f8; }}
+pre {{ background: #f6f8fa; padding: .8em; overflow-x: auto; }}
+code {{ font-family: Consolas, monospace; }}
+blockquote {{ border-left: 4px solid #ccd; margin: 0; padding-left: 1em; color: #555; }}
+.mermaid-diagram {{ text-align: center; margin: 1em 0; page-break-inside: avoid; }}
+</style>
+</head>
+<body>
+{body}
+{scripts}
+</body>
+</html>
+"""
+
+
+class ExportError(RuntimeError):
+    """Export impossible (outil externe absent ou en échec)."""
+
+
+@dataclass
+class ExportResult:
+    source: str
+    fmt: str
+    output_path: Optional[str]
+    cached: bool
+    seconds: float
+    error: Optional[str] = None
+
+
+# --------------------------------------------------------------------------
+# Mermaid
+# --------------------------------------------------------------------------
+
+def render_mermaid(code: str, fmt: str, cache_dir: str) -> Optional[bytes]:
+    """
+    Rend un diagramme Mermaid avec mermaid-cli (`mmdc`), avec cache sur disque.
+
+    Args:
+        code: Code du diagramme
+        fmt: "svg" ou "png"
+        cache_dir: Dossier de cache
+
+    Returns:
+        Contenu de l'image, ou None si mmdc n'est pas installé ou échoue
+    """
+    mmdc = shutil.which("mmdc")
+    if mmdc is None:
+        return None
+
+    key = hashlib.sha256(f"mermaid:{fmt}:{code}".encode("utf-8")).hexdigest()
+    cached = os.path.join(cache_dir, "mermaid", f"{key}.{fmt}")
+    if os.path.exists(cached):
+        with open(cached, "rb") as f:
+            return f.read()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "diagram.mmd")
+        target = os.path.join(tmp, f"diagram.{fmt}")
+        with open(source, "w", encoding="utf-8") as f:
+            f.write(code)
+        completed = subprocess.run(
+            [mmdc, "-i", source, "-o", target, "-b", "white", "--quiet"],
+            capture_output=True, timeout=120
+        )
+        if completed.returncode != 0 or not os.path.exists(target):
+            return None
+        with open(target, "rb") as f:
+            image = f.read()
+
+    os.makedirs(os.path.dirname(cached), exist_ok=True)
+    atomic_write(cached, image)
+    return image
+
+
+# --------------------------------------------------------------------------
+# Markdown -> HTML
+# --------------------------------------------------------------------------
+
+_LIST_ITEM_RE = re.compile(r"^(\s*)([-*+]|\d+[.)])\s+(.*)$")
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_TABLE_SEPARATOR_RE = re.compile(r"^\s*\|?\s*:?-{2,}:?\s*(\|\s*:?-{2,}:?\s*)*\|?\s*$")
+_TASK_RE = re.compile(r"^\[([ xX])\](?=\s|$)")
+
+
+def _render_inline(text: str) -> str:
+    codes: List[str] = []
+
+    def keep_code(match: re.Match) -> str:
+        codes.append(f"<code>{html.escape(match.group(1))}</code>")
+        return f"\x00{len(codes) - 1}\x00"
+
+    text = re.sub(r"`([^`]+)`", keep_code, text)
+    text = html.escape(text, quote=False)
+    text = re.sub(r"\*\*(.+?)\*\*|__(.+?)__", lambda m: f"<strong>{m.group(1) or m.group(2)}</strong>", text)
+    text = re.sub(r"(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?!\*)|(?<!\w)_(?!\s)(.+?)(?<!\s)_(?!\w)",
+                  lambda m: f"<em>{m.group(1) or m.group(2)}</em>", text)
+    def link(match: re.Match) -> str:
+        # Contenu produit par le LLM : pas de lien vers un schéma exécutable
+        if not _SAFE_LINK_RE.match(match.group(2)):
+            return match.group(1)
+        # Texte déjà échappé : seuls les guillemets restent à protéger dans l'attribut
+        href = match.group(2).replace('"', "&quot;")
+        return f'<a href="{href}">{match.group(1)}</a>'
+
+    text = re.sub(r"\[([^\]]+)\]\(([^)\s]+)\)", link, text)
+    return re.sub(r"\x00(\d+)\x00", lambda m: codes[int(m.group(1))], text)
+
+
+def _split_table_row(line: str) -> List[str]:
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|"):
+        line = line[:-1]
+    return [cell.strip() for cell in line.split("|")]
+
+
+def markdown_to_html(markdown: str, mermaid_renderer=None) -> Tuple[str, bool]:
+    """
+    Convertit le markdown d'un CDC en HTML (sous-ensemble utilisé par les CDC :
+    titres, paragraphes, listes imbriquées, tableaux, citations, code, Mermaid).
+
+    Args:
+        markdown: Contenu du CDC
+        mermaid_renderer: Fonction code -> balisage HTML du diagramme, ou None
+                          pour laisser le code source (rendu par mermaid.js s'il est intégré)
+
+    Returns:
+        Tuple (corps HTML, True si des diagrammes restent à rendre par mermaid.js)
+    """
+    lines = markdown.splitlines()
+    out: List[str] = []
+    paragraph: List[str] = []
+    list_stack: List[Tuple[int, str]] = []  # (indentation, "ul"/"ol")
+    needs_mermaid_js = False
+
+    def flush_paragraph():
+        if paragraph:
+            out.append(f"<p>{_render_inline(' '.join(paragraph))}</p>")
+            paragraph.clear()
+
+    def close_lists(indent: int = -1):
+        while list_stack and list_stack[-1][0] > indent:
+            out.append(f"</li></{list_stack.pop()[1]}>")
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+
+        if stripped.startswith("```"):
+            flush_paragraph()
+            close_lists()
+            lang = stripped[3:].strip().lower()
+            block = []
+            i += 1
+            while i < len(lines) and not lines[i].strip().startswith("```"):
+                block.append(lines[i])
+                i += 1
+            code = "\n".join(block)
+            if lang == "mermaid":
+                rendered = mermaid_renderer(code) if mermaid_renderer else None
+                if rendered is None:
+                    needs_mermaid_js = True
+                    rendered = f'<pre class="mermaid">{html.escape(code)}</pre>'
+                out.append(f'<div class="mermaid-diagram">{rendered}</div>')
+            else:
+                out.append(f"<pre><code>{html.escape(code)}</code></pre>")
+            i += 1
+            continue
+
+        if not stripped:
+            flush_paragraph()
+            i += 1
+            continue
+
+        heading = _HEADING_RE.match(stripped)
+        if heading:
+            flush_paragraph()
+            close_lists()
+            level = len(heading.group(1))
+            out.append(f"<h{level}>{_render_inline(heading.group(2))}</h{level}>")
+            i += 1
+            continue
+
+        if re.match(r"^(-{3,}|\*{3,}|_{3,})$", stripped):
+            flush_paragraph()
+            close_lists()
+            out.append("<hr>")
+            i += 1
+            continue
+
+        if "|" in stripped and i + 1 < len(lines) and _TABLE_SEPARATOR_RE.match(lines[i + 1]):
+            flush_paragraph()
+            close_lists()
+            header = _split_table_row(stripped)
+            out.append("<table><thead><tr>" + "".join(f"<th>{_render_inline(c)}</th>" for c in header) + "</tr></thead><tbody>")
+            i += 2
+            while i < len(lines) and "|" in lines[i] and lines[i].strip():
+                cells = _split_table_row(lines[i])
+                out.append("<tr>" + "".join(f"<td>{_render_inline(c)}</td>" for c in cells) + "</tr>")
+                i += 1
+            out.append("</tbody></table>")
+            continue
+
+        if stripped.startswith(">"):
+            flush_paragraph()
+            close_lists()
+            quote = []
+            while i < len(lines) and lines[i].strip().startswith(">"):
+                quote.append(lines[i].strip()[1:].strip())
+                i += 1
+            out.append(f"<blockquote><p>{_render_inline(' '.join(quote))}</p></blockquote>")
+            continue
+
+        item = _LIST_ITEM_RE.match(line)
+        if item:
+            flush_paragraph()
+            indent = len(item.group(1).expandtabs(4))
+            kind = "ol" if item.group(2)[0].isdigit() else "ul"
+            close_lists(indent)
+            if list_stack and list_stack[-1][0] == indent:
+                if list_stack[-1][1] != kind:
+                    out.append(f"</li></{list_stack.pop()[1]}>")
+                    out.append(f"<{kind}><li>")
+                    list_stack.append((indent, kind))
+                else:
+                    out.append("</li><li>")
+            else:
+                out.append(f"<{kind}><li>")
+                list_stack.append((indent, kind))
+            # Case à cocher uniquement en tête d'élément ("- [ ] tâche", "- [x] tâche")
+            out.append(_TASK_RE.sub(lambda m: "☐" if m.group(1) == " " else "☑", _render_inline(item.group(3))))
+            i += 1
+            continue
+
+        if list_stack and line.startswith(" "):
+            # Suite d'un élément de liste sur plusieurs lignes
+            out.append(" " + _render_inline(stripped))
+            i += 1
+            continue
+
+        close_lists()
+        paragraph.append(stripped)
+        i += 1
+
+    flush_paragraph()
+    close_lists()
+    return "\n".join(out), needs_mermaid_js
+
+
+def _document_title(markdown: str) -> str:
+    for line in markdown.splitlines():
+        if line.startswith("# "):
+            return line[2:].strip()
+    return "Cahier des Charges"
+
+
+def _local_mermaid_js() -> Optional[str]:
+    """Contenu du mermaid.js local désigné par CDC_MERMAID_JS, ou None."""
+    path = os.environ.get(MERMAID_JS_ENV)
+    if not path or not os.path.isfile(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        # "</script>" dans le code fermerait la balise
+        return f.read().replace("</script>", "<\\/script>")
+
+
+def render_html(markdown: str, cache_dir: str, image_format: str = "svg") -> str:
+    """
+    Produit un document HTML autonome à partir d'un CDC.
+
+    Args:
+        markdown: Contenu du CDC
+        cache_dir: Dossier de cache (diagrammes Mermaid)
+        image_format: "svg" (inline) ou "png" (base64, pour pandoc/DOCX)
+
+    Returns:
+        Document HTML complet
+    """
+    def mermaid_renderer(code: str) -> Optional[str]:
+        image = render_mermaid(code, image_format, cache_dir)
+        if image is None:
+            return None
+        if image_format == "svg":
+            return image.decode("utf-8")
+        return f'<img alt="diagramme" src="data:image/png;base64,{base64.b64encode(image).decode("ascii")}">'
+
+    body, needs_mermaid_js = markdown_to_html(markdown, mermaid_renderer)
+    scripts = ""
+    mermaid_js = _local_mermaid_js() if needs_mermaid_js else None
+    if mermaid_js is not None:
+        # Intégré au document : pas de CDN, le rendu fonctionne hors ligne
+        scripts = (f"<script>{mermaid_js}</script>\n"
+                   "<script>mermaid.initialize({startOnLoad: true});</script>")
+    return HTML_TEMPLATE.format(title=html.escape(_document_title(markdown)), body=body, scripts=scripts)
+
+
+# --------------------------------------------------------------------------
+# HTML -> PDF / DOCX
+# --------------------------------------------------------------------------
+
+def _html_to_pdf(html_path: str, pdf_path: str) -> None:
+    if shutil.which("wkhtmltopdf"):
+        command = ["wkhtmltopdf", "--quiet", "--enable-local-file-access", html_path, pdf_path]
+    elif shutil.which("weasyprint"):
+        command = ["weasyprint", html_path, pdf_path]
+    else:
+        chrome = next((name for name in ("chromium", "chromium-browser", "google-chrome", "chrome")
+                       if shutil.which(name)), None)
+        if chrome is None:
+            raise ExportError("PDF export requires wkhtmltopdf, weasyprint or Chromium in PATH")
+        command = [chrome, "--headless", "--disable-gpu", "--no-pdf-header-footer",
+                   f"--print-to-pdf={pdf_path}", f"file://{os.path.abspath(html_path)}"]
+    completed = subprocess.run(command, capture_output=True, timeout=300)
+    if completed.returncode != 0 or not os.path.exists(pdf_path):
+        raise ExportError(f"PDF export failed: {completed.stderr.decode('utf-8', 'replace')[-500:]}")
+
+
+def _html_to_docx(html_path: str, docx_path: str) -> None:
+    if shutil.which("pandoc") is None:
+        raise ExportError("DOCX export requires pandoc in PATH")
+    completed = subprocess.run(
+        ["pandoc", "-f", "html", "-t", "docx", "-o", docx_path, html_path],
+        capture_output=True, timeout=300
+    )
+    if completed.returncode != 0:
+        raise ExportError(f"DOCX export failed: {completed.stderr.decode('utf-8', 'replace')[-500:]}")
+
+
+def cache_key(markdown: str, fmt: str) -> str:
+    """Clé de cache d'un export : hash du contenu, du format, de la version du rendu et du moteur Mermaid disponible."""
+    mermaid = "mmdc" if shutil.which("mmdc") else os.environ.get(MERMAID_JS_ENV, "")
+    return hashlib.sha256(f"{EXPORTER_VERSION}:{fmt}:{mermaid}:".encode("utf-8") + markdown.encode("utf-8")).hexdigest()
+
+
+def export_markdown(markdown: str, fmt: str, output_path: str, cache_dir: str = DEFAULT_CACHE_DIR) -> bool:
+    """
+    Exporte un CDC dans un format donné, en réutilisant le cache si possible.
+
+    Args:
+        markdown: Contenu du CDC
+        fmt: "html", "pdf" ou "docx"
+        output_path: Fichier à produire
+        cache_dir: Dossier de cache partagé entre les processus
+
+    Returns:
+        True si le résultat provient du cache
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    cached_path = os.path.join(cache_dir, fmt, f"{cache_key(markdown, fmt)}.{fmt}")
+    if os.path.exists(cached_path):
+        shutil.copyfile(cached_path, output_path)
+        return True
+
+    os.makedirs(os.path.dirname(cached_path), exist_ok=True)
+    if fmt == "html":
+        atomic_write(cached_path, render_html(markdown, cache_dir).encode("utf-8"))
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            html_path = os.path.join(tmp, "cdc.html")
+            target = os.path.join(tmp, f"cdc.{fmt}")
+            image_format = "svg" if fmt == "pdf" else "png"
+            with open(html_path, "w", encoding="utf-8") as f:
+                f.write(render_html(markdown, cache_dir, image_format=image_format))
+            if fmt == "pdf":
+                _html_to_pdf(html_path, target)
+            else:
+                _html_to_docx(html_path, target)
+            with open(target, "rb") as f:
+                atomic_write(cached_path, f.read())
+
+    shutil.copyfile(cached_path, output_path)
+    return False
+
+
+def _export_job(source: str, markdown: str, fmt: str, output_path: str, cache_dir: str) -> ExportResult:
+    start = time.perf_counter()
+    try:
+        cached = export_markdown(markdown, fmt, output_path, cache_dir)
+        return ExportResult(source, fmt, output_path, cached, time.perf_counter() - start)
+    except Exception as e:
+        return ExportResult(source, fmt, None, False, time.perf_counter() - start, error=str(e))
+
+
+def export_many(documents: Dict[str, str], formats: Iterable[str], output_dir: str,
+                cache_dir: str = DEFAULT_CACHE_DIR, max_workers: Optional[int] = None) -> List[ExportResult]:
+    """
+    Exporte un lot de CDC dans plusieurs formats avec un pool de processus.
+
+    Args:
+        documents: Dictionnaire {identifiant: contenu markdown}
+        formats: Formats à produire ("html", "pdf", "docx")
+        output_dir: Dossier de sortie (<identifiant>.<format>)
+        cache_dir: Dossier de cache par format
+        max_workers: Nombre de processus (tous les cœurs si None)
+
+    Returns:
+        Résultat de chaque export, erreurs comprises
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    os.makedirs(cache_dir, exist_ok=True)
+    formats = list(formats)
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(_export_job, cdc_id, markdown, fmt,
+                        os.path.join(output_dir, f"{cdc_id}.{fmt}"), cache_dir)
+            for cdc_id, markdown in documents.items()
+            for fmt in formats
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            # Compté ici : les métriques des processus du pool ne remontent pas
+            if result.error is None:
+                record_cache("export", result.cached)
+            results.append(result)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export des CDC markdown en HTML, PDF et DOCX")
+    parser.add_argument("files", nargs="*", help="fichiers CDC .md")
+    parser.add_argument("--archive", help="exporter tous les CDC d'une archive (voir utils.cdc_archive)")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=["html"])
+    parser.add_argument("--out", default="exports", help="dossier de sortie")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="nombre de processus (défaut : tous les cœurs)")
+    args = parser.parse_args()
+
+    documents: Dict[str, str] = {}
+    for file_path in args.files:
+        with open(file_path, encoding="utf-8") as f:
+            documents[os.path.splitext(os.path.basename(file_path))[0]] = f.read()
+    if args.archive:
+        from utils.cdc_archive import CDCArchive
+        with CDCArchive(args.archive) as archive:
+            for cdc_id in archive.ids():
+                documents[cdc_id] = archive.get(cdc_id)
+    if not documents:
+        parser.error("no CDC to export (give .md files or --archive)")
+
+    start = time.perf_counter()
+    results = export_many(documents, args.formats, args.out, args.cache_dir, args.jobs)
+    elapsed = time.perf_counter() - start
+
+    failures = [result for result in results if result.error]
+    for result in failures:
+        print(f"❌ {result.source}.{result.fmt}: {result.error}")
+    cached = sum(1 for result in results if result.cached)
+    print(f"✅ {len(results) - len(failures)}/{len(results)} exports en {elapsed:.1f}s "
+          f"({cached} depuis le cache) → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,117 @@
 import os
-from typing import Dict, Any
+from dataclasses import dataclass, field
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
-from models.Project import Project
+from models.Project import Project, SECTIONS
+from utils.mermaid_validator import DiagramReport, MermaidRepairer, summarize_reports, validate_and_repair
+from utils.rate_limiter import RateLimitedChatModel, RateLimiter
+from utils.context_packing import ContextPacker, PackingReport
+from utils.notes_condenser import NotesCondenser, NotesDigest
+from utils.attachments import CDC_SECTION_QUERIES, AttachmentStore, attachment_context
+from utils.metrics import instrument_llm
+
+
+# Prompt du CDC, construit une seule fois (et non à chaque génération)
+CDC_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """Tu es un assistant expert en rédaction de cahiers des charges (CDC) pour des projets digitaux (web, app, social ads, landing pages, refonte site, tracking, etc.).
+
+Mission
+- Transformer une expression de besoin (souvent floue) en un cahier des charges clair, complet et contrôlable.
+- Ton objectif est d'éviter les malentendus, verrouiller le périmètre, sécuriser budget/planning, et rendre le projet recettable.
+- ⚖️ RAPPEL CRUCIAL : Le CDC est un DOCUMENT JURIDIQUE qui protège à la fois le client ET le prestataire. Il engage les parties.
+
+Principes non négociables (les "3C")
+1) Clair : compréhensible par des non-tech et des équipes de prod.
+2) Complet : pas d'angles morts qui réapparaissent après.
+3) Contrôlable : chaque point important doit être mesurable et/ou validable (critères d'acceptation).
+
+Règles de rédaction
+- Si ce n'est pas écrit, ce n'est pas acquis (valeur juridique).
+- Distingue toujours : objectifs vs leviers (ex : "faire des reels" = levier, pas objectif).
+- Formule des objectifs SMART : Spécifique, Mesurable (KPI + source), Atteignable, Réaliste, Temporel.
+- Verrouille le périmètre : IN / OUT + conditions d'ajout (anti "scope creep").
+- Définis des livrables listés précisément (format, quantité, responsable, validation).
+- Ajoute contraintes (RGPD, marque/ton, SEO, accessibilité, tracking, technique) si pertinent.
+- Ajoute planning avec jalons + validations + rôles (gouvernance : qui décide).
+- Prévois recette + critères d'acceptation (ce qui prouve que c'est réussi).
+- Liste risques + mitigation.
+- Précise les responsabilités juridiques et les conditions de modification du CDC.
+
+Structure attendue du CDC (toujours dans cet ordre)
+0. Infos projet + versioning (v1, v2…) + date + parties prenantes + clause juridique
+1. Contexte & déclencheur ("Pourquoi maintenant ?") + enjeux (ce qu'on perd/gagne)
+2. Objectifs SMART (1 principal + 1–2 secondaires) + KPI + source de vérité (GA4/CRM/Ads Manager…)
+3. Cibles (principales/secondaires) + parcours utilisateur (si pertinent)
+4. Périmètre : IN / OUT + dépendances + conditions d'évolution
+5. Livrables attendus : liste exhaustive + détails (format, volume, owner, validation)
+6. Contraintes : marque/ton, RGPD, tracking/UTM/pixel, SEO, accessibilité, tech/outils existants (CMS, CRM, CMP…)
+7. Planning : 5–8 jalons + dates/semaines + validations associées
+8. Organisation & gouvernance : qui fait quoi, qui valide quoi, circuits de décision
+9. Budget : enveloppe + postes de coûts + arbitrages possibles
+10. Recette : critères d'acceptation + modalités de validation
+11. Risques : top 5 + impact + mitigation
+12. Annexes (liens, docs, maquettes, assets, benchmarks…)
+
+🎨 DIAGRAMMES MERMAID - OBLIGATOIRES
+Pour améliorer la LISIBILITÉ et rendre le CDC plus AGRÉABLE et COMPRÉHENSIBLE, intègre des diagrammes Mermaid :
+
+**UTILISE MERMAID POUR :**
+- **Planning (section 7)** : TOUJOURS un diagramme Gantt visualisant jalons et phases
+- **Gouvernance (section 8)** : Flowchart pour circuits de décision et validation
+- **Parcours utilisateur (section 3)** : Journey ou flowchart si pertinent
+- **Architecture** : Diagram si projet technique
+- **Budget** : Pie chart pour répartition des coûts si utile
+
+**SYNTAXE MERMAID :**
+Intègre les diagrammes dans des blocs ```mermaid avec syntaxe correcte. Exemples :
+
+Gantt:
+```mermaid
+gantt
+    title Planning du projet
+    dateFormat YYYY-MM-DD
+    section Phase 1
+    Analyse besoins :a1, 2026-02-01, 7d
+    Conception :a2, after a1, 14d
+```
+
+Flowchart décision:
+```mermaid
+flowchart TD
+    A[Demande] --> B{{Validation}}
+    B -->|OK| C[Prod]
+    B -->|KO| D[Ajust]
+```
+
+Positionne les diagrammes JUSTE APRÈS le texte de la section concernée.
+
+Format de sortie
+- Produis DIRECTEMENT le CDC en markdown pur, SANS balises ```markdown au début/fin du document.
+- Commence par # Cahier des Charges - [Nom du projet]
+- Structure avec ## 0., ## 1., etc.
+- Intègre 2-3 diagrammes Mermaid minimum (dans leurs propres blocs ```mermaid)
+- Ajoute clause juridique : "⚖️ Ce document engage les parties. Toute modification nécessite un avenant signé."
+- Termine par checklist ✅ Prêt pour devis/production ?
+- Ton : pro, direct, juridiquement solide
+- N'entoure JAMAIS le CDC global de ```markdown"""),
+    ("human", "{project_context}")
+])
+
+
+@dataclass
+class GenerationReport:
+    """Bilans d'une génération, renvoyés à l'appelant : le générateur est partagé entre threads."""
+    diagrams: List[DiagramReport] = field(default_factory=list)
+    notes: Optional[NotesDigest] = None
+    packing: Optional[PackingReport] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "diagrams": summarize_reports(self.diagrams),
+            "notes": self.notes.to_dict() if self.notes else None,
+            "packing": self.packing.to_dict() if self.packing else None,
+        }
 
 
 class CDCGenerator:
@@ -11,30 +120,68 @@ class CDCGenerator:
     Transforme un objet Project en un CDC complet et professionnel.
     """
     
-    def __init__(self, api_key: str = None, model: str = "gpt-4o"): # type: ignore
+    def __init__(self, api_key: str = None, model: str = "gpt-4o", repair_model: str = "gpt-4o-mini", # type: ignore
+                 llm: Any = None, repair_llm: Any = None, rate_limiter: RateLimiter = None, # type: ignore
+                 context_budget: Optional[int] = 12000, notes_model: str = "gpt-4o-mini",
+                 notes_llm: Any = None, condense_notes: bool = True,
+                 attachments_budget: Optional[int] = 3000, embedder: Any = None):
         """
         Initialise le générateur de CDC.
         
         Args:
             api_key: Clé API OpenAI (si None, utilise la variable d'environnement OPENAI_API_KEY)
             model: Modèle OpenAI à utiliser (gpt-4o recommandé pour la qualité)
+            repair_model: Modèle léger utilisé pour réparer les diagrammes Mermaid invalides
+            llm: Modèle de chat déjà construit (client partagé, utils.fake_llm.FakeChatModel…) ;
+                 si renseigné, api_key et model sont ignorés
+            repair_llm: Modèle de réparation déjà construit (par défaut : llm s'il est fourni)
+            rate_limiter: Limiteur RPM/TPM partagé (voir utils.rate_limiter) ; None = pas de limite
+            context_budget: Taille maximale du contenu du projet dans le prompt, en tokens
+                            (voir utils.context_packing) ; None = contenu envoyé tel quel
+            notes_model: Modèle léger utilisé pour condenser les notes longues
+            notes_llm: Modèle de condensation déjà construit (par défaut : llm s'il est fourni)
+            condense_notes: Si True, les notes longues sont remplacées par un condensé
+                            par section (voir utils.notes_condenser) avant l'envoi
+            attachments_budget: Taille maximale des extraits de documents joints, en tokens
+                                (voir utils.attachments) ; None = documents ignorés
+            embedder: Modèle d'embeddings des documents joints (HashingEmbedder local par défaut)
         """
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-        if not self.api_key:
-            raise ValueError("OPENAI_API_KEY must be set in environment or passed as parameter")
-        
-        self.llm = ChatOpenAI(
-            api_key=self.api_key,
-            model=model,
-            temperature=0.5  # Température modérée pour un bon équilibre créativité/cohérence
-        )
+        if llm is not None:
+            self.llm = llm
+        else:
+            if not self.api_key:
+                raise ValueError("OPENAI_API_KEY must be set in environment or passed as parameter")
+            
+            self.llm = ChatOpenAI(
+                api_key=self.api_key,
+                model=model,
+                temperature=0.5  # Température modérée pour un bon équilibre créativité/cohérence
+            )
+        
+        self.rate_limiter = rate_limiter
+        self.llm = self._limited(self.llm)
+        self.repair_model = repair_model
+        self._repair_llm = self._limited(repair_llm) if repair_llm is not None else (self.llm if llm is not None else None)
+        # Les documents joints ont leur propre budget (attachments_budget)
+        self.packer = ContextPacker(
+            budget=context_budget, model=model,
+            sections=[section for section in SECTIONS if section != "attachments"]
+        ) if context_budget else None
+        self.notes_model = notes_model
+        self.condense_notes = condense_notes
+        self._notes_llm = self._limited(notes_llm) if notes_llm is not None else (self.llm if llm is not None else None)
+        self._notes_condenser: Optional[NotesCondenser] = None
+        self.attachments_budget = attachments_budget
+        self.attachment_store = AttachmentStore(embedder)
     
-    def _project_to_user_context(self, project: Project) -> str:
+    def _project_to_user_context(self, project: Project, excerpts: str = "") -> str:
         """
         Convertit un objet Project en contexte utilisateur pour le LLM.
         
         Args:
             project: Objet Project à transformer
+            excerpts: Extraits des documents joints retenus pour chaque section
             
         Returns:
             Chaîne de caractères formatée avec toutes les informations du projet
@@ -161,6 +308,11 @@ class CDCGenerator:
             context_parts.append("\n📝 NOTES ET REMARQUES SUPPLÉMENTAIRES")
             context_parts.append(project.notes)
         
+        # Extraits des documents client
+        if excerpts:
+            context_parts.append("\n📎 EXTRAITS DES DOCUMENTS CLIENT")
+            context_parts.append(excerpts)
+        
         context_parts.append("\n" + "="*80)
         context_parts.append("\n⚠️ IMPORTANT : Ne te contente PAS de reformuler ou lister les informations ci-dessus.")
         context_parts.append("Tu dois ENRICHIR, DÉVELOPPER et PROFESSIONNALISER le CDC avec :")
@@ -174,122 +326,102 @@ class CDCGenerator:
         context_parts.append("• Des risques concrets avec impact et mitigation détaillés")
         context_parts.append("• Des annexes utiles (outils, benchmarks, bonnes pratiques)")
         context_parts.append("• INTÈGRE les notes supplémentaires dans les sections appropriées du CDC")
+        if excerpts:
+            context_parts.append("• EXPLOITE les extraits des documents client et cite ces documents dans les Annexes")
         context_parts.append("\nTon CDC doit être UTILISABLE IMMÉDIATEMENT pour lancer le projet en production.")
         context_parts.append("Ajoute ton expertise métier, anticipe les questions, comble les manques.")
         
         return "\n".join(context_parts)
     
-    def generate_cdc(self, project: Project) -> str:
+    def _build_messages(self, project: Project) -> Tuple[list, GenerationReport]:
         """
-        Génère un cahier des charges complet à partir d'un objet Project.
+        Construit les messages (system + contexte projet) envoyés au LLM.
         
         Args:
             project: Objet Project à transformer en CDC
             
         Returns:
-            Cahier des charges complet en markdown
+            Tuple (messages LangChain, bilans de la condensation des notes et de la mise au budget)
         """
+        report = GenerationReport()
+        # Remplacer les notes longues par leur condensé, sur une copie
+        if self.condense_notes and project.notes:
+            project, report.notes = self._condenser().condense_project(project)
         
-        # Créer le contexte utilisateur
-        user_context = self._project_to_user_context(project)
+        # Borner la taille du contenu (doublons, sections peu prioritaires), sur une copie
+        if self.packer is not None:
+            project, report.packing = self.packer.pack(project)
         
-        # Créer le prompt avec le message system fourni
-        prompt_template = ChatPromptTemplate.from_messages([
-            ("system", """Tu es un assistant expert en rédaction de cahiers des charges (CDC) pour des projets digitaux (web, app, social ads, landing pages, refonte site, tracking, etc.).
-
-Mission
-- Transformer une expression de besoin (souvent floue) en un cahier des charges clair, complet et contrôlable.
-- Ton objectif est d'éviter les malentendus, verrouiller le périmètre, sécuriser budget/planning, et rendre le projet recettable.
-- ⚖️ RAPPEL CRUCIAL : Le CDC est un DOCUMENT JURIDIQUE qui protège à la fois le client ET le prestataire. Il engage les parties.
-
-Principes non négociables (les "3C")
-1) Clair : compréhensible par des non-tech et des équipes de prod.
-2) Complet : pas d'angles morts qui réapparaissent après.
-3) Contrôlable : chaque point important doit être mesurable et/ou validable (critères d'acceptation).
-
-Règles de rédaction
-- Si ce n'est pas écrit, ce n'est pas acquis (valeur juridique).
-- Distingue toujours : objectifs vs leviers (ex : "faire des reels" = levier, pas objectif).
-- Formule des objectifs SMART : Spécifique, Mesurable (KPI + source), Atteignable, Réaliste, Temporel.
-- Verrouille le périmètre : IN / OUT + conditions d'ajout (anti "scope creep").
-- Définis des livrables listés précisément (format, quantité, responsable, validation).
-- Ajoute contraintes (RGPD, marque/ton, SEO, accessibilité, tracking, technique) si pertinent.
-- Ajoute planning avec jalons + validations + rôles (gouvernance : qui décide).
-- Prévois recette + critères d'acceptation (ce qui prouve que c'est réussi).
-- Liste risques + mitigation.
-- Précise les responsabilités juridiques et les conditions de modification du CDC.
-
-Structure attendue du CDC (toujours dans cet ordre)
-0. Infos projet + versioning (v1, v2…) + date + parties prenantes + clause juridique
-1. Contexte & déclencheur ("Pourquoi maintenant ?") + enjeux (ce qu'on perd/gagne)
-2. Objectifs SMART (1 principal + 1–2 secondaires) + KPI + source de vérité (GA4/CRM/Ads Manager…)
-3. Cibles (principales/secondaires) + parcours utilisateur (si pertinent)
-4. Périmètre : IN / OUT + dépendances + conditions d'évolution
-5. Livrables attendus : liste exhaustive + détails (format, volume, owner, validation)
-6. Contraintes : marque/ton, RGPD, tracking/UTM/pixel, SEO, accessibilité, tech/outils existants (CMS, CRM, CMP…)
-7. Planning : 5–8 jalons + dates/semaines + validations associées
-8. Organisation & gouvernance : qui fait quoi, qui valide quoi, circuits de décision
-9. Budget : enveloppe + postes de coûts + arbitrages possibles
-10. Recette : critères d'acceptation + modalités de validation
-11. Risques : top 5 + impact + mitigation
-12. Annexes (liens, docs, maquettes, assets, benchmarks…)
-
-🎨 DIAGRAMMES MERMAID - OBLIGATOIRES
-Pour améliorer la LISIBILITÉ et rendre le CDC plus AGRÉABLE et COMPRÉHENSIBLE, intègre des diagrammes Mermaid :
-
-**UTILISE MERMAID POUR :**
-- **Planning (section 7)** : TOUJOURS un diagramme Gantt visualisant jalons et phases
-- **Gouvernance (section 8)** : Flowchart pour circuits de décision et validation
-- **Parcours utilisateur (section 3)** : Journey ou flowchart si pertinent
-- **Architecture** : Diagram si projet technique
-- **Budget** : Pie chart pour répartition des coûts si utile
-
-**SYNTAXE MERMAID :**
-Intègre les diagrammes dans des blocs ```mermaid avec syntaxe correcte. Exemples :
-
-Gantt:
-```mermaid
-gantt
-    title Planning du projet
-    dateFormat YYYY-MM-DD
-    section Phase 1
-    Analyse besoins :a1, 2026-02-01, 7d
-    Conception :a2, after a1, 14d
-```
-
-Flowchart décision:
-```mermaid
-flowchart TD
-    A[Demande] --> B{{Validation}}
-    B -->|OK| C[Prod]
-    B -->|KO| D[Ajust]
-```
-
-Positionne les diagrammes JUSTE APRÈS le texte de la section concernée.
-
-Format de sortie
-- Produis DIRECTEMENT le CDC en markdown pur, SANS balises ```markdown au début/fin du document.
-- Commence par # Cahier des Charges - [Nom du projet]
-- Structure avec ## 0., ## 1., etc.
-- Intègre 2-3 diagrammes Mermaid minimum (dans leurs propres blocs ```mermaid)
-- Ajoute clause juridique : "⚖️ Ce document engage les parties. Toute modification nécessite un avenant signé."
-- Termine par checklist ✅ Prêt pour devis/production ?
-- Ton : pro, direct, juridiquement solide
-- N'entoure JAMAIS le CDC global de ```markdown"""),
-            ("human", "{project_context}")
-        ])
+        # Extraits pertinents des documents joints, dans leur propre budget
+        excerpts = ""
+        if self.attachments_budget and project.attachments:
+            excerpts = attachment_context(project, CDC_SECTION_QUERIES, max_tokens=self.attachments_budget,
+                                          store=self.attachment_store)
+        
+        # Créer le contexte utilisateur
+        user_context = self._project_to_user_context(project, excerpts)
         
         # Formatter le prompt
-        messages = prompt_template.format_messages(
+        return CDC_PROMPT.format_messages(
             project_context=user_context
-        )
+        ), report
+    
+    def generate_cdc(self, project: Project, repair_diagrams: bool = True) -> Tuple[str, GenerationReport]:
+        """
+        Génère un cahier des charges complet à partir d'un objet Project.
         
+        Args:
+            project: Objet Project à transformer en CDC
+            repair_diagrams: Si True, valide les diagrammes Mermaid et répare
+                             uniquement les blocs invalides (voir check_diagrams)
+            
+        Returns:
+            Tuple (cahier des charges complet en markdown, bilans de la génération)
+        """
+        messages, report = self._build_messages(project)
         # Appeler le LLM
         response = self.llm.invoke(messages)
         
-        # Nettoyer la réponse (retirer les blocs de code markdown si présents)
-        content = response.content
+        content = self._clean_content(response.content)
         
+        if repair_diagrams:
+            content, report.diagrams = self.check_diagrams(content)
+        
+        return content, report
+    
+    def stream_cdc(self, project: Project) -> Iterator[str]:
+        """
+        Génère le CDC en streaming : produit le texte brut au fil de l'eau.
+        
+        Le texte produit n'est ni nettoyé ni validé ; une fois le flux terminé,
+        passez le texte complet à finalize_cdc().
+        
+        Args:
+            project: Objet Project à transformer en CDC
+            
+        Yields:
+            Morceaux de texte du CDC
+        """
+        messages, _ = self._build_messages(project)
+        for chunk in self.llm.stream(messages):
+            if chunk.content:
+                yield str(chunk.content)
+    
+    def finalize_cdc(self, content: str, repair_diagrams: bool = True) -> Tuple[str, List[DiagramReport]]:
+        """
+        Nettoie un CDC produit par stream_cdc() et valide / répare ses diagrammes.
+        
+        Args:
+            content: Texte complet du CDC
+            repair_diagrams: Si False, valide sans appeler le LLM
+            
+        Returns:
+            Tuple (CDC final, rapport par diagramme)
+        """
+        return validate_and_repair(self._clean_content(content), self._repairer() if repair_diagrams else None)
+    
+    def _clean_content(self, content: str) -> str:
+        """Retire les balises de code markdown entourant éventuellement le CDC."""
         # Retirer les balises ```markdown ou ``` au début et à la fin
         if content.startswith("```markdown"):
             content = content[len("```markdown"):].strip()
@@ -303,6 +435,49 @@ Format de sortie
         
         return content
     
+    def _limited(self, llm: Any) -> Any:
+        # Mesure de l'appel lui-même : l'attente du limiteur n'est pas comptée dans la latence LLM
+        llm = instrument_llm(llm)
+        return RateLimitedChatModel(llm, self.rate_limiter) if self.rate_limiter is not None else llm
+    
+    def _repairer(self) -> MermaidRepairer:
+        if self._repair_llm is None:
+            self._repair_llm = self._limited(ChatOpenAI(
+                api_key=self.api_key, # type: ignore
+                model=self.repair_model,
+                temperature=0,
+                max_tokens=800 # type: ignore
+            ))
+        return MermaidRepairer(self._repair_llm)
+    
+    def _condenser(self) -> NotesCondenser:
+        if self._notes_condenser is None:
+            if self._notes_llm is None:
+                self._notes_llm = self._limited(ChatOpenAI(
+                    api_key=self.api_key, # type: ignore
+                    model=self.notes_model,
+                    temperature=0
+                ))
+            self._notes_condenser = NotesCondenser(self._notes_llm, model=self.notes_model)
+        return self._notes_condenser
+    
+    def check_diagrams(self, cdc_content: str, repair: bool = True) -> Tuple[str, List[DiagramReport]]:
+        """
+        Valide localement les diagrammes Mermaid du CDC et répare les blocs invalides.
+        
+        Seuls les blocs en erreur sont envoyés au modèle de réparation, puis
+        réinsérés à leur place : le reste du CDC n'est pas régénéré.
+        
+        Args:
+            cdc_content: CDC en markdown
+            repair: Si False, valide sans appeler le LLM
+            
+        Returns:
+            Tuple (CDC avec les diagrammes réparés, rapport par diagramme)
+        """
+        repairer = self._repairer() if repair else None
+        return validate_and_repair(cdc_content, repairer)
+    
     def save_cdc_to_file(self, cdc_content: str, filename: str = None) -> str: # type: ignore
         """
         Sauvegarde le CDC généré dans un fichier.
@@ -323,9 +498,39 @@ Format de sortie
             f.write(cdc_content)
         
         return filename
+    
+    def save_cdc_to_archive(self, cdc_content: str, archive_path: str, cdc_id: str = None) -> str: # type: ignore
+        """
+        Ajoute le CDC généré à une archive zstandard (voir utils.cdc_archive).
+        
+        Si l'archive n'existe pas encore, elle est créée avec ce premier CDC
+        comme dictionnaire ; reconstruisez-la avec `python -m utils.cdc_archive build`
+        une fois le corpus constitué pour profiter d'un dictionnaire entraîné.
+        
+        Args:
+            cdc_content: Contenu du CDC à archiver
+            archive_path: Chemin du fichier d'archive
+            cdc_id: Identifiant du CDC (si None, génère un identifiant horodaté)
+            
+        Returns:
+            Identifiant du CDC dans l'archive
+        """
+        from utils.cdc_archive import CDCArchive, train_dictionary
+        
+        if cdc_id is None:
+            from datetime import datetime
+            cdc_id = f"CDC_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        
+        dictionary = None if os.path.exists(archive_path) else train_dictionary([cdc_content])
+        with CDCArchive(archive_path, dictionary=dictionary) as archive:
+            archive.add(cdc_id, cdc_content)
+        
+        return cdc_id
 
 
-def generate_cdc_from_project(project: Project, api_key: str = None, save_to_file: bool = True) -> Dict[str, Any]: # type: ignore
+def generate_cdc_from_project(project: Project, api_key: str = None, save_to_file: bool = True, archive_path: str = None, # type: ignore
+                              llm: Any = None, rate_limiter: RateLimiter = None, # type: ignore
+                              generator: Optional[CDCGenerator] = None) -> Dict[str, Any]:
     """
     Fonction utilitaire pour générer rapidement un CDC depuis un projet.
     
@@ -333,20 +538,34 @@ def generate_cdc_from_project(project: Project, api_key: str = None, save_to_fil
         project: Objet Project à transformer en CDC
         api_key: Clé API OpenAI (optionnel)
         save_to_file: Si True, sauvegarde le CDC dans un fichier .md
+        archive_path: Si renseigné, ajoute aussi le CDC à cette archive zstandard
+        llm: Modèle de chat à utiliser à la place de ChatOpenAI (optionnel)
+        rate_limiter: Limiteur RPM/TPM partagé (optionnel)
+        generator: Générateur déjà construit, réutilisé d'une génération à l'autre
+                   (api_key, llm et rate_limiter sont alors ignorés)
         
     Returns:
-        Dictionnaire contenant le CDC et le chemin du fichier
+        Dictionnaire contenant le CDC, le chemin du fichier, l'identifiant dans l'archive,
+        le bilan des diagrammes, celui de la condensation des notes et celui de la
+        mise au budget du contexte
     """
-    generator = CDCGenerator(api_key=api_key)
-    cdc_content = generator.generate_cdc(project)
+    if generator is None:
+        generator = CDCGenerator(api_key=api_key, llm=llm, rate_limiter=rate_limiter)
+    cdc_content, report = generator.generate_cdc(project)
     
     result = {
         "cdc_content": cdc_content,
-        "file_path": None
+        "file_path": None,
+        "archive_id": None,
+        **report.to_dict()
     }
     
     if save_to_file:
         file_path = generator.save_cdc_to_file(cdc_content)
         result["file_path"] = file_path
     
+    if archive_path:
+        cdc_id = os.path.splitext(os.path.basename(result["file_path"]))[0] if result["file_path"] else None
+        result["archive_id"] = generator.save_cdc_to_archive(cdc_content, archive_path, cdc_id=cdc_id) # type: ignore
+    
     return result
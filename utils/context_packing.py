@@ -0,0 +1,298 @@
+"""
+Mise au budget du contexte envoyé au LLM.
+
+_project_to_user_context (CDCGenerator) et _project_to_context (BudgetEstimator)
+recopient chaque élément de liste et l'intégralité des notes : sur un gros
+projet, le prompt grossit sans limite (coût, latence, dépassement de la
+fenêtre de contexte). ContextPacker produit une copie du projet dont la taille
+en tokens est bornée :
+
+1. dédoublonnage des éléments de liste identiques ou quasi identiques ;
+2. raccourcissement des éléments démesurés ;
+3. au-delà du budget, réduction des sections les moins prioritaires (notes,
+   cibles secondaires, contacts…), dans l'ordre de TRIM_ORDER.
+
+Chaque opération est consignée dans un PackingReport.
+"""
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Sequence, Tuple
+
+from models.Project import Project, SECTIONS
+from utils.rate_limiter import count_tokens
+
+
+# Champs de type liste, sous la forme "section" ou "section.clé"
+LIST_FIELDS = (
+    "context.stakes", "objectives", "targets.primary", "targets.secondary", "scope.in", "scope.out",
+    "deliverables", "timeline", "governance.validators", "governance.contacts", "acceptance.criteria",
+    "risks", "budget.items",
+)
+
+# Champs réduits quand le contexte dépasse le budget, du moins au plus prioritaire
+TRIM_ORDER = (
+    "notes", "targets.secondary", "governance.contacts", "scope.out", "timeline", "risks",
+    "acceptance.criteria", "context.stakes", "budget.items", "deliverables", "governance.validators",
+    "targets.primary", "scope.in", "objectives",
+)
+
+TRUNCATION_MARK = " […]"
+
+
+@dataclass
+class TrimAction:
+    """Réduction appliquée à un champ."""
+    field: str
+    action: str  # "dedupe", "shorten" ou "truncate"
+    tokens_before: int
+    tokens_after: int
+    detail: str = ""
+
+
+@dataclass
+class PackingReport:
+    """Bilan de ContextPacker.pack()."""
+    budget: int
+    tokens_before: int
+    tokens_after: int
+    section_tokens: Dict[str, int] = field(default_factory=dict)
+    actions: List[TrimAction] = field(default_factory=list)
+
+    @property
+    def trimmed(self) -> bool:
+        return any(action.action == "truncate" for action in self.actions)
+
+    def summary(self) -> str:
+        lines = [f"Contexte : {self.tokens_before} -> {self.tokens_after} tokens (budget {self.budget})"]
+        for action in self.actions:
+            lines.append(f"  - {action.field} : {action.action} {action.tokens_before} -> {action.tokens_after} "
+                         f"tokens{f' ({action.detail})' if action.detail else ''}")
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "budget": self.budget,
+            "tokens_before": self.tokens_before,
+            "tokens_after": self.tokens_after,
+            "section_tokens": self.section_tokens,
+            "actions": [action.__dict__ for action in self.actions],
+        }
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", " ", text.casefold()).strip()
+
+
+# Éléments d'un même groupe (premier mot, nombres) comparés au plus à chaque nouvel élément
+MAX_BUCKET_COMPARISONS = 64
+
+
+def _near_duplicate(matcher: SequenceMatcher, text: str, candidates: List[str], threshold: float) -> bool:
+    """
+    Indique si `text` est quasi identique à l'un des `candidates` (les plus récents d'abord).
+
+    ratio() est quadratique : il n'est calculé qu'après les bornes supérieures
+    bon marché (écart de longueur, puis quick_ratio sur les caractères), qui
+    écartent presque toutes les paires.
+    """
+    size = len(text)
+    # Le texte courant en seconde séquence : son index n'est construit qu'une fois
+    matcher.set_seq2(text)
+    for other in candidates[:-MAX_BUCKET_COMPARISONS - 1:-1]:
+        # ratio() <= 2 * min(longueurs) / somme des longueurs
+        if 2 * min(size, len(other)) < threshold * (size + len(other)):
+            continue
+        matcher.set_seq1(other)
+        if matcher.quick_ratio() >= threshold and matcher.ratio() >= threshold:
+            return True
+    return False
+
+
+def dedupe_items(items: Sequence[Any], threshold: float = 0.92) -> Tuple[List[Any], int]:
+    """
+    Retire les doublons d'une liste en gardant la première occurrence.
+
+    Deux éléments sont considérés identiques si leurs textes normalisés
+    (casse, accents, ponctuation) sont égaux, ou quasi identiques si leur
+    similarité dépasse `threshold` et qu'ils contiennent les mêmes nombres
+    ("segment 1" et "segment 2" restent distincts). Chaque élément n'est
+    comparé qu'aux MAX_BUCKET_COMPARISONS derniers éléments gardés de son
+    groupe : le coût reste linéaire même si tous partagent leur premier mot.
+
+    Returns:
+        Tuple (liste dédoublonnée, nombre d'éléments retirés)
+    """
+    kept: List[Any] = []
+    seen = set()
+    # Comparaison approchée limitée aux éléments de même premier mot et mêmes nombres
+    buckets: Dict[Tuple[str, Tuple[str, ...]], List[str]] = {}
+    matcher = SequenceMatcher()
+    for item in items:
+        normalized = _normalize(item)
+        if normalized in seen:
+            continue
+        key = (normalized.split(" ", 1)[0], tuple(re.findall(r"\d+", normalized)))
+        candidates = buckets.setdefault(key, [])
+        if candidates and _near_duplicate(matcher, normalized, candidates, threshold):
+            continue
+        seen.add(normalized)
+        candidates.append(normalized)
+        kept.append(item)
+    return kept, len(items) - len(kept)
+
+
+def _get(project: Project, path: str) -> Any:
+    section, _, key = path.partition(".")
+    value = getattr(project, section)
+    return (value or {}).get(key) if key else value
+
+
+def _set(project: Project, path: str, value: Any) -> None:
+    section, _, key = path.partition(".")
+    if key:
+        setattr(project, section, {**(getattr(project, section) or {}), key: value})
+    else:
+        setattr(project, section, value)
+
+
+def _tokens(value: Any, model: str) -> int:
+    if value is None or value == "" or value == [] or value == {}:
+        return 0
+    if isinstance(value, dict):
+        return sum(_tokens(v, model) for v in value.values())
+    if isinstance(value, list):
+        return sum(_tokens(v, model) for v in value)
+    return count_tokens(str(value), model)
+
+
+def truncate_text(text: str, max_tokens: int, model: str = "gpt-4o") -> str:
+    """Coupe un texte à environ max_tokens tokens, de préférence en fin de phrase ou de ligne."""
+    current = count_tokens(text, model)
+    if current <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+    cut = text[:int(len(text) * max_tokens / current)]
+    boundary = max(cut.rfind(". "), cut.rfind("\n"))
+    if boundary > len(cut) // 2:
+        cut = cut[:boundary + 1]
+    return cut.rstrip() + TRUNCATION_MARK
+
+
+class ContextPacker:
+    """
+    Borne la taille en tokens du contenu d'un projet avant son envoi au LLM.
+
+    Args:
+        budget: Taille maximale du contenu du projet, en tokens (hors prompt système)
+        model: Modèle cible (choix de l'encodage tiktoken)
+        sections: Sections réellement envoyées au LLM (les autres ne sont ni mesurées ni réduites)
+        max_item_tokens: Taille maximale d'un élément de liste avant raccourcissement
+        similarity: Seuil de similarité du dédoublonnage approché
+        trim_order: Champs réductibles, du moins au plus prioritaire
+        min_field_tokens: Taille minimale conservée pour un champ réduit
+    """
+
+    def __init__(self, budget: int = 8000, model: str = "gpt-4o", sections: Sequence[str] = SECTIONS,
+                 max_item_tokens: int = 150, similarity: float = 0.92,
+                 trim_order: Sequence[str] = TRIM_ORDER, min_field_tokens: int = 40):
+        self.budget = budget
+        self.model = model
+        self.sections = tuple(sections)
+        self.max_item_tokens = max_item_tokens
+        self.similarity = similarity
+        self.trim_order = tuple(path for path in trim_order if path.split(".")[0] in self.sections)
+        self.min_field_tokens = min_field_tokens
+
+    def measure(self, project: Project) -> Dict[str, int]:
+        """Taille en tokens de chaque section envoyée au LLM."""
+        return {section: _tokens(getattr(project, section), self.model) for section in self.sections}
+
+    def pack(self, project: Project) -> Tuple[Project, PackingReport]:
+        """
+        Produit une copie du projet tenant dans le budget. Le projet d'origine n'est pas modifié.
+
+        Returns:
+            Tuple (projet réduit, rapport)
+        """
+        packed = Project.from_dict(project.to_dict())
+        before = self.measure(packed)
+        report = PackingReport(self.budget, sum(before.values()), 0)
+
+        for path in LIST_FIELDS:
+            if path.split(".")[0] not in self.sections:
+                continue
+            items = _get(packed, path)
+            if not items:
+                continue
+            tokens_before = _tokens(items, self.model)
+            items, removed = dedupe_items(items, self.similarity)
+            shortened = 0
+            for i, item in enumerate(items):
+                if isinstance(item, str) and count_tokens(item, self.model) > self.max_item_tokens:
+                    items[i] = truncate_text(item, self.max_item_tokens, self.model)
+                    shortened += 1
+            if removed or shortened:
+                _set(packed, path, items)
+                report.actions.append(TrimAction(
+                    path, "dedupe" if removed else "shorten", tokens_before, _tokens(items, self.model),
+                    ", ".join(part for part in (
+                        f"{removed} doublon(s)" if removed else "",
+                        f"{shortened} élément(s) raccourci(s)" if shortened else "",
+                    ) if part)
+                ))
+
+        total = sum(self.measure(packed).values())
+        for path in self.trim_order:
+            if total <= self.budget:
+                break
+            value = _get(packed, path)
+            current = _tokens(value, self.model)
+            target = max(min(current, self.min_field_tokens), current - (total - self.budget))
+            if not value or target >= current:
+                continue
+            new_value, detail = self._shrink(value, target)
+            _set(packed, path, new_value)
+            new_tokens = _tokens(new_value, self.model)
+            report.actions.append(TrimAction(path, "truncate", current, new_tokens, detail))
+            total -= current - new_tokens
+
+        report.section_tokens = self.measure(packed)
+        report.tokens_after = sum(report.section_tokens.values())
+        return packed, report
+
+    def _shrink(self, value: Any, target: int) -> Tuple[Any, str]:
+        if isinstance(value, str):
+            return truncate_text(value, target, self.model), f"texte coupé à ~{target} tokens"
+
+        # Place réservée pour la mention des éléments retirés
+        target -= count_tokens(f"… et {len(value)} autre(s) élément(s) non repris", self.model)
+        kept, used = [], 0
+        for item in value:
+            item_tokens = _tokens(item, self.model)
+            if used + item_tokens > target:
+                break
+            kept.append(item)
+            used += item_tokens
+        dropped = len(value) - len(kept)
+        if dropped:
+            kept.append(f"… et {dropped} autre(s) élément(s) non repris")
+        return kept, f"{dropped} élément(s) sur {len(value)} non repris"
+
+
+def pack_project(project: Project, budget: int = 8000, model: str = "gpt-4o") -> Tuple[Project, PackingReport]:
+    """
+    Fonction utilitaire : copie du projet réduite à `budget` tokens.
+
+    Args:
+        project: Projet à réduire
+        budget: Taille maximale du contenu du projet, en tokens
+        model: Modèle cible
+
+    Returns:
+        Tuple (projet réduit, rapport)
+    """
+    return ContextPacker(budget=budget, model=model).pack(project)
@@ -0,0 +1,222 @@
+"""
+Modèle de chat local qui imite ChatOpenAI, pour les tests, les benchmarks et
+le mode service sans clé API : mêmes méthodes invoke() / stream(), mêmes
+objets de réponse (AIMessage avec usage_metadata), latence configurable.
+
+Le type de réponse est déduit du prompt reçu :
+- estimation budgétaire (instructions de format BudgetEstimate) -> JSON valide
+- estimation fan-out (liste des livrables, puis un livrable par appel) -> JSON valide
+- réparation Mermaid (MermaidRepairer) -> diagramme corrigé
+- condensation des notes (NotesCondenser) -> points JSON par rubrique
+- sinon -> CDC markdown avec diagrammes Mermaid
+
+Usage:
+    from utils.fake_llm import FakeChatModel
+    generator = CDCGenerator(llm=FakeChatModel(latency=0.2))
+"""
+import hashlib
+import json
+import random
+import re
+import time
+from typing import Any, Iterator, List
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+
+def _message_text(messages: Any) -> str:
+    """Concatène le texte des messages (BaseMessage, tuples (rôle, texte) ou chaîne)."""
+    if isinstance(messages, str):
+        return messages
+    parts = []
+    for message in messages:
+        if isinstance(message, tuple):
+            parts.append(str(message[1]))
+        else:
+            parts.append(str(getattr(message, "content", message)))
+    return "\n".join(parts)
+
+
+def count_tokens(text: str) -> int:
+    """Approximation grossière (4 caractères par token), suffisante pour des métriques locales."""
+    return max(1, len(text) // 4)
+
+
+class FakeChatModel:
+    """
+    Remplaçant local de ChatOpenAI.
+
+    Args:
+        latency: Délai avant le premier token, en secondes
+        tokens_per_second: Débit simulé en sortie (0 = instantané)
+        model: Nom de modèle reporté dans les métadonnées
+        seed: Graine du générateur (réponses déterministes pour un même prompt)
+        error_rate: Proportion de réponses tronquées (JSON invalide), pour exercer les relances
+    """
+
+    def __init__(self, latency: float = 0.0, tokens_per_second: float = 0.0,
+                 model: str = "fake-chat", seed: int = 0, error_rate: float = 0.0):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.model_name = model
+        self.seed = seed
+        self.error_rate = error_rate
+        self.calls = 0
+        # Tirage des erreurs indépendant du prompt : une relance peut réussir
+        self._errors = random.Random(seed)
+
+    def _respond(self, prompt: str) -> str:
+        content = self._content(prompt)
+        if self.error_rate and self._errors.random() < self.error_rate:
+            return content[:len(content) // 2]
+        return content
+
+    def _content(self, prompt: str) -> str:
+        rng = random.Random(self.seed ^ int(hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8], 16))
+        if "Liste les livrables à chiffrer" in prompt:
+            return json.dumps({"deliverables": _bullets(prompt)[:8] or ["Cadrage", "Conception", "Développement", "Recette"]},
+                              ensure_ascii=False)
+        if "Estime UNIQUEMENT le livrable" in prompt:
+            return _item_response(prompt, rng)
+        if "total_cost" in prompt and "tradeoffs" in prompt:
+            return _budget_response(prompt, rng)
+        if "Tu corriges des diagrammes Mermaid" in prompt:
+            return _repair_response(prompt)
+        if "Tu condenses des notes de réunion" in prompt:
+            return _condense_response(prompt, rng)
+        if "Tu fusionnes des points extraits" in prompt:
+            return _merge_response(prompt)
+        return _cdc_response(prompt, rng)
+
+    def _usage(self, prompt: str, content: str) -> dict:
+        input_tokens, output_tokens = count_tokens(prompt), count_tokens(content)
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens}
+
+    def invoke(self, messages: Any, **kwargs) -> AIMessage:
+        self.calls += 1
+        prompt = _message_text(messages)
+        content = self._respond(prompt)
+        delay = self.latency + (count_tokens(content) / self.tokens_per_second if self.tokens_per_second else 0)
+        if delay:
+            time.sleep(delay)
+        return AIMessage(
+            content=content,
+            usage_metadata=self._usage(prompt, content),  # type: ignore
+            response_metadata={"model_name": self.model_name},
+        )
+
+    def stream(self, messages: Any, chunk_words: int = 8, **kwargs) -> Iterator[AIMessageChunk]:
+        """Produit la réponse par morceaux de chunk_words mots ; le dernier porte usage_metadata."""
+        self.calls += 1
+        prompt = _message_text(messages)
+        content = self._respond(prompt)
+        if self.latency:
+            time.sleep(self.latency)
+
+        pieces = re.findall(r"\S+\s*|\s+", content)
+        for start in range(0, len(pieces), chunk_words):
+            text = "".join(pieces[start:start + chunk_words])
+            if self.tokens_per_second:
+                time.sleep(count_tokens(text) / self.tokens_per_second)
+            yield AIMessageChunk(content=text)
+        yield AIMessageChunk(content="", usage_metadata=self._usage(prompt, content))  # type: ignore
+
+
+def _field(prompt: str, label: str, default: str = "N/A") -> str:
+    match = re.search(rf"{re.escape(label)}:\s*(.+)", prompt)
+    return match.group(1).strip() if match else default
+
+
+def _bullets(prompt: str) -> List[str]:
+    return [item.strip() for item in re.findall(r"^\s+[-•✓]\s+(.+)$", prompt, re.MULTILINE)]
+
+
+def _budget_response(prompt: str, rng: random.Random) -> str:
+    names = _bullets(prompt)[:25] or ["Cadrage", "Conception", "Développement", "Recette"]
+    items = []
+    for name in names:
+        hours = float(rng.randint(4, 60))
+        rate = float(rng.choice([450, 550, 650])) / 8
+        items.append({
+            "name": name[:80],
+            "description": f"Réalisation : {name[:80]}",
+            "estimated_hours": hours,
+            "hourly_rate": rate,
+            "cost": round(hours * rate, 2),
+        })
+    return json.dumps({
+        "items": items,
+        "total_cost": round(sum(item["cost"] for item in items), 2),
+        "total_hours": sum(item["estimated_hours"] for item in items),
+        "tradeoffs": "Réduire le périmètre de la première version pour tenir l'enveloppe.",
+        "deliverables": [item["name"] for item in items],
+    }, ensure_ascii=False)
+
+
+def _item_response(prompt: str, rng: random.Random) -> str:
+    match = re.search(r"Livrable à estimer\s*:\s*(.+)", prompt)
+    name = (match.group(1).strip() if match else "Livrable")[:80]
+    hours = float(rng.randint(4, 60))
+    rate = float(rng.choice([450, 550, 650])) / 8
+    return json.dumps({
+        "name": name,
+        "description": f"Réalisation : {name}",
+        "estimated_hours": hours,
+        "hourly_rate": rate,
+        # Arithmétique volontairement approximative : le coût est recalculé localement
+        "cost": round(hours * rate * rng.uniform(0.9, 1.1), 2),
+    }, ensure_ascii=False)
+
+
+def _repair_response(prompt: str) -> str:
+    # Réponse toujours valide : le but est d'exercer le circuit de réparation, pas de corriger
+    return "flowchart TD\n    A[Demande] --> B[Validation]\n    B --> C[Production]"
+
+
+def _condense_response(prompt: str, rng: random.Random) -> str:
+    match = re.search(r"parmi : ([\w, ]+)\.", prompt)
+    keys = match.group(1).split(", ") if match else ["autres"]
+    passage = prompt.split(" :\n", 1)[-1]
+    sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", passage) if len(s.strip()) > 20]
+    sections: dict = {}
+    for sentence in rng.sample(sentences, min(len(sentences), 6)):
+        sections.setdefault(rng.choice(keys), []).append(sentence[:160])
+    return json.dumps(sections, ensure_ascii=False)
+
+
+def _merge_response(prompt: str) -> str:
+    match = re.search(r"au plus (\d+) points", prompt)
+    return json.dumps(_bullets(prompt)[:int(match.group(1)) if match else 10], ensure_ascii=False)
+
+
+def _cdc_response(prompt: str, rng: random.Random) -> str:
+    project_name = _field(prompt, "Nom du projet")
+    bullets = _bullets(prompt) or ["Objectif principal"]
+    sections = [
+        "Infos projet", "Contexte & déclencheur", "Objectifs SMART", "Cibles", "Périmètre",
+        "Livrables attendus", "Contraintes", "Planning", "Organisation & gouvernance",
+        "Budget", "Recette", "Risques", "Annexes",
+    ]
+    lines = [f"# Cahier des Charges - {project_name}", ""]
+    for number, title in enumerate(sections):
+        lines.append(f"## {number}. {title}")
+        lines.append("")
+        for bullet in rng.sample(bullets, min(len(bullets), 4)):
+            lines.append(f"- {bullet}")
+        lines.append("")
+        if title == "Planning":
+            lines += [
+                "```mermaid", "gantt", "    title Planning du projet", "    dateFormat YYYY-MM-DD",
+                "    section Phase 1", "    Analyse besoins :a1, 2026-02-01, 7d",
+                "    Conception :a2, after a1, 14d", "```", "",
+            ]
+        elif title == "Organisation & gouvernance":
+            lines += [
+                "```mermaid", "flowchart TD", "    A[Demande] --> B{Validation}",
+                "    B -->|OK| C[Production]", "    B -->|KO| D[Ajustements]", "```", "",
+            ]
+    lines.append("⚖️ Ce document engage les parties. Toute modification nécessite un avenant signé.")
+    lines.append("")
+    lines.append("✅ Prêt pour devis/production ?")
+    return "\n".join(lines)
@@ -0,0 +1,138 @@
+"""
+Serveur webhook local qui se comporte comme le webhook n8n, pour les tests et
+les benchmarks : accepte les POST JSON (gzip ou non), vérifie la clé API et
+compte les soumissions reçues. Latence et taux d'erreur sont configurables.
+
+Usage CLI:
+    python -m utils.fake_webhook_server --port 5678 --latency 0.05
+"""
+import argparse
+import asyncio
+import gzip
+import random
+import threading
+from typing import Any, Dict, List, Optional
+
+import orjson
+from aiohttp import web
+
+from utils.webhook_client import API_KEY_HEADER
+
+
+class FakeWebhookServer:
+    """
+    Remplaçant local du webhook n8n.
+
+    Args:
+        api_key: Clé attendue dans l'en-tête API-KEY-CDC (pas de vérification si None)
+        latency: Délai artificiel avant chaque réponse, en secondes
+        failure_rate: Proportion de requêtes répondues en 503 (0 à 1)
+        keep_payloads: Conserver les payloads décodés dans self.received
+    """
+
+    def __init__(self, api_key: Optional[str] = None, latency: float = 0.0,
+                 failure_rate: float = 0.0, keep_payloads: bool = False):
+        self.api_key = api_key
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.keep_payloads = keep_payloads
+        self.received: List[Dict[str, Any]] = []
+        self.request_count = 0
+        self.accepted_count = 0
+        self.url: Optional[str] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.request_count += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.api_key and request.headers.get(API_KEY_HEADER) != self.api_key:
+            return web.json_response({"error": "invalid api key"}, status=401)
+        if self.failure_rate and random.random() < self.failure_rate:
+            return web.json_response({"error": "unavailable"}, status=503)
+
+        body = await request.read()
+        if request.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        try:
+            payload = orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return web.json_response({"error": "invalid json"}, status=400)
+
+        self.accepted_count += 1
+        if self.keep_payloads:
+            self.received.append(payload)
+        return web.json_response({"status": "received"})
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Démarre le serveur dans la boucle courante ; retourne son URL."""
+        # aiohttp décompresse lui-même les corps gzip si on le laisse faire :
+        # on garde la main pour mesurer ce qui transite réellement
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/{tail:.*}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None, auto_decompress=False)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        actual_port = site._server.sockets[0].getsockname()[1]  # type: ignore
+        self.url = f"http://{host}:{actual_port}/webhook/cdc"
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def start_in_thread(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Démarre le serveur dans un thread dédié (pour du code synchrone) ; retourne son URL."""
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self.start(host, port))
+            ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.stop())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="fake-webhook", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self.url  # type: ignore
+
+    def stop_thread(self) -> None:
+        if self._loop is not None and self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._thread = None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serveur webhook local (remplaçant de n8n)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5678)
+    parser.add_argument("--api-key", default=None)
+    parser.add_argument("--latency", type=float, default=0.0, help="délai de réponse en secondes")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="proportion de réponses 503")
+    args = parser.parse_args()
+
+    async def run():
+        server = FakeWebhookServer(args.api_key, args.latency, args.failure_rate)
+        url = await server.start(args.host, args.port)
+        print(f"🛰️  Webhook local en écoute sur {url}")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.stop()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Empreintes des entrées réellement lues par chaque calcul.
+
+BudgetEstimator._project_to_context ne lit qu'une partie du projet (ni les
+contacts, ni le budget, ni les notes, et seulement trois champs de meta) :
+une empreinte du projet entier invaliderait l'estimation à chaque
+modification. On tient donc une carte des dépendances, de chaque résultat
+(estimation budgétaire, sections du CDC…) vers les champs du Project qu'il
+lit, et l'empreinte d'un résultat ne porte que sur ces champs.
+
+Chemins de champs :
+    "objectives"              section entière
+    "meta.project_name"       clé d'une section dict
+    "attachments[].sha256"    clé de chaque élément d'une section liste
+
+Les cartes doivent suivre le code qui construit les prompts : un champ lu
+mais absent de la carte donnerait un résultat périmé.
+
+Usage:
+    key = output_fingerprint(project, "budget", model="gpt-4o-mini")
+    stale_outputs(old_project, new_project)  # ["cdc"] si seules les notes ont changé
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import orjson
+
+from models.Project import Project, SECTIONS
+
+
+# Champs lus par BudgetEstimator (_project_to_context et extraits des documents joints)
+BUDGET_FIELDS: Tuple[str, ...] = (
+    "meta.project_name", "meta.client_name", "meta.entreprise_name",
+    "context", "objectives", "targets", "scope", "deliverables", "constraints", "timeline",
+    "governance.decision_maker", "governance.validators",
+    "acceptance.criteria", "risks",
+    "attachments[].sha256", "attachments[].name",
+)
+
+# Champs qui alimentent chaque section du CDC (structure du prompt système de CDCGenerator)
+CDC_SECTION_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "Infos projet": ("meta",),
+    "Contexte & déclencheur": ("context", "notes", "attachments[].sha256"),
+    "Objectifs SMART": ("objectives", "context.stakes", "notes", "attachments[].sha256"),
+    "Cibles": ("targets", "notes", "attachments[].sha256"),
+    "Périmètre": ("scope", "notes", "attachments[].sha256"),
+    "Livrables attendus": ("deliverables", "scope.in", "notes", "attachments[].sha256"),
+    "Contraintes": ("constraints", "notes", "attachments[].sha256"),
+    "Planning": ("timeline", "deliverables", "notes", "attachments[].sha256"),
+    "Organisation & gouvernance": ("governance", "notes"),
+    "Budget": ("budget", "notes", "attachments[].sha256"),
+    "Recette": ("acceptance.criteria", "objectives", "notes", "attachments[].sha256"),
+    "Risques": ("risks", "constraints", "notes"),
+    "Annexes": ("attachments[].sha256", "attachments[].name"),
+}
+
+# Champs lus par chaque résultat. Le CDC est produit en un seul appel : il dépend
+# de l'union des champs de ses sections.
+OUTPUT_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "budget": BUDGET_FIELDS,
+    "cdc": tuple(dict.fromkeys(path for fields in CDC_SECTION_FIELDS.values() for path in fields)),
+    "notes": ("notes",),
+}
+
+
+def field_value(project: Project, path: str) -> Any:
+    """
+    Valeur d'un champ du projet désigné par son chemin (voir l'en-tête du module).
+
+    Args:
+        project: Projet à lire
+        path: Chemin du champ
+
+    Returns:
+        Valeur du champ (None si absent)
+    """
+    section, _, key = path.partition(".")
+    if section.endswith("[]"):
+        return [item.get(key) if isinstance(item, dict) else None for item in getattr(project, section[:-2]) or []]
+    value = getattr(project, section)
+    return (value or {}).get(key) if key else value
+
+
+def fingerprint(project: Project, fields: Iterable[str] = SECTIONS, **params: Any) -> str:
+    """
+    Empreinte d'un sous-ensemble des champs d'un projet.
+
+    Args:
+        project: Projet à empreindre
+        fields: Chemins des champs pris en compte
+        **params: Paramètres du calcul à inclure (modèle, mode…)
+
+    Returns:
+        Hash hexadécimal (sha256) des valeurs sérialisées, clés triées
+    """
+    content = {path: field_value(project, path) for path in fields}
+    if params:
+        content["__params__"] = params
+    return hashlib.sha256(orjson.dumps(content, option=orjson.OPT_SORT_KEYS, default=str)).hexdigest()
+
+
+def output_fingerprint(project: Project, output: str, **params: Any) -> str:
+    """
+    Empreinte des seuls champs lus par un résultat.
+
+    Args:
+        project: Projet à empreindre
+        output: "budget", "cdc", "notes" ou un titre de section de CDC_SECTION_FIELDS
+        **params: Paramètres du calcul à inclure (modèle, mode…)
+
+    Returns:
+        Hash hexadécimal
+    """
+    fields = OUTPUT_FIELDS.get(output) or CDC_SECTION_FIELDS.get(output)
+    if fields is None:
+        raise KeyError(f"Unknown output: {output}")
+    return fingerprint(project, fields, output=output, **params)
+
+
+def changed_fields(old: Project, new: Project, fields: Optional[Sequence[str]] = None) -> List[str]:
+    """Chemins des champs (sections par défaut) dont la valeur diffère entre deux projets."""
+    return [path for path in (fields or SECTIONS) if field_value(old, path) != field_value(new, path)]
+
+
+def stale_outputs(old: Project, new: Project, outputs: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    Résultats à recalculer après le passage de `old` à `new`.
+
+    Args:
+        old: Projet sur lequel les résultats ont été calculés
+        new: Projet modifié
+        outputs: Résultats à examiner (ceux de OUTPUT_FIELDS par défaut)
+
+    Returns:
+        Noms des résultats dont au moins un champ lu a changé
+    """
+    names = list(outputs) if outputs is not None else list(OUTPUT_FIELDS)
+    return [name for name in names
+            if changed_fields(old, new, OUTPUT_FIELDS.get(name) or CDC_SECTION_FIELDS[name])]
+
+
+class FingerprintCache:
+    """
+    Résultats indexés par empreinte (LRU, partagé entre threads).
+
+    Args:
+        maxsize: Nombre de résultats conservés
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._items: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if key not in self._items:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return self._items[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._items)
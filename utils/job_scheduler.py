@@ -0,0 +1,228 @@
+"""
+Ordonnanceur des tâches LLM (estimation budgétaire, génération de CDC).
+
+Les tâches sont exécutées par un nombre fixe de threads, ce qui plafonne les
+appels LLM simultanés. Ordre de passage :
+- priorité stricte : les tâches INTERACTIVE passent avant les tâches BATCH ;
+- équité : à priorité égale, les auteurs sont servis à tour de rôle, si bien
+  qu'un lot de 500 projets d'un consultant ne bloque pas les autres ;
+- réserve : des places sont gardées pour les tâches interactives, qui
+  démarrent sans attendre la fin d'un appel du lot en cours.
+
+Usage:
+    scheduler = JobScheduler(max_concurrent=4)
+    future = scheduler.submit_estimate(project, priority=Priority.INTERACTIVE, api_key=key)
+    result = future.result()
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Callable, Deque, Dict, Optional
+
+from models.Project import Project
+
+
+class Priority(IntEnum):
+    """Priorité d'une tâche (plus petit = servi en premier)."""
+    INTERACTIVE = 0
+    BATCH = 1
+
+
+class SchedulerFull(Exception):
+    """Levée par submit() quand la file d'attente a atteint max_queued."""
+
+
+@dataclass
+class _Job:
+    fn: Callable[..., Any]
+    args: tuple
+    kwargs: dict
+    priority: Priority
+    author: str
+    future: Future = field(default_factory=Future)
+    submitted_at: float = field(default_factory=time.perf_counter)
+
+
+def _percentile(values, p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+class JobScheduler:
+    """
+    File de tâches à priorités, équitable par auteur, à concurrence plafonnée.
+
+    Args:
+        max_concurrent: Nombre maximum de tâches exécutées en même temps
+        interactive_reserve: Places réservées aux tâches INTERACTIVE (les tâches
+                             BATCH en occupent au plus max_concurrent - réserve)
+        max_queued: Tâches en attente maximum (None = illimité) ; au-delà, submit() lève SchedulerFull
+        name: Préfixe des noms de threads
+    """
+
+    def __init__(self, max_concurrent: int = 4, interactive_reserve: int = 1,
+                 max_queued: Optional[int] = None, name: str = "llm-job"):
+        self.max_concurrent = max_concurrent
+        self.batch_limit = max(1, max_concurrent - interactive_reserve)
+        self.max_queued = max_queued
+        self._condition = threading.Condition()
+        # Par priorité : auteur -> tâches en attente ; l'ordre des clés donne le tour de rôle
+        self._queues: Dict[Priority, "OrderedDict[str, Deque[_Job]]"] = {p: OrderedDict() for p in Priority}
+        self._queued = {p: 0 for p in Priority}
+        self._running = {p: 0 for p in Priority}
+        self._completed = {p: 0 for p in Priority}
+        self._failed = {p: 0 for p in Priority}
+        self._waits: Dict[Priority, Deque[float]] = {p: deque(maxlen=1000) for p in Priority}
+        self._shutdown = False
+        self._threads = [
+            threading.Thread(target=self._run, name=f"{name}-{i}", daemon=True) for i in range(max_concurrent)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, fn: Callable[..., Any], *args, priority: Priority = Priority.BATCH,
+               author: Optional[str] = None, **kwargs) -> Future:
+        """
+        Place une tâche dans la file.
+
+        Args:
+            fn: Fonction à exécuter (dans un thread de l'ordonnanceur)
+            *args, **kwargs: Arguments de fn
+            priority: Priority.INTERACTIVE (soumission depuis l'interface) ou Priority.BATCH
+            author: Auteur de la tâche, pour le tour de rôle (None = anonyme)
+
+        Returns:
+            Future du résultat de fn
+        """
+        job = _Job(fn, args, kwargs, Priority(priority), author or "")
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("cannot submit after shutdown")
+            if self.max_queued is not None and sum(self._queued.values()) >= self.max_queued:
+                raise SchedulerFull(f"{self.max_queued} jobs already queued")
+            self._queues[job.priority].setdefault(job.author, deque()).append(job)
+            self._queued[job.priority] += 1
+            self._condition.notify_all()
+        return job.future
+
+    def submit_estimate(self, project: Project, priority: Priority = Priority.BATCH,
+                        author: Optional[str] = None, **kwargs) -> Future:
+        """Planifie estimate_project_budget(project, **kwargs) ; l'auteur par défaut est celui du projet."""
+        from utils.budget_estimator import estimate_project_budget
+        return self.submit(estimate_project_budget, project, priority=priority,
+                           author=author or project.meta.get("author"), **kwargs)
+
+    def submit_generation(self, project: Project, priority: Priority = Priority.BATCH,
+                          author: Optional[str] = None, **kwargs) -> Future:
+        """Planifie generate_cdc_from_project(project, **kwargs) ; l'auteur par défaut est celui du projet."""
+        from utils.cdc_generator import generate_cdc_from_project
+        return self.submit(generate_cdc_from_project, project, priority=priority,
+                           author=author or project.meta.get("author"), **kwargs)
+
+    def _next_job(self) -> Optional[_Job]:
+        # Appelé avec self._condition verrouillé
+        for priority in Priority:
+            authors = self._queues[priority]
+            if not authors:
+                continue
+            if priority != Priority.INTERACTIVE and self._running[priority] >= self.batch_limit:
+                continue
+            author, jobs = next(iter(authors.items()))
+            job = jobs.popleft()
+            if jobs:
+                authors.move_to_end(author)
+            else:
+                del authors[author]
+            self._queued[priority] -= 1
+            return job
+        return None
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                job = self._next_job()
+                while job is None:
+                    # À l'arrêt, on ne sort qu'une fois la file vidée
+                    if self._shutdown and not any(self._queued.values()):
+                        return
+                    self._condition.wait()
+                    job = self._next_job()
+                self._running[job.priority] += 1
+                self._waits[job.priority].append(time.perf_counter() - job.submitted_at)
+
+            if job.future.set_running_or_notify_cancel():
+                try:
+                    job.future.set_result(job.fn(*job.args, **job.kwargs))
+                except BaseException as e:
+                    job.future.set_exception(e)
+
+            with self._condition:
+                self._running[job.priority] -= 1
+                if job.future.cancelled() or job.future.exception() is not None:
+                    self._failed[job.priority] += 1
+                else:
+                    self._completed[job.priority] += 1
+                # Une place BATCH a pu se libérer
+                self._condition.notify_all()
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Profondeur de file, tâches en cours et temps d'attente par priorité.
+
+        Returns:
+            {"queued": n, "running": n, "max_concurrent": n,
+             "interactive": {...}, "batch": {...}} ; chaque priorité contient
+            queued, running, completed, failed, wait_p50_ms et wait_p95_ms
+            (sur les 1000 dernières tâches démarrées)
+        """
+        with self._condition:
+            per_priority = {
+                priority.name.lower(): {
+                    "queued": self._queued[priority],
+                    "running": self._running[priority],
+                    "completed": self._completed[priority],
+                    "failed": self._failed[priority],
+                    "wait_p50_ms": _percentile(self._waits[priority], 50) * 1000,
+                    "wait_p95_ms": _percentile(self._waits[priority], 95) * 1000,
+                }
+                for priority in Priority
+            }
+            return {
+                "queued": sum(self._queued.values()),
+                "running": sum(self._running.values()),
+                "max_concurrent": self.max_concurrent,
+                **per_priority,
+            }
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False) -> None:
+        """
+        Arrête l'ordonnanceur une fois la file vidée.
+
+        Args:
+            wait: Attendre la fin des threads
+            cancel_pending: Annuler les tâches encore en attente au lieu de les exécuter
+        """
+        with self._condition:
+            self._shutdown = True
+            if cancel_pending:
+                for priority, authors in self._queues.items():
+                    for jobs in authors.values():
+                        for job in jobs:
+                            job.future.cancel()
+                    authors.clear()
+                    self._queued[priority] = 0
+            self._condition.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def __enter__(self) -> "JobScheduler":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
@@ -0,0 +1,198 @@
+"""
+Suivi de la mémoire par étape sur les sessions longues (interface, lots).
+
+Mode optionnel, activé par CDC_MEMORY_TRACKING=1 (ou --track-memory) : il
+coûte cher (tracemalloc ralentit chaque allocation). À la fin de chaque
+étape (`with tracker.stage("budget")`), la mémoire tracée est relevée ; tous
+les `every` passages, un instantané tracemalloc remplace le précédent. Le
+rapport compare le dernier instantané à celui pris après l'échauffement
+(`warmup` passages, le temps que les caches bornés se remplissent) : une
+croissance qui continue au-delà désigne une fuite, avec ses sites d'allocation.
+
+L'instantané couvre tout le processus : pour une étape, il mesure la mémoire
+encore retenue à la fin de l'étape, quel que soit le code qui l'a allouée.
+
+Usage:
+    tracker = MemoryTracker.from_env()          # None si CDC_MEMORY_TRACKING n'est pas défini
+    with track_stage(tracker, "generation"):
+        generator.generate_cdc(project)
+    print(tracker.report())
+
+    CDC_MEMORY_TRACKING=50 python main_test.py   # instantané tous les 50 Submit
+    python -m benchmarks.memory_soak --submissions 10000
+"""
+import gc
+import os
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import ContextManager, Dict, Iterator, List, Optional, Tuple
+
+
+ENV_VAR = "CDC_MEMORY_TRACKING"
+
+# Allocations du suivi lui-même, exclues des comparaisons
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def rss_bytes() -> Optional[int]:
+    """Mémoire résidente actuelle du processus (None si indisponible sur ce système)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _slope(points: List[Tuple[int, int]]) -> float:
+    """Pente (octets par passage) de la droite des moindres carrés."""
+    if len(points) < 2:
+        return 0.0
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance if variance else 0.0
+
+
+@dataclass
+class StageMemory:
+    """Mesures d'une étape : passages, mémoire tracée aux instantanés, instantanés de référence et courant."""
+    name: str
+    runs: int = 0
+    # (passage, mémoire tracée retenue en octets) à chaque instantané
+    points: List[Tuple[int, int]] = field(default_factory=list)
+    baseline: Optional[tracemalloc.Snapshot] = None
+    latest: Optional[tracemalloc.Snapshot] = None
+
+    @property
+    def growth(self) -> int:
+        """Mémoire tracée gagnée depuis l'échauffement, en octets."""
+        return self.points[-1][1] - self.points[0][1] if len(self.points) > 1 else 0
+
+    @property
+    def growth_per_run(self) -> float:
+        return _slope(self.points)
+
+
+class MemoryTracker:
+    """
+    Instantanés tracemalloc par étape, comparés d'un passage à l'autre.
+
+    Args:
+        every: Passages d'une étape entre deux instantanés
+        warmup: Passages avant l'instantané de référence
+        frames: Profondeur des piles enregistrées par tracemalloc
+    """
+
+    def __init__(self, every: int = 100, warmup: int = 1, frames: int = 1):
+        self.every = max(1, every)
+        self.warmup = max(1, warmup)
+        self.frames = frames
+        self.stages: Dict[str, StageMemory] = {}
+        self.rss_start = rss_bytes()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional["MemoryTracker"]:
+        """Suivi configuré par CDC_MEMORY_TRACKING ("1" ou période des instantanés), None s'il est absent."""
+        value = os.getenv(ENV_VAR, "").strip()
+        if value.lower() in ("", "0", "false", "no"):
+            return None
+        return cls(every=int(value)) if value.isdigit() and int(value) > 1 else cls()
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+
+    def stop(self) -> None:
+        """Arrête tracemalloc (les mesures déjà prises restent disponibles)."""
+        tracemalloc.stop()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Relève la mémoire à la fin du bloc (instantané tous les `every` passages de l'étape)."""
+        self.start()
+        try:
+            yield
+        finally:
+            self._after(name)
+
+    def _after(self, name: str) -> None:
+        with self._lock:
+            stage = self.stages.setdefault(name, StageMemory(name))
+            stage.runs += 1
+            since_warmup = stage.runs - self.warmup
+            if since_warmup < 0 or since_warmup % self.every:
+                return
+            # Seule la mémoire retenue compte : les cycles en attente du ramasse-miettes sont libérés avant
+            gc.collect()
+            snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+            if stage.baseline is None:
+                stage.baseline = snapshot
+            else:
+                stage.latest = snapshot
+            # Total de l'instantané filtré : les instantanés conservés ne comptent pas dans la croissance
+            stage.points.append((stage.runs, sum(trace.size for trace in snapshot.traces)))
+
+    def growing_sites(self, name: str, top: int = 10) -> List[Tuple[str, int, int]]:
+        """
+        Sites d'allocation dont la mémoire retenue a le plus augmenté depuis l'échauffement.
+
+        Args:
+            name: Étape
+            top: Nombre de sites
+
+        Returns:
+            Liste (fichier:ligne, octets gagnés, allocations gagnées), par octets décroissants
+        """
+        stage = self.stages.get(name)
+        if stage is None or stage.baseline is None or stage.latest is None:
+            return []
+        sites = []
+        for diff in stage.latest.compare_to(stage.baseline, "lineno"):
+            if diff.size_diff <= 0:
+                continue
+            frame = diff.traceback[0]
+            sites.append((f"{frame.filename}:{frame.lineno}", diff.size_diff, diff.count_diff))
+            if len(sites) == top:
+                break
+        return sites
+
+    def report(self, top: int = 10) -> str:
+        """Rapport texte : croissance de chaque étape depuis l'échauffement et ses principaux sites."""
+        lines = []
+        rss = rss_bytes()
+        if rss is not None and self.rss_start is not None:
+            lines.append(f"RSS : {self.rss_start / 1e6:.1f} Mo -> {rss / 1e6:.1f} Mo")
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        lines.append(f"Mémoire tracée : {current / 1e6:.1f} Mo (pic {peak / 1e6:.1f} Mo)")
+        with self._lock:
+            stages = list(self.stages.values())
+        for stage in stages:
+            lines.append(f"=== {stage.name} : {stage.runs} passage(s), {stage.growth / 1024:+.1f} Ko depuis l'échauffement "
+                         f"({stage.growth_per_run:+.1f} octets/passage)")
+            for site, size, count in self.growing_sites(stage.name, top):
+                lines.append(f"  {size / 1024:+10.1f} Ko {count:+8d} allocations  {site}")
+        return "\n".join(lines)
+
+
+def track_stage(tracker: Optional[MemoryTracker], name: str) -> ContextManager[None]:
+    """
+    Fonction utilitaire : étape suivie si un MemoryTracker est fourni, sans effet sinon.
+
+    Args:
+        tracker: Suivi actif (None = désactivé)
+        name: Nom de l'étape
+
+    Returns:
+        Gestionnaire de contexte
+    """
+    return tracker.stage(name) if tracker is not None else nullcontext()
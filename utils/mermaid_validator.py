@@ -0,0 +1,425 @@
+"""
+Validation locale des diagrammes Mermaid d'un CDC et réparation ciblée.
+
+Le prompt système impose 2 à 3 diagrammes (Gantt, flowchart, pie, journey).
+Plutôt que de régénérer tout le CDC quand un diagramme est cassé, on extrait
+les blocs ```mermaid, on les valide avec un petit parseur local et on ne
+renvoie au LLM que les blocs invalides, avant de les réinsérer à leur place.
+
+Les types de diagrammes non couverts (sequenceDiagram, classDiagram…) ne sont
+pas validés : ils sont considérés comme corrects.
+"""
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+
+MERMAID_BLOCK_RE = re.compile(r"```mermaid[ \t]*\n(.*?)\n[ \t]*```", re.DOTALL)
+
+GANTT_DIRECTIVES = (
+    "title", "dateFormat", "axisFormat", "excludes", "includes", "todayMarker",
+    "tickInterval", "weekday", "displayMode", "accTitle", "accDescr",
+)
+GANTT_TAGS = {"done", "active", "crit", "milestone"}
+DURATION_RE = re.compile(r"^\d+(\.\d+)?(ms|s|m|h|d|w)$")
+TASK_ID_RE = re.compile(r"^[A-Za-z_][\w-]*$")
+
+FLOWCHART_DIRECTIONS = {"TB", "TD", "BT", "RL", "LR"}
+FLOWCHART_KEYWORDS = ("classDef", "class ", "style ", "linkStyle", "click ", "direction ", "accTitle", "accDescr")
+# Délimiteurs de formes de nœuds, du plus long au plus court
+NODE_SHAPES = (
+    ("(((", ")))"), ("((", "))"), ("([", "])"), ("[[", "]]"), ("[(", ")]"),
+    ("{{", "}}"), ("[/", "/]"), ("[\\", "\\]"), ("[/", "\\]"), ("[\\", "/]"),
+    ("[", "]"), ("(", ")"), ("{", "}"), (">", "]"),
+)
+DANGLING_EDGE_RE = re.compile(r"(--+>?|==+>?|-\.+->?)\s*(\|[^|]*\|)?\s*$")
+
+PIE_ENTRY_RE = re.compile(r'^"([^"]+)"\s*:\s*(\S+)$')
+JOURNEY_TASK_RE = re.compile(r"^([^:]+):\s*(\S+)\s*(?::\s*(.*))?$")
+
+
+@dataclass
+class MermaidBlock:
+    """Un bloc ```mermaid extrait du CDC, avec sa position (code seul, sans les balises)."""
+    start: int
+    end: int
+    code: str
+
+    @property
+    def diagram_type(self) -> str:
+        for line in self.code.splitlines():
+            stripped = line.strip()
+            if stripped and not stripped.startswith("%%"):
+                return stripped.split()[0]
+        return ""
+
+
+@dataclass
+class DiagramReport:
+    """Résultat de la validation (et éventuelle réparation) d'un bloc."""
+    index: int
+    diagram_type: str
+    errors: List[str] = field(default_factory=list)
+    repaired: bool = False
+    remaining_errors: List[str] = field(default_factory=list)
+    repair_tokens: int = 0
+
+
+def extract_mermaid_blocks(markdown: str) -> List[MermaidBlock]:
+    """
+    Extrait les blocs ```mermaid d'un document markdown.
+
+    Args:
+        markdown: Contenu du CDC
+
+    Returns:
+        Liste des blocs dans l'ordre du document
+    """
+    return [
+        MermaidBlock(start=match.start(1), end=match.end(1), code=match.group(1))
+        for match in MERMAID_BLOCK_RE.finditer(markdown)
+    ]
+
+
+def _content_lines(code: str) -> List[Tuple[int, str]]:
+    """Lignes utiles (numérotées à partir de 1), sans commentaires %% ni lignes vides."""
+    lines = []
+    for number, line in enumerate(code.splitlines(), 1):
+        stripped = line.strip()
+        if stripped and not stripped.startswith("%%"):
+            lines.append((number, stripped))
+    return lines
+
+
+def _moment_format_to_strptime(date_format: str) -> Optional[str]:
+    mapping = (("YYYY", "%Y"), ("MM", "%m"), ("DD", "%d"), ("HH", "%H"), ("mm", "%M"), ("ss", "%S"))
+    result = date_format
+    for moment, strptime in mapping:
+        result = result.replace(moment, strptime)
+    # Jetons moment.js non gérés : on ne vérifie pas les dates
+    return None if re.search(r"[A-Za-z]", re.sub(r"%[YmdHMS]|T", "", result)) else result
+
+
+def validate_gantt(code: str) -> List[str]:
+    errors = []
+    lines = _content_lines(code)
+    date_format = "%Y-%m-%d"
+    task_ids = set()
+    after_refs: List[Tuple[int, str]] = []
+    task_count = 0
+
+    for number, line in lines[1:]:
+        keyword = line.split()[0]
+        if keyword in GANTT_DIRECTIVES:
+            if keyword == "dateFormat":
+                parts = line.split(None, 1)
+                if len(parts) < 2:
+                    errors.append(f"ligne {number}: dateFormat sans format")
+                else:
+                    date_format = _moment_format_to_strptime(parts[1].strip())  # type: ignore
+            continue
+        if keyword == "section":
+            if len(line.split(None, 1)) < 2:
+                errors.append(f"ligne {number}: section sans nom")
+            continue
+
+        # Tâche : "Nom : [tags,] [id,] début, fin"
+        if ":" not in line:
+            errors.append(f"ligne {number}: tâche sans ':' ({line!r})")
+            continue
+        name, metadata = line.split(":", 1)
+        if not name.strip():
+            errors.append(f"ligne {number}: tâche sans nom")
+        parts = [part.strip() for part in metadata.split(",")]
+        if not parts or not parts[-1]:
+            errors.append(f"ligne {number}: tâche sans durée ni date de fin")
+            continue
+        task_count += 1
+
+        while parts and parts[0] in GANTT_TAGS:
+            parts.pop(0)
+        if len(parts) == 3 or (len(parts) == 2 and not _is_gantt_start(parts[0], date_format)):
+            task_id = parts.pop(0)
+            if not TASK_ID_RE.match(task_id):
+                errors.append(f"ligne {number}: identifiant de tâche invalide {task_id!r}")
+            task_ids.add(task_id)
+        if len(parts) > 2:
+            errors.append(f"ligne {number}: trop d'éléments dans la tâche ({metadata.strip()!r})")
+            continue
+
+        if len(parts) == 2:
+            start = parts[0]
+            if start.startswith("after "):
+                after_refs.extend((number, ref) for ref in start.split()[1:])
+            elif not _is_date(start, date_format):
+                errors.append(f"ligne {number}: date de début invalide {start!r}")
+        end = parts[-1]
+        if not (DURATION_RE.match(end) or _is_date(end, date_format) or end.startswith(("after ", "until "))):
+            errors.append(f"ligne {number}: durée ou date de fin invalide {end!r}")
+
+    for number, ref in after_refs:
+        if ref not in task_ids:
+            errors.append(f"ligne {number}: 'after {ref}' référence une tâche inconnue")
+    if task_count == 0:
+        errors.append("diagramme Gantt sans aucune tâche")
+    return errors
+
+
+def _is_gantt_start(value: str, date_format: Optional[str]) -> bool:
+    return value.startswith("after ") or _is_date(value, date_format)
+
+
+def _is_date(value: str, date_format: Optional[str]) -> bool:
+    if date_format is None:
+        return bool(re.match(r"^\d", value))
+    try:
+        datetime.strptime(value, date_format)
+        return True
+    except ValueError:
+        return False
+
+
+def _check_flowchart_line(line: str) -> Optional[str]:
+    """Vérifie les formes de nœuds d'une ligne : délimiteurs équilibrés, pas de caractère spécial non échappé."""
+    # Les textes entre guillemets et les libellés d'arêtes |…| peuvent tout contenir
+    line = re.sub(r'"[^"]*"', '""', line)
+    line = re.sub(r"\|[^|]*\|", "||", line)
+
+    i = 0
+    while i < len(line):
+        char = line[i]
+        if char in "([{" or (char == ">" and i > 0 and re.match(r"[\w]", line[i - 1])):
+            for opener, closer in NODE_SHAPES:
+                if line.startswith(opener, i):
+                    end = line.find(closer, i + len(opener))
+                    if end == -1:
+                        return f"forme de nœud non fermée après {line[:i + len(opener)]!r}"
+                    text = line[i + len(opener):end]
+                    if re.search(r"[()\[\]{}]", text):
+                        return f"caractères ()[]{{}} non échappés dans {text!r} (utiliser des guillemets)"
+                    i = end + len(closer)
+                    break
+            else:
+                i += 1
+            continue
+        if char in ")]}":
+            return f"délimiteur {char!r} sans ouverture"
+        i += 1
+    return None
+
+
+def validate_flowchart(code: str) -> List[str]:
+    errors = []
+    lines = _content_lines(code)
+    header = lines[0][1].split()
+    if len(header) > 1 and header[1] not in FLOWCHART_DIRECTIONS:
+        errors.append(f"ligne {lines[0][0]}: direction inconnue {header[1]!r}")
+
+    depth = 0
+    statements = 0
+    for number, line in lines[1:]:
+        if line.startswith("subgraph"):
+            depth += 1
+            continue
+        if line == "end":
+            depth -= 1
+            if depth < 0:
+                errors.append(f"ligne {number}: 'end' sans 'subgraph'")
+                depth = 0
+            continue
+        if line.startswith(FLOWCHART_KEYWORDS):
+            continue
+        statements += 1
+        for statement in line.split(";"):
+            statement = statement.strip()
+            if not statement:
+                continue
+            if DANGLING_EDGE_RE.search(statement) or re.match(r"^(--|==|-\.)", statement):
+                errors.append(f"ligne {number}: lien sans nœud à une extrémité ({statement!r})")
+                continue
+            problem = _check_flowchart_line(statement)
+            if problem:
+                errors.append(f"ligne {number}: {problem}")
+
+    if depth > 0:
+        errors.append("subgraph non fermé par 'end'")
+    if statements == 0:
+        errors.append("flowchart sans aucun nœud")
+    return errors
+
+
+def validate_pie(code: str) -> List[str]:
+    errors = []
+    lines = _content_lines(code)
+    entries = 0
+    for number, line in lines[1:]:
+        if line.startswith(("title", "showData", "accTitle", "accDescr")):
+            continue
+        match = PIE_ENTRY_RE.match(line)
+        if not match:
+            errors.append(f"ligne {number}: entrée attendue au format \"Libellé\" : valeur ({line!r})")
+            continue
+        try:
+            value = float(match.group(2))
+        except ValueError:
+            errors.append(f"ligne {number}: valeur non numérique {match.group(2)!r}")
+            continue
+        if value < 0:
+            errors.append(f"ligne {number}: valeur négative {match.group(2)!r}")
+        entries += 1
+    if entries == 0:
+        errors.append("diagramme pie sans aucune valeur")
+    return errors
+
+
+def validate_journey(code: str) -> List[str]:
+    errors = []
+    lines = _content_lines(code)
+    tasks = 0
+    for number, line in lines[1:]:
+        if line.startswith(("title", "section", "accTitle", "accDescr")):
+            continue
+        match = JOURNEY_TASK_RE.match(line)
+        if not match:
+            errors.append(f"ligne {number}: tâche attendue au format Nom: score: acteurs ({line!r})")
+            continue
+        if not match.group(2).isdigit() or not 1 <= int(match.group(2)) <= 5:
+            errors.append(f"ligne {number}: score {match.group(2)!r} hors de 1 à 5")
+        tasks += 1
+    if tasks == 0:
+        errors.append("journey sans aucune tâche")
+    return errors
+
+
+VALIDATORS = {
+    "gantt": validate_gantt,
+    "flowchart": validate_flowchart,
+    "graph": validate_flowchart,
+    "pie": validate_pie,
+    "journey": validate_journey,
+}
+
+
+def validate_mermaid(code: str) -> List[str]:
+    """
+    Valide le code d'un diagramme Mermaid.
+
+    Args:
+        code: Code du diagramme, sans les balises ```mermaid
+
+    Returns:
+        Liste des erreurs trouvées (vide si le diagramme est valide ou d'un type non vérifié)
+    """
+    lines = _content_lines(code)
+    if not lines:
+        return ["diagramme vide"]
+    diagram_type = lines[0][1].split()[0]
+    validator = VALIDATORS.get(diagram_type)
+    return validator(code) if validator else []
+
+
+class MermaidRepairer:
+    """
+    Répare un diagramme Mermaid invalide avec un petit appel LLM dédié.
+    Seul le bloc en erreur est envoyé, avec la liste des erreurs détectées.
+    """
+
+    SYSTEM_PROMPT = (
+        "Tu corriges des diagrammes Mermaid. Réponds UNIQUEMENT avec le code Mermaid corrigé, "
+        "sans balises ```, sans explication. Conserve le contenu, les libellés et la langue ; "
+        "corrige seulement la syntaxe. Mets entre guillemets les libellés contenant des caractères spéciaux."
+    )
+
+    def __init__(self, llm: Any, max_attempts: int = 2):
+        """
+        Args:
+            llm: Modèle de chat LangChain (un modèle léger suffit)
+            max_attempts: Nombre maximum d'appels de réparation par bloc
+        """
+        self.llm = llm
+        self.max_attempts = max_attempts
+
+    def repair(self, code: str, errors: List[str]) -> Tuple[str, List[str], int]:
+        """
+        Tente de corriger un diagramme.
+
+        Args:
+            code: Code Mermaid invalide
+            errors: Erreurs détectées par validate_mermaid
+
+        Returns:
+            Tuple (code final, erreurs restantes, tokens consommés)
+        """
+        tokens = 0
+        current, current_errors = code, errors
+        for _ in range(self.max_attempts):
+            messages = [
+                ("system", self.SYSTEM_PROMPT),
+                ("human", "Erreurs détectées :\n- " + "\n- ".join(current_errors) + f"\n\nDiagramme :\n{current}"),
+            ]
+            response = self.llm.invoke(messages)
+            usage = getattr(response, "usage_metadata", None) or {}
+            tokens += usage.get("total_tokens", 0)
+
+            candidate = _strip_code_fences(str(response.content))
+            candidate_errors = validate_mermaid(candidate)
+            if len(candidate_errors) <= len(current_errors):
+                current, current_errors = candidate, candidate_errors
+            if not current_errors:
+                break
+        return current, current_errors, tokens
+
+
+def _strip_code_fences(content: str) -> str:
+    content = content.strip()
+    if content.startswith("```"):
+        content = content.split("\n", 1)[1] if "\n" in content else ""
+    if content.endswith("```"):
+        content = content[:-3]
+    return content.strip("\n")
+
+
+def validate_and_repair(markdown: str, repairer: Optional[MermaidRepairer] = None) -> Tuple[str, List[DiagramReport]]:
+    """
+    Valide tous les diagrammes d'un CDC et répare les blocs invalides.
+
+    Args:
+        markdown: Contenu du CDC
+        repairer: Réparateur à utiliser (si None, validation seule)
+
+    Returns:
+        Tuple (CDC avec les blocs réparés réinsérés, rapport par diagramme)
+    """
+    blocks = extract_mermaid_blocks(markdown)
+    reports = []
+    replacements: List[Tuple[MermaidBlock, str]] = []
+
+    for index, block in enumerate(blocks):
+        report = DiagramReport(index=index, diagram_type=block.diagram_type, errors=validate_mermaid(block.code))
+        if report.errors and repairer is not None:
+            code, remaining, tokens = repairer.repair(block.code, report.errors)
+            report.remaining_errors = remaining
+            report.repair_tokens = tokens
+            if code != block.code and len(remaining) < len(report.errors):
+                report.repaired = not remaining
+                replacements.append((block, code))
+        else:
+            report.remaining_errors = list(report.errors)
+        reports.append(report)
+
+    # Réinsertion depuis la fin pour garder les positions valides
+    for block, code in reversed(replacements):
+        markdown = markdown[:block.start] + code + markdown[block.end:]
+    return markdown, reports
+
+
+def summarize_reports(reports: List[DiagramReport]) -> Dict[str, int]:
+    """Résume un rapport de validation (diagrammes, invalides, réparés, tokens de réparation)."""
+    return {
+        "diagrams": len(reports),
+        "invalid": sum(1 for report in reports if report.errors),
+        "repaired": sum(1 for report in reports if report.repaired),
+        "still_invalid": sum(1 for report in reports if report.remaining_errors),
+        "repair_tokens": sum(report.repair_tokens for report in reports),
+    }
@@ -0,0 +1,328 @@
+"""
+Métriques de production : registre en mémoire, exposé au format texte Prometheus.
+
+Compteurs, jauges et histogrammes à seaux fixes, avec étiquettes. Les
+utilitaires enregistrent leurs mesures dans le registre global REGISTRY :
+
+- cdc_llm_request_seconds / cdc_llm_tokens : latence et tokens de chaque appel
+  LLM, par modèle (InstrumentedChatModel, appliqué par CDCGenerator et
+  BudgetEstimator) ;
+- cdc_llm_requests_total : appels LLM par modèle et statut ("ok" / "error") ;
+- cdc_parse_failures_total : réponses LLM inexploitables, par analyseur ;
+- cdc_cache_requests_total : lectures de cache par cache et résultat
+  ("hit" / "miss") ;
+- cdc_submit_seconds : durée des étapes du Submit de l'interface.
+
+Exposition :
+    REGISTRY.serve(port=9464)       # GET /metrics (thread en arrière-plan)
+    REGISTRY.dump("metrics.prom")   # fichier, en fin de lot
+    CDC_METRICS_PORT=9464 python main_test.py
+
+Le registre ne vit que dans le processus : chaque processus (interface,
+service, lot) expose ses propres séries.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from utils.rate_limiter import count_tokens, estimate_tokens
+from utils.utils import atomic_write
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seaux par défaut, en secondes : des appels mini (~1 s) aux CDC longs (~2 min)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) or abs(value) >= 1e15 else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """Base commune : nom, aide, étiquettes et séries par valeurs d'étiquettes."""
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Valeur croissante (appels, erreurs, lectures de cache…)."""
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        if amount < 0:
+            raise ValueError("Counter can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._series.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted(self._series.items())
+        return self._header() + [f"{self.name}{_labels_text(self.labelnames, key)} {_format_value(value)}"
+                                 for key, value in series]
+
+
+class Gauge(Counter):
+    """Valeur instantanée (file d'attente, entrées en cache…)."""
+    kind = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = float(value)
+
+
+class Histogram(_Metric):
+    """
+    Distribution à seaux fixes (compteurs cumulés par borne supérieure, somme et nombre).
+
+    Args:
+        buckets: Bornes supérieures croissantes (+Inf ajoutée automatiquement)
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        if list(buckets) != sorted(buckets):
+            raise ValueError(f"{name}: buckets must be sorted")
+        self.buckets = tuple(float(b) for b in buckets if b != float("inf")) + (float("inf"),)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._series.get(key) or ([0] * len(self.buckets), 0.0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._series[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        """Mesure la durée du bloc, en secondes."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: Any) -> int:
+        counts, _ = self._series.get(self._key(labels)) or ([0], 0.0)
+        return sum(counts)
+
+    def sum(self, **labels: Any) -> float:
+        return (self._series.get(self._key(labels)) or ([], 0.0))[1]
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, (list(counts), total)) for key, (counts, total) in self._series.items())
+        lines = self._header()
+        for key, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels_text(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels_text(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_labels_text(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Ensemble de métriques nommées, rendu au format texte Prometheus.
+
+    Déclarer deux fois le même nom renvoie la métrique existante (même type
+    et mêmes étiquettes exigés) : chaque module déclare ce qu'il utilise.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls: type, name: str, documentation: str, labelnames: Sequence[str], **kwargs: Any) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} already registered as {metric.kind} {metric.labelnames}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Toutes les métriques au format texte Prometheus (0.0.4)."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        return "".join(line + "\n" for metric in metrics for line in metric.render())
+
+    def dump(self, path: str) -> None:
+        """Écrit render() dans un fichier (remplacement atomique : lisible pendant l'écriture)."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        atomic_write(path, self.render().encode("utf-8"))
+
+    def serve(self, port: int = 9464, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """
+        Expose GET /metrics sur un petit serveur HTTP local, dans un thread d'arrière-plan.
+
+        Args:
+            port: Port d'écoute (0 = port libre, voir server.server_address)
+            host: Interface d'écoute (locale par défaut)
+
+        Returns:
+            Serveur démarré (server.shutdown() pour l'arrêter)
+        """
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0].rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+
+REGISTRY = MetricsRegistry()
+
+LLM_REQUESTS = REGISTRY.counter("cdc_llm_requests_total", "Appels LLM par modèle et statut", ("model", "status"))
+LLM_LATENCY = REGISTRY.histogram("cdc_llm_request_seconds", "Durée des appels LLM, en secondes", ("model",))
+LLM_TOKENS = REGISTRY.histogram("cdc_llm_tokens", "Tokens par appel LLM (prompt + complétion)", ("model",),
+                                buckets=TOKEN_BUCKETS)
+PARSE_FAILURES = REGISTRY.counter("cdc_parse_failures_total", "Réponses LLM inexploitables par analyseur", ("parser",))
+CACHE_REQUESTS = REGISTRY.counter("cdc_cache_requests_total", "Lectures de cache par cache et résultat",
+                                  ("cache", "result"))
+SUBMIT_LATENCY = REGISTRY.histogram("cdc_submit_seconds", "Durée des étapes du Submit, en secondes", ("stage",))
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Compte une lecture de cache ("hit" ou "miss")."""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def cache_hit_ratio(cache: str) -> float:
+    """Part des lectures d'un cache servies depuis le cache (0 si aucune lecture)."""
+    hits, misses = CACHE_REQUESTS.value(cache=cache, result="hit"), CACHE_REQUESTS.value(cache=cache, result="miss")
+    return hits / (hits + misses) if hits + misses else 0.0
+
+
+class InstrumentedChatModel:
+    """
+    Enveloppe un modèle de chat : chaque invoke() ou stream() est mesuré
+    (durée, tokens, statut) dans le registre, par modèle.
+
+    Args:
+        llm: Modèle de chat enveloppé
+        model: Étiquette du modèle (par défaut llm.model_name)
+    """
+
+    def __init__(self, llm: Any, model: Optional[str] = None):
+        self.llm = llm
+        self.model = model or str(getattr(llm, "model_name", None) or getattr(llm, "model", None) or type(llm).__name__)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.llm, name)
+
+    def _record(self, start: float, status: str, usage: Optional[dict], messages: Any, content: str) -> None:
+        LLM_REQUESTS.inc(model=self.model, status=status)
+        LLM_LATENCY.observe(time.perf_counter() - start, model=self.model)
+        if usage and usage.get("total_tokens"):
+            LLM_TOKENS.observe(int(usage["total_tokens"]), model=self.model)
+        elif status == "ok":
+            LLM_TOKENS.observe(estimate_tokens(messages, self.model) + count_tokens(content, self.model),
+                               model=self.model)
+
+    def invoke(self, messages: Any, **kwargs) -> Any:
+        start = time.perf_counter()
+        try:
+            response = self.llm.invoke(messages, **kwargs)
+        except BaseException:
+            self._record(start, "error", None, messages, "")
+            raise
+        self._record(start, "ok", getattr(response, "usage_metadata", None), messages, str(response.content))
+        return response
+
+    def stream(self, messages: Any, **kwargs) -> Iterator[Any]:
+        start = time.perf_counter()
+        usage, parts, status = None, [], "error"
+        try:
+            for chunk in self.llm.stream(messages, **kwargs):
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                parts.append(str(chunk.content))
+                yield chunk
+            status = "ok"
+        finally:
+            self._record(start, status, usage, messages, "".join(parts))
+
+
+def instrument_llm(llm: Any) -> Any:
+    """Enveloppe un modèle de chat dans InstrumentedChatModel (sans double enveloppe)."""
+    return llm if isinstance(llm, InstrumentedChatModel) else InstrumentedChatModel(llm)
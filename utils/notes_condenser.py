@@ -0,0 +1,310 @@
+"""
+Condensation des notes longues (transcriptions de réunion) avant génération.
+
+Les consultants collent parfois dans NotesPage des transcriptions entières
+(plusieurs dizaines de milliers de mots), envoyées telles quelles au modèle
+principal. NotesCondenser les réduit en un condensé structuré par section du CDC :
+
+1. map : les notes sont découpées (RecursiveCharacterTextSplitter) et chaque
+   morceau est résumé en parallèle par un modèle léger (gpt-4o-mini) ;
+2. reduce : les points extraits sont regroupés par section et dédoublonnés ;
+   les sections encore trop longues sont fusionnées par un dernier appel.
+
+Le condensé est mis en cache sur disque sous le hash des notes et du modèle
+réellement utilisé : régénérer un CDC sans toucher aux notes ne coûte aucun
+appel supplémentaire. Un condensé vide n'est jamais mis en cache ni substitué
+aux notes. Un morceau dont la réponse reste inexploitable après MAP_ATTEMPTS
+appels est gardé en entier, et le condensé n'est alors pas mis en cache :
+le prochain appel retente.
+
+Usage:
+    condenser = NotesCondenser(llm=ChatOpenAI(model="gpt-4o-mini", temperature=0))
+    digest = condenser.condense(project.notes)
+    print(digest.to_markdown())
+"""
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from models.Project import Project
+from utils.context_packing import dedupe_items
+from utils.metrics import PARSE_FAILURES, record_cache
+from utils.rate_limiter import count_tokens
+from utils.utils import atomic_write
+
+
+# Incrémenter pour invalider le cache quand les prompts changent
+CONDENSER_VERSION = "1"
+DEFAULT_CACHE_DIR = ".cdc_notes_cache"
+# Appels par extrait avant de garder le passage brut (réponse JSON inexploitable)
+MAP_ATTEMPTS = 2
+
+# Rubriques du condensé : clé JSON attendue du modèle -> titre affiché
+NOTE_SECTIONS = {
+    "contexte": "Contexte & déclencheur",
+    "objectifs": "Objectifs",
+    "cibles": "Cibles",
+    "perimetre": "Périmètre",
+    "livrables": "Livrables",
+    "contraintes": "Contraintes",
+    "planning": "Planning",
+    "gouvernance": "Organisation & gouvernance",
+    "budget": "Budget",
+    "recette": "Recette",
+    "risques": "Risques",
+    "autres": "Autres points",
+}
+
+MAP_PROMPT = (
+    "Tu condenses des notes de réunion pour la rédaction d'un cahier des charges. "
+    "Extrais du passage fourni les informations utiles au projet (décisions, exigences, chiffres, "
+    "dates, noms, points ouverts), en phrases courtes, sans rien inventer ni répéter. "
+    "Ignore les échanges sans contenu (politesses, digressions). "
+    "Réponds UNIQUEMENT avec un objet JSON dont les clés sont parmi : {keys}. "
+    "Chaque valeur est une liste de points ; omets les clés sans contenu."
+)
+
+REDUCE_PROMPT = (
+    "Tu fusionnes des points extraits de notes de réunion pour la section « {title} » d'un cahier des charges. "
+    "Regroupe les points redondants ou proches, garde toutes les décisions, chiffres, dates et noms, "
+    "sans rien inventer. Réponds UNIQUEMENT avec un tableau JSON de chaînes, au plus {max_points} points."
+)
+
+
+@dataclass
+class NotesDigest:
+    """Condensé des notes, par rubrique (clés de NOTE_SECTIONS)."""
+    sections: Dict[str, List[str]] = field(default_factory=dict)
+    chunks: int = 0
+    tokens_before: int = 0
+    tokens_after: int = 0
+    llm_tokens: int = 0
+    cached: bool = False
+
+    def to_markdown(self) -> str:
+        """Condensé au format texte, une rubrique par bloc, dans l'ordre de NOTE_SECTIONS."""
+        blocks = []
+        for key, title in NOTE_SECTIONS.items():
+            points = self.sections.get(key)
+            if points:
+                blocks.append(f"[{title}]\n" + "\n".join(f"- {point}" for point in points))
+        return "\n\n".join(blocks)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "NotesDigest":
+        return cls(**data)
+
+
+def _parse_json(content: str) -> Any:
+    """Extrait l'objet ou le tableau JSON d'une réponse (balises ``` et texte autour tolérés)."""
+    content = re.sub(r"^```(?:json)?\s*|\s*```$", "", content.strip())
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        match = re.search(r"[\[{].*[\]}]", content, re.DOTALL)
+        if match:
+            try:
+                return json.loads(match.group(0))
+            except json.JSONDecodeError:
+                pass
+    return None
+
+
+def llm_identity(llm: Any) -> str:
+    """Identité du modèle derrière les enveloppes (limiteur, métriques) : type et nom du modèle."""
+    while getattr(llm, "llm", None) is not None:
+        llm = llm.llm
+    name = getattr(llm, "model_name", None) or getattr(llm, "model", None)
+    return f"{type(llm).__name__}:{name}" if name else type(llm).__name__
+
+
+def _points(value: Any) -> List[str]:
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list):
+        return []
+    return [str(point).strip(" -•\n") for point in value if str(point).strip(" -•\n")]
+
+
+class NotesCondenser:
+    """
+    Réduit des notes longues en un condensé structuré par section du CDC.
+
+    Args:
+        llm: Modèle de chat léger (ChatOpenAI gpt-4o-mini, FakeChatModel…), éventuellement limité
+        model: Modèle utilisé pour compter les tokens
+        min_tokens: Taille en dessous de laquelle les notes sont laissées telles quelles
+        chunk_tokens: Taille des morceaux envoyés en parallèle
+        chunk_overlap: Recouvrement entre morceaux, en tokens
+        max_section_tokens: Taille d'une rubrique au-delà de laquelle elle est fusionnée par le LLM
+        max_workers: Appels simultanés pendant la phase map
+        cache_dir: Dossier du cache des condensés (None = pas de cache)
+    """
+
+    def __init__(self, llm: Any, model: str = "gpt-4o-mini", min_tokens: int = 1500,
+                 chunk_tokens: int = 3000, chunk_overlap: int = 150, max_section_tokens: int = 400,
+                 max_workers: int = 8, cache_dir: Optional[str] = DEFAULT_CACHE_DIR):
+        self.llm = llm
+        self.model = model
+        # Clé de cache : le modèle réellement appelé (un FakeChatModel n'écrit pas dans le cache d'OpenAI)
+        self.llm_id = llm_identity(llm)
+        self.min_tokens = min_tokens
+        self.max_section_tokens = max_section_tokens
+        self.max_workers = max_workers
+        self.cache_dir = cache_dir
+        self.splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_tokens,
+            chunk_overlap=chunk_overlap,
+            length_function=lambda text: count_tokens(text, model),
+            separators=["\n\n", "\n", ". ", " ", ""],
+        )
+
+    def needs_condensing(self, notes: str) -> bool:
+        """True si les notes dépassent min_tokens."""
+        # Pré-filtre sur la longueur : évite de compter les tokens des notes courtes
+        return bool(notes) and len(notes) > self.min_tokens and count_tokens(notes, self.model) > self.min_tokens
+
+    def cache_key(self, notes: str) -> str:
+        """Clé de cache : hash des notes, du modèle appelé et de la version des prompts."""
+        return hashlib.sha256(f"{CONDENSER_VERSION}:{self.llm_id}:".encode("utf-8") + notes.encode("utf-8")).hexdigest()
+
+    def condense(self, notes: str) -> NotesDigest:
+        """
+        Condense des notes (ou relit le condensé en cache).
+
+        Args:
+            notes: Notes brutes
+
+        Returns:
+            NotesDigest
+        """
+        cached_path = os.path.join(self.cache_dir, f"{self.cache_key(notes)}.json") if self.cache_dir else None
+        digest = self._read_cache(cached_path) if cached_path else None
+        record_cache("notes", digest is not None)
+        if digest is not None:
+            return digest
+
+        chunks = self.splitter.split_text(notes)
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks)) or 1) as pool:
+            extracts = list(pool.map(self._map_chunk, chunks, range(1, len(chunks) + 1), [len(chunks)] * len(chunks)))
+        llm_tokens = sum(tokens for _, tokens, _ in extracts)
+        # Un passage gardé brut ou une rubrique non fusionnée ne doit pas être figé dans le cache
+        complete = all(ok for _, _, ok in extracts)
+
+        sections: Dict[str, List[str]] = {}
+        for extract, _, _ in extracts:
+            for key, points in extract.items():
+                sections.setdefault(key, []).extend(points)
+        sections = {key: dedupe_items(points)[0] for key, points in sections.items()}
+
+        oversized = [key for key, points in sections.items()
+                     if count_tokens("\n".join(points), self.model) > self.max_section_tokens]
+        if oversized:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(oversized))) as pool:
+                for key, (points, tokens, ok) in zip(oversized, pool.map(lambda k: self._reduce_section(k, sections[k]), oversized)):
+                    sections[key] = points
+                    llm_tokens += tokens
+                    complete = complete and ok
+
+        digest = NotesDigest(
+            sections={key: sections[key] for key in NOTE_SECTIONS if sections.get(key)},
+            chunks=len(chunks),
+            tokens_before=count_tokens(notes, self.model),
+            llm_tokens=llm_tokens,
+        )
+        digest.tokens_after = count_tokens(digest.to_markdown(), self.model)
+
+        if cached_path and complete and digest.to_markdown():
+            os.makedirs(self.cache_dir, exist_ok=True)  # type: ignore
+            # Plusieurs générations peuvent condenser les mêmes notes en même temps
+            atomic_write(cached_path, json.dumps(digest.to_dict(), ensure_ascii=False).encode("utf-8"))
+        return digest
+
+    @staticmethod
+    def _read_cache(path: str) -> Optional[NotesDigest]:
+        """Condensé en cache, None s'il est absent, illisible ou vide."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                digest = NotesDigest.from_dict(json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+        if not digest.to_markdown():
+            return None
+        digest.cached = True
+        return digest
+
+    def condense_project(self, project: Project) -> Tuple[Project, Optional[NotesDigest]]:
+        """
+        Remplace les notes longues d'un projet par leur condensé, sur une copie.
+
+        Returns:
+            Tuple (projet, condensé) ; le projet d'origine et None si les notes sont courtes,
+            le projet d'origine si le condensé est vide (les notes ne sont jamais remplacées par rien)
+        """
+        if not self.needs_condensing(project.notes):
+            return project, None
+        digest = self.condense(project.notes)
+        if not digest.to_markdown():
+            return project, digest
+        condensed = Project.from_dict(project.to_dict())
+        condensed.notes = digest.to_markdown()
+        return condensed, digest
+
+    def _invoke(self, messages: list) -> Tuple[Any, int]:
+        response = self.llm.invoke(messages)
+        usage = getattr(response, "usage_metadata", None) or {}
+        return _parse_json(str(response.content)), usage.get("total_tokens", 0)
+
+    def _map_chunk(self, chunk: str, index: int, total: int) -> Tuple[Dict[str, List[str]], int, bool]:
+        """Points extraits d'un passage : (points par rubrique, tokens consommés, False si le passage est gardé brut)."""
+        messages = [
+            ("system", MAP_PROMPT.format(keys=", ".join(NOTE_SECTIONS))),
+            ("human", f"Extrait {index}/{total} :\n{chunk}"),
+        ]
+        tokens = 0
+        for _ in range(MAP_ATTEMPTS):
+            data, used = self._invoke(messages)
+            tokens += used
+            if isinstance(data, dict):
+                return {(key if key in NOTE_SECTIONS else "autres"): _points(value) for key, value in data.items()
+                        if _points(value)}, tokens, True
+            PARSE_FAILURES.inc(parser="notes_map")
+        # Réponses inexploitables : le passage entier est gardé plutôt que perdu
+        return {"autres": [chunk.strip()]}, tokens, False
+
+    def _reduce_section(self, key: str, points: List[str]) -> Tuple[List[str], int, bool]:
+        max_points = max(3, self.max_section_tokens // 30)
+        messages = [
+            ("system", REDUCE_PROMPT.format(title=NOTE_SECTIONS[key], max_points=max_points)),
+            ("human", "Points :\n" + "\n".join(f"  - {point}" for point in points)),
+        ]
+        data, tokens = self._invoke(messages)
+        merged = _points(data)
+        if not merged:
+            PARSE_FAILURES.inc(parser="notes_reduce")
+            return points, tokens, False
+        return merged[:max_points], tokens, True
+
+
+def condense_notes(notes: str, llm: Any, cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> NotesDigest:
+    """
+    Fonction utilitaire : condensé de notes avec les réglages par défaut.
+
+    Args:
+        notes: Notes brutes
+        llm: Modèle de chat léger
+        cache_dir: Dossier du cache (None = pas de cache)
+
+    Returns:
+        NotesDigest
+    """
+    return NotesCondenser(llm, cache_dir=cache_dir).condense(notes)
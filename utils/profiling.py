@@ -0,0 +1,267 @@
+"""
+Profilage du Submit et des lots, étape par étape.
+
+Deux mesures complémentaires, prises pendant chaque étape (`with profiler.stage("budget")`) :
+
+- cProfile : temps exact par fonction, mais seulement dans le thread qui
+  exécute l'étape (statistiques cumulées par étape, fichiers .pstats lisibles
+  par snakeviz ou pstats) ;
+- échantillonnage : toutes les `interval` secondes, la pile de chaque thread
+  est relevée (sys._current_frames), y compris celle des pools de threads
+  (fan-out, condensation des notes). Les piles sont écrites au format
+  « collapsed » (`étape;thread;frame;frame N`) lu par flamegraph.pl,
+  speedscope ou inferno.
+
+Les threads en attente (verrous, files, sockets) sont ignorés par défaut :
+avec un LLM factice, il ne reste que le temps CPU local (rendu, construction
+des prompts, parsing pydantic, nettoyage du markdown…).
+
+Usage:
+    profiler = Profiler()
+    with profiler.stage("budget"):
+        estimator.estimate(project)
+    print(profiler.summary(top=15))
+    profiler.write("cdc_profile")   # profile.collapsed, <étape>.pstats, summary.txt
+
+    python batch.py projets/*.json --profile             # LLM factice, résultats dans cdc_profile/
+    flamegraph.pl cdc_profile/profile.collapsed > flame.svg
+"""
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+from typing import Any, ContextManager, Dict, Iterator, List, Optional, Tuple
+
+
+DEFAULT_PROFILE_DIR = "cdc_profile"
+
+# Feuilles de pile d'un thread qui attend (fichier, fonction) : exclues par défaut
+IDLE_FRAMES = {
+    ("threading.py", "wait"), ("threading.py", "_wait_for_tstate_lock"), ("threading.py", "join"),
+    ("queue.py", "get"), ("selectors.py", "select"), ("socketserver.py", "serve_forever"),
+    ("thread.py", "_worker"), ("base_events.py", "_run_once"), ("ssl.py", "read"), ("socket.py", "readinto"),
+}
+
+
+def _frame_label(code: Any) -> str:
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{os.path.basename(code.co_filename)}:{name}".replace(";", ":").replace(" ", "_")
+
+
+def _thread_group(name: str) -> str:
+    """Nom de thread sans numéro (ThreadPoolExecutor-0_3 -> ThreadPoolExecutor) : une seule branche par pool."""
+    return re.sub(r"[-_]?\d+(_\d+)?$", "", name) or name
+
+
+class Profiler:
+    """
+    cProfile et échantillonnage des piles, regroupés par étape.
+
+    Les étapes peuvent s'exécuter dans plusieurs threads à la fois (lots) ;
+    une étape imbriquée dans une autre du même thread n'a pas son propre
+    cProfile (un seul actif par thread), mais ses échantillons lui sont attribués.
+
+    Args:
+        interval: Période d'échantillonnage, en secondes (None = pas d'échantillonnage)
+        use_cprofile: Activer cProfile dans chaque étape
+        include_idle: Garder les échantillons des threads en attente
+    """
+
+    def __init__(self, interval: Optional[float] = 0.002, use_cprofile: bool = True, include_idle: bool = False):
+        self.interval = interval
+        self.use_cprofile = use_cprofile
+        self.include_idle = include_idle
+        self.samples: Counter = Counter()
+        self.wall: Dict[str, float] = defaultdict(float)
+        self.calls: Dict[str, int] = defaultdict(int)
+        self._stats: Dict[str, pstats.Stats] = {}
+        # Étapes en cours par thread (pile : la dernière est la plus imbriquée)
+        self._active: Dict[int, List[str]] = {}
+        self._lock = threading.Lock()
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Profile le bloc sous le nom d'étape `name` (cumulé si l'étape se répète)."""
+        thread_id = threading.get_ident()
+        with self._lock:
+            stack = self._active.setdefault(thread_id, [])
+            stack.append(name)
+            nested = len(stack) > 1
+        self._start_sampler()
+        profile = cProfile.Profile() if self.use_cprofile and not nested else None
+        start = time.perf_counter()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                stack.pop()
+                if not stack:
+                    del self._active[thread_id]
+                self.wall[name] += elapsed
+                self.calls[name] += 1
+                if profile is not None:
+                    profile.create_stats()
+                    if name in self._stats:
+                        self._stats[name].add(profile)
+                    else:
+                        self._stats[name] = pstats.Stats(profile)
+
+    # --- échantillonnage --------------------------------------------------
+
+    def _start_sampler(self) -> None:
+        if self.interval is None or self._sampler is not None:
+            return
+        with self._lock:
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample_loop, name="profiler-sampler", daemon=True)
+                self._sampler.start()
+
+    def _sample_loop(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                active = {thread_id: stack[-1] for thread_id, stack in self._active.items()}
+            if not active:
+                continue
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            # Les threads sans étape (pools) sont rattachés à l'étape en cours s'il n'y en a qu'une
+            default_stage = next(iter(active.values())) if len(set(active.values())) == 1 else "(autres)"
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stage = active.get(thread_id, default_stage)
+                self._record(stage, _thread_group(names.get(thread_id, "thread")), frame)
+
+    def _record(self, stage: str, thread: str, frame: Any) -> None:
+        code = frame.f_code
+        if code.co_filename == __file__:
+            # Entrée ou sortie d'étape : coût du profileur lui-même
+            return
+        if not self.include_idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+            return
+        labels = []
+        while frame is not None:
+            labels.append(_frame_label(frame.f_code))
+            frame = frame.f_back
+        key = ";".join([stage, thread, *reversed(labels)])
+        with self._lock:
+            self.samples[key] += 1
+
+    def stop(self) -> None:
+        """Arrête l'échantillonnage (les résultats restent disponibles)."""
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+
+    # --- résultats ----------------------------------------------------------
+
+    def collapsed(self) -> str:
+        """Piles échantillonnées au format collapsed (`frame;frame;… nombre`), une par ligne."""
+        with self._lock:
+            items = sorted(self.samples.items())
+        return "".join(f"{stack} {count}\n" for stack, count in items)
+
+    def hotspots(self, stage: str, top: int = 10) -> List[Tuple[str, float, float, int]]:
+        """
+        Fonctions les plus coûteuses d'une étape selon cProfile.
+
+        Returns:
+            Liste (fonction, temps propre en s, temps cumulé en s, appels), par temps propre décroissant
+        """
+        stats = self._stats.get(stage)
+        if stats is None:
+            return []
+        rows = [
+            (f"{os.path.basename(filename)}:{line}({function})", tottime, cumtime, ncalls)
+            for (filename, line, function), (_, ncalls, tottime, cumtime, _) in stats.stats.items()  # type: ignore
+        ]
+        return sorted(rows, key=lambda row: row[1], reverse=True)[:top]
+
+    def sampled_hotspots(self, stage: str, top: int = 10) -> List[Tuple[str, int]]:
+        """Feuilles de pile les plus échantillonnées d'une étape (tous threads), avec leur nombre d'échantillons."""
+        leaves: Counter = Counter()
+        with self._lock:
+            for stack, count in self.samples.items():
+                if stack.split(";", 1)[0] == stage:
+                    leaves[stack.rsplit(";", 1)[-1]] += count
+        return leaves.most_common(top)
+
+    def summary(self, top: int = 10) -> str:
+        """Résumé texte : durée de chaque étape puis ses `top` points chauds (cProfile et échantillons)."""
+        lines = []
+        for stage in sorted(self.wall, key=self.wall.get, reverse=True):  # type: ignore
+            lines.append(f"=== {stage} : {self.wall[stage] * 1000:.1f} ms sur {self.calls[stage]} passage(s)")
+            rows = self.hotspots(stage, top)
+            if rows:
+                lines.append(f"  {'propre (ms)':>12} {'cumulé (ms)':>12} {'appels':>8}  fonction (cProfile)")
+                lines.extend(f"  {tottime * 1000:12.2f} {cumtime * 1000:12.2f} {ncalls:8d}  {function}"
+                             for function, tottime, cumtime, ncalls in rows)
+            sampled = self.sampled_hotspots(stage, top)
+            if sampled:
+                total = sum(count for _, count in sampled)
+                lines.append(f"  {'échantillons':>12} {'part':>12}           feuille de pile (tous threads)")
+                lines.extend(f"  {count:12d} {count / total:12.0%}           {leaf}" for leaf, count in sampled)
+            lines.append("")
+        return "\n".join(lines)
+
+    def write(self, out_dir: str = DEFAULT_PROFILE_DIR, top: int = 20) -> Dict[str, str]:
+        """
+        Écrit les résultats : profile.collapsed, <étape>.pstats et summary.txt.
+
+        Args:
+            out_dir: Dossier de sortie (créé si besoin)
+            top: Points chauds par étape dans summary.txt
+
+        Returns:
+            Chemins écrits, par nature ("collapsed", "summary", "pstats:<étape>")
+        """
+        os.makedirs(out_dir, exist_ok=True)
+        paths = {"collapsed": os.path.join(out_dir, "profile.collapsed"),
+                 "summary": os.path.join(out_dir, "summary.txt")}
+        with open(paths["collapsed"], "w", encoding="utf-8") as f:
+            f.write(self.collapsed())
+        with open(paths["summary"], "w", encoding="utf-8") as f:
+            f.write(self.summary(top))
+        with self._lock:
+            stats = dict(self._stats)
+        for stage, stage_stats in stats.items():
+            path = os.path.join(out_dir, f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', stage)}.pstats")
+            stage_stats.dump_stats(path)
+            paths[f"pstats:{stage}"] = path
+        return paths
+
+    def print_stats(self, stage: str, sort: str = "cumulative", top: int = 20) -> str:
+        """Rapport pstats standard d'une étape (tri au choix : "cumulative", "tottime"…)."""
+        stats = self._stats.get(stage)
+        if stats is None:
+            return ""
+        stream = io.StringIO()
+        pstats.Stats(stats, stream=stream).sort_stats(sort).print_stats(top)
+        return stream.getvalue()
+
+
+def profile_stage(profiler: Optional[Profiler], name: str) -> ContextManager[None]:
+    """
+    Fonction utilitaire : étape profilée si un profileur est fourni, sans effet sinon.
+
+    Args:
+        profiler: Profileur actif (None = profilage désactivé)
+        name: Nom de l'étape
+
+    Returns:
+        Gestionnaire de contexte
+    """
+    return profiler.stage(name) if profiler is not None else nullcontext()
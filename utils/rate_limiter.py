@@ -0,0 +1,281 @@
+"""
+Limiteur de débit des appels OpenAI, partagé entre processus.
+
+Un seau à jetons par modèle pour les requêtes/minute (RPM) et un autre pour les
+tokens/minute (TPM), stockés dans un fichier SQLite local : les interfaces
+ouvertes, les workers du service et les lots se partagent le même quota.
+
+Avant chaque appel, on réserve une requête et l'estimation tiktoken du prompt
+plus le maximum de tokens de complétion ; après l'appel, on rend la différence
+avec la consommation réelle (usage_metadata). Le débit cumulé reste ainsi
+au niveau de la limite sans la dépasser, au lieu de provoquer des cascades de 429.
+
+Configuration (voir RateLimiter.from_env) :
+    OPENAI_RATE_LIMITS=gpt-4o=500:30000,gpt-4o-mini=500:200000   # modèle=RPM:TPM
+    CDC_RATE_LIMIT_PATH=ratelimit.sqlite3
+"""
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import tiktoken
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    model TEXT PRIMARY KEY,
+    requests REAL NOT NULL,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+# Tokens ajoutés par message par le format de chat OpenAI
+_TOKENS_PER_MESSAGE = 4
+_DEFAULT_MAX_COMPLETION_TOKENS = 4096
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str) -> Optional[tiktoken.Encoding]:
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # Fichiers d'encodage non téléchargeables (poste hors ligne) : approximation
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    """Nombre de tokens d'un texte (tiktoken, ou ~4 caractères par token si l'encodage est indisponible)."""
+    encoding = _encoding(model)
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def estimate_tokens(messages: Any, model: str = "gpt-4o") -> int:
+    """
+    Estime le nombre de tokens d'un prompt avec tiktoken.
+
+    Args:
+        messages: Messages LangChain, tuples (rôle, texte) ou chaîne
+        model: Modèle cible (choix de l'encodage)
+
+    Returns:
+        Nombre de tokens estimé
+    """
+    if isinstance(messages, str):
+        return count_tokens(messages, model)
+    total = 3
+    for message in messages:
+        content = message[1] if isinstance(message, tuple) else getattr(message, "content", message)
+        total += _TOKENS_PER_MESSAGE + count_tokens(str(content), model)
+    return total
+
+
+@dataclass
+class Reservation:
+    """Quota réservé par RateLimiter.acquire(), à solder avec reconcile()."""
+    model: str
+    tokens: int
+
+
+class RateLimiter:
+    """
+    Seaux à jetons RPM / TPM par modèle, persistés dans SQLite.
+
+    Args:
+        limits: {modèle: (RPM, TPM)}
+        path: Fichier SQLite partagé entre processus
+        default_limits: (RPM, TPM) des modèles absents de limits (None = pas de limite)
+        burst_seconds: Capacité des seaux, en secondes de débit (60 = une minute de quota)
+        max_wait: Attente maximale par appel avant TimeoutError, en secondes
+    """
+
+    def __init__(self, limits: Dict[str, Tuple[float, float]], path: str = "ratelimit.sqlite3",
+                 default_limits: Optional[Tuple[float, float]] = None, burst_seconds: float = 60.0,
+                 max_wait: float = 600.0):
+        self.limits = dict(limits)
+        self.path = path
+        self.default_limits = default_limits
+        self.burst_seconds = burst_seconds
+        self.max_wait = max_wait
+        self.waited = 0.0
+        self._local = threading.local()
+        self._connection().executescript(SCHEMA)
+
+    @classmethod
+    def from_env(cls) -> Optional["RateLimiter"]:
+        """Construit le limiteur depuis OPENAI_RATE_LIMITS (None si la variable est absente)."""
+        spec = os.getenv("OPENAI_RATE_LIMITS")
+        if not spec:
+            return None
+        limits = {}
+        for entry in spec.split(","):
+            model, _, values = entry.strip().partition("=")
+            rpm, _, tpm = values.partition(":")
+            limits[model.strip()] = (float(rpm), float(tpm))
+        return cls(limits, path=os.getenv("CDC_RATE_LIMIT_PATH", "ratelimit.sqlite3"))
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def _capacity(self, model: str) -> Optional[Tuple[float, float]]:
+        limits = self.limits.get(model, self.default_limits)
+        if limits is None:
+            return None
+        rpm, tpm = limits
+        return rpm * self.burst_seconds / 60, tpm * self.burst_seconds / 60
+
+    def _update(self, model: str, requests: float, tokens: float, force: bool = False) -> float:
+        """
+        Recharge le seau du modèle puis tente d'y prélever (requests, tokens).
+        Avec force=True, le prélèvement est fait même à découvert (solde d'une réservation).
+
+        Returns:
+            0 si le prélèvement est fait, sinon le délai avant qu'il soit possible
+        """
+        rpm, tpm = self.limits.get(model, self.default_limits)  # type: ignore
+        max_requests, max_tokens = self._capacity(model)  # type: ignore
+        connection = self._connection()
+        now = time.time()
+        # BEGIN IMMEDIATE : lecture et écriture atomiques entre processus
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT requests, tokens, updated_at FROM buckets WHERE model = ?", (model,)
+            ).fetchone()
+            available_requests, available_tokens = (max_requests, max_tokens) if row is None else (
+                min(max_requests, row[0] + (now - row[2]) * rpm / 60),
+                min(max_tokens, row[1] + (now - row[2]) * tpm / 60),
+            )
+            wait = 0.0
+            if not force:
+                if requests > 0 and available_requests < requests:
+                    wait = (requests - available_requests) * 60 / rpm
+                if tokens > 0 and available_tokens < tokens:
+                    wait = max(wait, (tokens - available_tokens) * 60 / tpm)
+            if wait == 0:
+                available_requests -= requests
+                available_tokens -= tokens
+            connection.execute(
+                "INSERT OR REPLACE INTO buckets (model, requests, tokens, updated_at) VALUES (?, ?, ?, ?)",
+                (model, available_requests, min(max_tokens, available_tokens), now)
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return wait
+
+    def acquire(self, model: str, tokens: int) -> Reservation:
+        """
+        Attend que le modèle ait une requête et `tokens` tokens disponibles, puis les réserve.
+
+        Args:
+            model: Nom du modèle
+            tokens: Tokens à réserver (prompt estimé + complétion maximale)
+
+        Returns:
+            Reservation à passer à reconcile() après l'appel
+        """
+        capacity = self._capacity(model)
+        if capacity is None:
+            return Reservation(model, 0)
+        # Une demande plus grande que le seau ne passerait jamais
+        tokens = int(min(tokens, capacity[1]))
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            wait = self._update(model, 1, tokens)
+            if wait == 0:
+                return Reservation(model, tokens)
+            if time.monotonic() + wait > deadline:
+                raise TimeoutError(f"rate limit for {model}: no capacity within {self.max_wait:.0f}s")
+            self.waited += wait
+            time.sleep(wait)
+
+    def reconcile(self, reservation: Reservation, actual_tokens: int) -> None:
+        """Solde une réservation avec la consommation réelle (rend ou prélève la différence)."""
+        if self._capacity(reservation.model) is None:
+            return
+        self._update(reservation.model, 0, actual_tokens - reservation.tokens, force=True)
+
+    def available(self, model: str) -> Optional[Tuple[float, float]]:
+        """Requêtes et tokens disponibles maintenant pour un modèle (None si non limité)."""
+        capacity = self._capacity(model)
+        if capacity is None:
+            return None
+        row = self._connection().execute(
+            "SELECT requests, tokens, updated_at FROM buckets WHERE model = ?", (model,)
+        ).fetchone()
+        if row is None:
+            return capacity
+        rpm, tpm = self.limits.get(model, self.default_limits)  # type: ignore
+        elapsed = time.time() - row[2]
+        return min(capacity[0], row[0] + elapsed * rpm / 60), min(capacity[1], row[1] + elapsed * tpm / 60)
+
+
+class RateLimitedChatModel:
+    """
+    Enveloppe un modèle de chat (ChatOpenAI, FakeChatModel…) : chaque invoke()
+    ou stream() réserve son quota avant l'appel et le solde après.
+
+    Args:
+        llm: Modèle de chat enveloppé
+        limiter: Limiteur partagé
+        max_completion_tokens: Tokens de complétion réservés (par défaut llm.max_tokens, sinon 4096)
+    """
+
+    def __init__(self, llm: Any, limiter: RateLimiter, max_completion_tokens: Optional[int] = None):
+        self.llm = llm
+        self.limiter = limiter
+        self.model = str(getattr(llm, "model_name", None) or getattr(llm, "model", "default"))
+        self.max_completion_tokens = (
+            max_completion_tokens or getattr(llm, "max_tokens", None) or _DEFAULT_MAX_COMPLETION_TOKENS
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.llm, name)
+
+    def _reserve(self, messages: Any) -> Tuple[Reservation, int]:
+        prompt_tokens = estimate_tokens(messages, self.model)
+        return self.limiter.acquire(self.model, prompt_tokens + self.max_completion_tokens), prompt_tokens
+
+    def _actual_tokens(self, usage: Optional[dict], prompt_tokens: int, content: str) -> int:
+        if usage and usage.get("total_tokens"):
+            return int(usage["total_tokens"])
+        return prompt_tokens + count_tokens(content, self.model)
+
+    def invoke(self, messages: Any, **kwargs) -> Any:
+        reservation, prompt_tokens = self._reserve(messages)
+        try:
+            response = self.llm.invoke(messages, **kwargs)
+        except BaseException:
+            # Requête refusée ou interrompue : on compte seulement le prompt
+            self.limiter.reconcile(reservation, prompt_tokens)
+            raise
+        usage = getattr(response, "usage_metadata", None)
+        self.limiter.reconcile(reservation, self._actual_tokens(usage, prompt_tokens, str(response.content)))
+        return response
+
+    def stream(self, messages: Any, **kwargs) -> Iterator[Any]:
+        reservation, prompt_tokens = self._reserve(messages)
+        usage, parts = None, []
+        try:
+            for chunk in self.llm.stream(messages, **kwargs):
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                parts.append(str(chunk.content))
+                yield chunk
+        finally:
+            self.limiter.reconcile(reservation, self._actual_tokens(usage, prompt_tokens, "".join(parts)))
@@ -0,0 +1,274 @@
+"""
+Historique des révisions d'un projet, stocké en deltas JSON Patch.
+
+Chaque révision (Submit, import…) enregistre Project.to_dict() dans un
+fichier SQLite local. Seule la différence avec la révision précédente est
+conservée (RFC 6902, via jsonpatch) : le stockage croît avec la taille des
+modifications, pas avec celle du projet. Toutes les `snapshot_every`
+révisions, ou quand le delta serait plus gros que le projet lui-même, une
+copie complète est écrite à la place : reconstruire une version applique
+au plus `snapshot_every - 1` deltas à partir de la copie précédente.
+
+Le numéro de révision N est reporté dans meta["version"] ("N.0") avant
+l'enregistrement : le CDC et le payload webhook citent la version tracée.
+
+Usage:
+    store = RevisionStore("revisions.sqlite3")
+    version = store.commit(project_key(project), project, author="Consultant")
+    old = store.get(project_key(project), version=2)
+
+Usage CLI:
+    python -m utils.revision_store history revisions.sqlite3 "ACME/Refonte"
+    python -m utils.revision_store show revisions.sqlite3 "ACME/Refonte" 3
+    python -m utils.revision_store diff revisions.sqlite3 "ACME/Refonte" 2 5
+"""
+import argparse
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import jsonpatch
+import orjson
+
+from models.Project import Project
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS revisions (
+    project_key TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    body BLOB NOT NULL,
+    author TEXT,
+    message TEXT,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (project_key, version)
+);
+"""
+
+# Lignes nécessaires pour reconstruire une version : la dernière copie complète puis les deltas suivants
+_CHAIN_QUERY = """
+SELECT version, kind, body FROM revisions
+WHERE project_key = ? AND version <= ? AND version >= (
+    SELECT MAX(version) FROM revisions WHERE project_key = ? AND kind = 'snapshot' AND version <= ?
+)
+ORDER BY version
+"""
+
+DEFAULT_SNAPSHOT_EVERY = 20
+
+
+@dataclass
+class Revision:
+    project_key: str
+    version: int
+    kind: str
+    size: int
+    author: Optional[str]
+    message: Optional[str]
+    created_at: float
+
+
+def _copy(document: Dict[str, Any]) -> Dict[str, Any]:
+    # Copie profonde, normalisée en types JSON (tuples -> listes) comme le document stocké
+    return orjson.loads(orjson.dumps(document))
+
+
+class RevisionStore:
+    """
+    Révisions successives des projets, en deltas JSON Patch avec copies complètes périodiques.
+
+    Args:
+        path: Fichier SQLite des révisions
+        snapshot_every: Une copie complète toutes les `snapshot_every` révisions d'un projet
+    """
+
+    def __init__(self, path: str = "revisions.sqlite3", snapshot_every: int = DEFAULT_SNAPSHOT_EVERY):
+        self.path = path
+        self.snapshot_every = max(1, snapshot_every)
+        self._local = threading.local()
+        # Dernière révision de chaque projet (version, document) : commit() n'a rien à reconstruire
+        self._heads: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # Une connexion par thread, comme l'outbox webhook
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def latest_version(self, key: str) -> int:
+        """Numéro de la dernière révision d'un projet (0 s'il n'en a aucune)."""
+        row = self._connection().execute(
+            "SELECT MAX(version) FROM revisions WHERE project_key = ?", (key,)
+        ).fetchone()
+        return row[0] or 0
+
+    def commit(self, key: str, project: Project, author: Optional[str] = None,
+               message: Optional[str] = None) -> int:
+        """
+        Enregistre l'état actuel du projet comme nouvelle révision.
+
+        meta["version"] reçoit "N.0" (N = numéro de la révision). Si rien n'a
+        changé depuis la dernière révision, aucune n'est ajoutée.
+
+        Args:
+            key: Clé du projet (voir project_key)
+            project: Projet à enregistrer
+            author: Auteur de la révision
+            message: Motif (avenant, correction…)
+
+        Returns:
+            Numéro de la révision (nouvelle, ou dernière si le projet n'a pas changé)
+        """
+        connection = self._connection()
+        with self._lock:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                head_version, head = self._head(key)
+                if head is not None:
+                    # Comparaison à version égale : seule une modification réelle crée une révision
+                    current = _copy({**project.to_dict(), "meta": {**project.meta, "version": head["meta"].get("version")}})
+                    if current == head:
+                        connection.execute("COMMIT")
+                        project.meta["version"] = head["meta"].get("version")
+                        return head_version
+
+                version = head_version + 1
+                project.meta["version"] = f"{version}.0"
+                document = _copy(project.to_dict())
+                snapshot = orjson.dumps(document)
+                kind, body = "snapshot", snapshot
+                if head is not None and (version - 1) % self.snapshot_every:
+                    delta = orjson.dumps(jsonpatch.make_patch(head, document).patch)
+                    if len(delta) < len(snapshot):
+                        kind, body = "patch", delta
+                connection.execute(
+                    "INSERT INTO revisions (project_key, version, kind, body, author, message, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, version, kind, body, author, message, time.time())
+                )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            self._heads[key] = (version, document)
+            return version
+
+    def _head(self, key: str) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """Dernière révision (version, document), reconstruite si un autre processus l'a déplacée."""
+        version = self.latest_version(key)
+        if version == 0:
+            return 0, None
+        cached = self._heads.get(key)
+        if cached is None or cached[0] != version:
+            cached = (version, self._reconstruct(key, version))
+            self._heads[key] = cached
+        return cached
+
+    def _reconstruct(self, key: str, version: int) -> Dict[str, Any]:
+        rows = self._connection().execute(_CHAIN_QUERY, (key, version, key, version)).fetchall()
+        if not rows or rows[-1][0] != version:
+            raise KeyError(f"Unknown revision {version} of project {key!r}")
+        document: Dict[str, Any] = orjson.loads(rows[0][2])
+        for _, _, body in rows[1:]:
+            document = jsonpatch.apply_patch(document, orjson.loads(body), in_place=True)
+        return document
+
+    def get_dict(self, key: str, version: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Reconstruit une révision sous la forme de Project.to_dict().
+
+        Args:
+            key: Clé du projet
+            version: Numéro de révision (dernière si None)
+
+        Returns:
+            Copie du document (modifiable sans effet sur l'historique)
+        """
+        if version is None:
+            version, head = self._head(key)
+            if head is None:
+                raise KeyError(f"Unknown project {key!r}")
+            return _copy(head)
+        cached = self._heads.get(key)
+        if cached is not None and cached[0] == version:
+            return _copy(cached[1])
+        return self._reconstruct(key, version)
+
+    def get(self, key: str, version: Optional[int] = None) -> Project:
+        """Reconstruit une révision en Project (dernière si version est None)."""
+        return Project.from_dict(self.get_dict(key, version), copy=False)
+
+    def diff(self, key: str, from_version: int, to_version: int) -> List[Dict[str, Any]]:
+        """Opérations JSON Patch qui mènent de la révision `from_version` à `to_version`."""
+        return jsonpatch.make_patch(self.get_dict(key, from_version), self.get_dict(key, to_version)).patch
+
+    def history(self, key: str) -> List[Revision]:
+        """Révisions d'un projet, de la plus ancienne à la plus récente (sans le contenu)."""
+        rows = self._connection().execute(
+            "SELECT project_key, version, kind, LENGTH(body), author, message, created_at "
+            "FROM revisions WHERE project_key = ? ORDER BY version", (key,)
+        ).fetchall()
+        return [Revision(*row) for row in rows]
+
+    def projects(self) -> List[str]:
+        """Clés des projets qui ont au moins une révision."""
+        rows = self._connection().execute("SELECT DISTINCT project_key FROM revisions ORDER BY project_key").fetchall()
+        return [row[0] for row in rows]
+
+
+def project_key(project: Project) -> str:
+    """
+    Fonction utilitaire : clé d'historique d'un projet (client/projet), partagée avec l'outbox webhook.
+
+    Args:
+        project: Projet concerné
+
+    Returns:
+        Clé "client_name/project_name"
+    """
+    return f"{project.meta.get('client_name')}/{project.meta.get('project_name')}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Historique des révisions de projets")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    history = sub.add_parser("history", help="liste les révisions d'un projet")
+    history.add_argument("store")
+    history.add_argument("key")
+
+    show = sub.add_parser("show", help="affiche une révision (JSON)")
+    show.add_argument("store")
+    show.add_argument("key")
+    show.add_argument("version", type=int, nargs="?")
+
+    diff = sub.add_parser("diff", help="opérations JSON Patch entre deux révisions")
+    diff.add_argument("store")
+    diff.add_argument("key")
+    diff.add_argument("from_version", type=int)
+    diff.add_argument("to_version", type=int)
+
+    args = parser.parse_args()
+    store = RevisionStore(args.store)
+    if args.command == "history":
+        for revision in store.history(args.key):
+            date = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(revision.created_at))
+            print(f"{revision.version:>5}.0  {date}  {revision.kind:<8} {revision.size:>8} octets  "
+                  f"{revision.author or '-'}  {revision.message or ''}")
+    elif args.command == "show":
+        print(orjson.dumps(store.get_dict(args.key, args.version), option=orjson.OPT_INDENT_2).decode("utf-8"))
+    else:
+        print(orjson.dumps(store.diff(args.key, args.from_version, args.to_version), option=orjson.OPT_INDENT_2).decode("utf-8"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Calculs anticipés pendant la saisie du wizard.
+
+Le budget dépend surtout des pages déjà remplies : plutôt que d'attendre le
+Submit, l'interface lance l'estimation en arrière-plan dès que les pages
+utiles sont validées. Chaque calcul est associé à l'empreinte des entrées
+qu'il lit (voir utils.fingerprint) ; au Submit, le résultat n'est repris que
+si l'empreinte du projet final est identique, sinon il est ignoré et le
+calcul refait.
+
+Usage:
+    speculator = Speculator()
+    speculator.start("budget", project, estimator.estimate,
+                     fingerprint=lambda p: output_fingerprint(p, "budget"))
+    ...
+    estimate = speculator.take("budget", project)  # None si le projet a changé
+"""
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from models.Project import Project
+from utils.fingerprint import fingerprint as project_fingerprint
+from utils.metrics import record_cache
+
+
+class Speculator:
+    """
+    Calculs en arrière-plan réutilisés seulement si leurs entrées n'ont pas changé.
+
+    Une tâche par clé : relancer une clé avec une autre empreinte remplace la
+    tâche précédente (annulée si elle n'a pas démarré, son résultat ignoré sinon).
+
+    Args:
+        max_workers: Calculs anticipés simultanés
+        name: Préfixe des noms de threads
+    """
+
+    def __init__(self, max_workers: int = 2, name: str = "speculation"):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._tasks: Dict[str, Tuple[str, Callable[[Project], str], Future]] = {}
+        self._lock = threading.Lock()
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+
+    def start(self, key: str, project: Project, fn: Callable[[Project], Any],
+              fingerprint: Callable[[Project], str] = project_fingerprint) -> bool:
+        """
+        Lance fn sur une copie du projet, sauf si la même clé tourne déjà avec la même empreinte.
+
+        Args:
+            key: Nom du calcul ("budget", "notes"…)
+            project: Projet en cours de saisie (non modifié)
+            fn: Calcul à anticiper, appelé avec la copie
+            fingerprint: Empreinte des entrées lues par fn (projet entier par défaut ;
+                         voir utils.fingerprint.output_fingerprint)
+
+        Returns:
+            True si un calcul a été lancé
+        """
+        current_fingerprint = fingerprint(project)
+        with self._lock:
+            previous = self._tasks.get(key)
+            if previous is not None and previous[0] == current_fingerprint:
+                return False
+            if previous is not None:
+                previous[2].cancel()
+            # Copie profonde : la saisie continue pendant le calcul
+            snapshot = Project.from_bytes(project.to_bytes())
+            self._tasks[key] = (current_fingerprint, fingerprint, self._executor.submit(fn, snapshot))
+            self.started += 1
+        return True
+
+    def take(self, key: str, project: Project, timeout: Optional[float] = None) -> Optional[Any]:
+        """
+        Récupère le résultat anticipé (en attendant sa fin si besoin) si le projet n'a pas changé.
+
+        Args:
+            key: Nom du calcul
+            project: Projet soumis
+            timeout: Attente maximale du calcul en cours, en secondes (None = illimitée)
+
+        Returns:
+            Résultat de fn, ou None (pas de calcul, entrées modifiées, échec ou délai dépassé)
+        """
+        result = self._take(key, project, timeout)
+        record_cache(f"speculation_{key}", result is not None)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def _take(self, key: str, project: Project, timeout: Optional[float]) -> Optional[Any]:
+        with self._lock:
+            task = self._tasks.pop(key, None)
+        if task is None:
+            return None
+        expected, fingerprint, future = task
+        if fingerprint(project) != expected:
+            future.cancel()
+            return None
+        try:
+            return future.result(timeout)
+        except Exception:
+            return None
+
+    def shutdown(self) -> None:
+        """Abandonne les calculs en attente (ceux en cours se terminent en arrière-plan)."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,26 @@
+"""
+Fonctions utilitaires partagées par les modules de utils/.
+"""
+import os
+import tempfile
+
+
+def atomic_write(path: str, data: bytes) -> None:
+    """
+    Écrit un fichier par remplacement atomique : les lecteurs voient l'ancien contenu ou le nouveau, jamais un fichier partiel.
+
+    Plusieurs processus peuvent produire la même entrée de cache en même
+    temps ; le fichier temporaire est supprimé si l'écriture échoue.
+
+    Args:
+        path: Fichier de destination (son dossier doit exister)
+        data: Contenu complet du fichier
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -0,0 +1,237 @@
+"""
+Envoi des projets et des CDC au webhook n8n.
+
+Client HTTP asynchrone avec pool de connexions partagé (aiohttp), corps JSON
+compressé en gzip, limite de concurrence par endpoint et métriques de
+livraison. Pour les tests et les benchmarks, voir utils.fake_webhook_server.
+"""
+import asyncio
+import gzip
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+import orjson
+
+from models.Project import Project
+
+
+API_KEY_HEADER = "API-KEY-CDC"
+
+
+@dataclass
+class DeliveryResult:
+    """Résultat de l'envoi d'une soumission."""
+    ok: bool
+    status: Optional[int]
+    attempts: int
+    latency: float
+    payload_bytes: int
+    error: Optional[str] = None
+
+
+@dataclass
+class DeliveryMetrics:
+    """Métriques agrégées d'un lot d'envois."""
+    sent: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    retries: int = 0
+    raw_bytes: int = 0
+    payload_bytes: int = 0
+    elapsed: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+
+    def record(self, result: DeliveryResult, raw_bytes: int) -> None:
+        self.sent += 1
+        self.succeeded += result.ok
+        self.failed += not result.ok
+        self.retries += result.attempts - 1
+        self.raw_bytes += raw_bytes
+        self.payload_bytes += result.payload_bytes
+        self.latencies.append(result.latency)
+
+    def percentile(self, p: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "sent": self.sent,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "retries": self.retries,
+            "throughput_per_s": self.sent / self.elapsed if self.elapsed else 0.0,
+            "latency_p50_ms": self.percentile(50) * 1000,
+            "latency_p95_ms": self.percentile(95) * 1000,
+            "compression_ratio": self.raw_bytes / self.payload_bytes if self.payload_bytes else 0.0,
+        }
+
+
+def build_payload(project: Project, cdc_content: Optional[str] = None, extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Construit le corps JSON envoyé au webhook.
+
+    Args:
+        project: Projet soumis
+        cdc_content: CDC généré (markdown), si disponible
+        extra: Champs additionnels (ex: estimation budgétaire)
+
+    Returns:
+        Dictionnaire {"project": ..., "cdc": ..., ...}
+    """
+    payload: Dict[str, Any] = {"project": project.to_dict(), "cdc": cdc_content}
+    if extra:
+        payload.update(extra)
+    return payload
+
+
+def encode_payload(payload: Dict[str, Any], compress: bool = True, level: int = 5) -> Tuple[bytes, int]:
+    """Sérialise (orjson) puis compresse (gzip) un payload ; retourne (corps, taille brute)."""
+    raw = orjson.dumps(payload)
+    body = gzip.compress(raw, compresslevel=level) if compress else raw
+    return body, len(raw)
+
+
+class WebhookClient:
+    """
+    Client webhook asynchrone à utiliser comme gestionnaire de contexte :
+
+        async with WebhookClient(url, api_key) as client:
+            results, metrics = await client.send_many(payloads)
+    """
+
+    def __init__(self, url: str, api_key: Optional[str] = None, max_connections: int = 100,
+                 per_endpoint_limit: int = 20, timeout: float = 30.0, retries: int = 2,
+                 compress: bool = True):
+        """
+        Args:
+            url: URL du webhook par défaut
+            api_key: Clé envoyée dans l'en-tête API-KEY-CDC
+            max_connections: Taille du pool de connexions
+            per_endpoint_limit: Requêtes simultanées maximum par URL
+            timeout: Délai maximum d'une requête en secondes
+            retries: Nouvelles tentatives sur erreur réseau ou réponse 5xx/429
+            compress: Compresser le corps en gzip
+        """
+        self.url = url
+        self.api_key = api_key
+        self.max_connections = max_connections
+        self.per_endpoint_limit = per_endpoint_limit
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.retries = retries
+        self.compress = compress
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    async def __aenter__(self) -> "WebhookClient":
+        connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.per_endpoint_limit)
+        self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {"Content-Type": "application/json"}
+        if self.compress:
+            headers["Content-Encoding"] = "gzip"
+        if self.api_key:
+            headers[API_KEY_HEADER] = self.api_key
+        return headers
+
+    def _semaphore(self, url: str) -> asyncio.Semaphore:
+        if url not in self._semaphores:
+            self._semaphores[url] = asyncio.Semaphore(self.per_endpoint_limit)
+        return self._semaphores[url]
+
+    async def post(self, body: bytes, url: Optional[str] = None) -> DeliveryResult:
+        """
+        Envoie un corps déjà encodé (voir encode_payload), avec nouvelles tentatives.
+
+        Args:
+            body: Corps de la requête
+            url: URL cible (URL par défaut si None)
+
+        Returns:
+            DeliveryResult
+        """
+        if self._session is None:
+            raise RuntimeError("WebhookClient must be used as an async context manager")
+        url = url or self.url
+        headers = self._headers()
+        start = time.perf_counter()
+        status = None
+        error = None
+
+        for attempt in range(1, self.retries + 2):
+            try:
+                async with self._semaphore(url):
+                    async with self._session.post(url, data=body, headers=headers) as response:
+                        status = response.status
+                        await response.read()
+                if status < 400:
+                    return DeliveryResult(True, status, attempt, time.perf_counter() - start, len(body))
+                error = f"HTTP {status}"
+                if status != 429 and status < 500:
+                    break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = f"{type(e).__name__}: {e}"
+            if attempt <= self.retries:
+                await asyncio.sleep(0.1 * 2 ** (attempt - 1))
+
+        return DeliveryResult(False, status, attempt, time.perf_counter() - start, len(body), error)
+
+    async def send(self, payload: Dict[str, Any], url: Optional[str] = None) -> DeliveryResult:
+        """Encode et envoie un payload (voir build_payload)."""
+        body, _ = encode_payload(payload, self.compress)
+        return await self.post(body, url)
+
+    async def send_many(self, payloads: Iterable[Dict[str, Any]], url: Optional[str] = None) -> Tuple[List[DeliveryResult], DeliveryMetrics]:
+        """
+        Envoie un lot de payloads en parallèle (dans la limite par endpoint).
+
+        Returns:
+            Tuple (résultats dans l'ordre des payloads, métriques du lot)
+        """
+        encoded = [encode_payload(payload, self.compress) for payload in payloads]
+        metrics = DeliveryMetrics()
+        start = time.perf_counter()
+        results = await asyncio.gather(*(self.post(body, url) for body, _ in encoded))
+        metrics.elapsed = time.perf_counter() - start
+        for result, (_, raw_size) in zip(results, encoded):
+            metrics.record(result, raw_size)
+        return list(results), metrics
+
+
+def post_to_n8n(project: Project, cdc_content: Optional[str] = None, extra: Optional[Dict[str, Any]] = None,
+                url: Optional[str] = None, api_key: Optional[str] = None) -> DeliveryResult:
+    """
+    Fonction utilitaire synchrone : envoie un projet (et son CDC) au webhook n8n.
+
+    Args:
+        project: Projet soumis
+        cdc_content: CDC généré, si disponible
+        extra: Champs additionnels du payload
+        url: URL du webhook (si None, utilise N8N_WEBHOOK_URL)
+        api_key: Clé API (si None, utilise API_KEY_CDC)
+
+    Returns:
+        DeliveryResult
+    """
+    url = url or os.getenv("N8N_WEBHOOK_URL")
+    if not url:
+        raise ValueError("N8N_WEBHOOK_URL must be set in environment or passed as parameter")
+    api_key = api_key or os.getenv("API_KEY_CDC")
+
+    async def _send() -> DeliveryResult:
+        async with WebhookClient(url, api_key) as client:
+            return await client.send(build_payload(project, cdc_content, extra))
+
+    return asyncio.run(_send())
@@ -0,0 +1,247 @@
+"""
+Outbox durable pour les livraisons webhook.
+
+La soumission écrit le payload dans un fichier SQLite local (une insertion,
+quelques microsecondes en mode WAL) et rend la main immédiatement. Un thread
+de fond (OutboxFlusher) vide l'outbox par lots vers le webhook, avec nouvelles
+tentatives espacées, ordre préservé par projet et mise en dead-letter après
+trop d'échecs. Une entrée n'est supprimée qu'après un accusé 2xx : livraison
+au moins une fois, même si l'application est fermée entre-temps.
+"""
+import asyncio
+import gzip
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+from utils.webhook_client import WebhookClient
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    project_key TEXT NOT NULL,
+    url TEXT,
+    body BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_pending ON outbox (status, project_key, id);
+"""
+
+# Tête de file de chaque projet : on ne livre jamais une entrée tant que la
+# précédente du même projet n'est pas livrée ou en dead-letter
+_READY_QUERY = """
+SELECT o.id, o.project_key, o.url, o.body, o.attempts
+FROM outbox o
+JOIN (SELECT MIN(id) AS id FROM outbox WHERE status = 'pending' GROUP BY project_key) heads
+  ON o.id = heads.id
+WHERE o.next_attempt_at <= ?
+ORDER BY o.id
+LIMIT ?
+"""
+
+
+@dataclass
+class OutboxEntry:
+    id: int
+    project_key: str
+    url: Optional[str]
+    body: bytes
+    attempts: int
+
+
+class WebhookOutbox:
+    """
+    File d'attente persistante des payloads à envoyer au webhook.
+
+    Args:
+        path: Fichier SQLite de l'outbox
+        max_attempts: Nombre d'échecs avant mise en dead-letter
+        base_delay: Délai avant la première nouvelle tentative (doublé à chaque échec)
+        max_delay: Délai maximum entre deux tentatives
+    """
+
+    def __init__(self, path: str = "outbox.sqlite3", max_attempts: int = 8,
+                 base_delay: float = 1.0, max_delay: float = 300.0):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._local = threading.local()
+        self._listeners: List[threading.Event] = []
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # Une connexion par thread : l'interface et le flusher écrivent en parallèle
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def enqueue(self, payload: Dict[str, Any], project_key: str, url: Optional[str] = None) -> int:
+        """
+        Ajoute un payload à l'outbox.
+
+        Args:
+            payload: Corps JSON à envoyer (voir webhook_client.build_payload)
+            project_key: Clé du projet ; les entrées d'un même projet sont livrées dans l'ordre
+            url: URL cible (URL du flusher si None)
+
+        Returns:
+            Identifiant de l'entrée
+        """
+        cursor = self._connection().execute(
+            "INSERT INTO outbox (project_key, url, body, created_at) VALUES (?, ?, ?, ?)",
+            (project_key, url, orjson.dumps(payload), time.time())
+        )
+        for event in self._listeners:
+            event.set()
+        return cursor.lastrowid  # type: ignore
+
+    def ready(self, limit: int = 100) -> List[OutboxEntry]:
+        """Retourne les entrées livrables maintenant (au plus une par projet)."""
+        rows = self._connection().execute(_READY_QUERY, (time.time(), limit)).fetchall()
+        return [OutboxEntry(*row) for row in rows]
+
+    def seconds_until_next(self) -> Optional[float]:
+        """Délai avant la prochaine tentative planifiée (None si l'outbox est vide)."""
+        row = self._connection().execute(
+            "SELECT MIN(next_attempt_at) FROM outbox WHERE status = 'pending'"
+        ).fetchone()
+        return None if row[0] is None else max(0.0, row[0] - time.time())
+
+    def mark_delivered(self, entry_id: int) -> None:
+        self._connection().execute("DELETE FROM outbox WHERE id = ?", (entry_id,))
+
+    def mark_failed(self, entry: OutboxEntry, error: str, retryable: bool = True) -> None:
+        """Planifie une nouvelle tentative, ou passe l'entrée en dead-letter."""
+        attempts = entry.attempts + 1
+        if not retryable or attempts >= self.max_attempts:
+            self._connection().execute(
+                "UPDATE outbox SET attempts = ?, status = 'dead', last_error = ? WHERE id = ?",
+                (attempts, error, entry.id)
+            )
+            return
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        self._connection().execute(
+            "UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+            (attempts, time.time() + delay, error, entry.id)
+        )
+
+    def dead_letters(self) -> List[Dict[str, Any]]:
+        """Retourne les entrées en dead-letter (sans le corps)."""
+        rows = self._connection().execute(
+            "SELECT id, project_key, attempts, last_error, created_at FROM outbox WHERE status = 'dead' ORDER BY id"
+        ).fetchall()
+        return [
+            {"id": row[0], "project_key": row[1], "attempts": row[2], "last_error": row[3], "created_at": row[4]}
+            for row in rows
+        ]
+
+    def requeue_dead(self) -> int:
+        """Remet les entrées en dead-letter dans la file ; retourne leur nombre."""
+        cursor = self._connection().execute(
+            "UPDATE outbox SET status = 'pending', attempts = 0, next_attempt_at = 0 WHERE status = 'dead'"
+        )
+        return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        """Nombre d'entrées par statut (pending, dead)."""
+        rows = self._connection().execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        counts = {"pending": 0, "dead": 0}
+        counts.update(dict(rows))
+        return counts
+
+    def subscribe(self, event: threading.Event) -> None:
+        """Enregistre un événement signalé à chaque nouvelle entrée (réveil du flusher)."""
+        self._listeners.append(event)
+
+
+class OutboxFlusher:
+    """
+    Thread de fond qui vide l'outbox vers le webhook par lots.
+
+    Args:
+        outbox: Outbox à vider
+        url: URL du webhook par défaut
+        api_key: Clé API du webhook
+        batch_size: Nombre maximum d'entrées envoyées en parallèle
+        idle_interval: Attente maximale entre deux passes quand l'outbox est vide
+    """
+
+    def __init__(self, outbox: WebhookOutbox, url: str, api_key: Optional[str] = None,
+                 batch_size: int = 50, idle_interval: float = 1.0):
+        self.outbox = outbox
+        self.url = url
+        self.api_key = api_key
+        self.batch_size = batch_size
+        self.idle_interval = idle_interval
+        self.delivered = 0
+        self.failed = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        outbox.subscribe(self._wake)
+
+    def start(self) -> "OutboxFlusher":
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="outbox-flusher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = 10.0) -> None:
+        """Arrête le thread après la passe en cours (les entrées restantes restent en base)."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        asyncio.run(self._loop())
+
+    async def _loop(self) -> None:
+        # L'outbox gère elle-même les nouvelles tentatives : pas de retry dans le client
+        async with WebhookClient(self.url, self.api_key, per_endpoint_limit=self.batch_size, retries=0) as client:
+            while not self._stop.is_set():
+                flushed = await self.flush_once(client)
+                if flushed == 0:
+                    self._wake.clear()
+                    next_due = self.outbox.seconds_until_next()
+                    timeout = self.idle_interval if next_due is None else min(self.idle_interval, next_due)
+                    await asyncio.get_running_loop().run_in_executor(None, self._wake.wait, timeout)
+
+    async def flush_once(self, client: WebhookClient) -> int:
+        """Envoie un lot d'entrées prêtes ; retourne le nombre d'entrées traitées."""
+        entries = self.outbox.ready(self.batch_size)
+        if not entries:
+            return 0
+
+        async def deliver(entry: OutboxEntry):
+            # Le corps est stocké en JSON brut : la compression se fait ici, hors du chemin de soumission
+            body = gzip.compress(entry.body, compresslevel=5) if client.compress else entry.body
+            return await client.post(body, entry.url)
+
+        results = await asyncio.gather(*(deliver(entry) for entry in entries))
+        for entry, result in zip(entries, results):
+            if result.ok:
+                self.outbox.mark_delivered(entry.id)
+                self.delivered += 1
+            else:
+                # 4xx (hors 429) : la requête ne passera jamais telle quelle
+                retryable = result.status is None or result.status == 429 or result.status >= 500
+                self.outbox.mark_failed(entry, result.error or "unknown error", retryable)
+                self.failed += 1
+        return len(entries)